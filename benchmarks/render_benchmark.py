@@ -0,0 +1,230 @@
+"""
+Headless rendering benchmark for the viewer draw path.
+
+Drives the real plot_segment / next_segment / playback methods of
+ScopeSetupAndViewerGUI and SegmentViewerGUI on the Agg backend, with
+synthetic segment data instead of a scope and no Tk window (the GUI
+objects are created without __init__ and given an Agg figure and stand-in
+widgets). Reports frames/s for:
+  - step:     next_segment, as with the Next button
+  - jump:     plot_segment at random positions, as when dragging the slider
+  - playback: the _play_next loop with a zero frame interval
+  - filtered: step with a cached filter view (main viewer only)
+for each combination of record length and segment count.
+
+Usage:
+    python benchmarks/render_benchmark.py [--points 1000 10000] [--segments 1000 10000]
+                                          [--save results.json] [--baseline results.json]
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+
+import matplotlib
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+from segment_set import SegmentSet
+
+GUIS = {
+    "scope_setup_and_viewer": "ScopeSetupAndViewerGUI",
+    "segment_viewer_gui": "SegmentViewerGUI",
+}
+MODES = ("step", "jump", "playback", "filtered")
+FILTER_PRESET = "Moving average (8)"
+# Skip combinations whose synthetic data would exceed this many bytes
+MAX_DATA_BYTES = 1 << 29
+
+
+class _Widget:
+    """Stand-in for labels, buttons and Tk variables."""
+
+    def config(self, **kwargs):
+        pass
+
+    def set(self, value):
+        pass
+
+
+class _Root:
+    """Collects after() callbacks so playback can be stepped without a Tk loop."""
+
+    def __init__(self):
+        self.pending = []
+
+    def after(self, ms, callback=None, *args):
+        if callback is not None:
+            self.pending.append((callback, args))
+
+    def after_idle(self, callback, *args):
+        self.after(0, callback, *args)
+
+
+def synthetic_segments(n: int, points: int, seed: int = 0, xincr: float = 25e-12) -> SegmentSet:
+    """Noisy pulses with amplitude and position jitter, like a segmented pulse capture."""
+    rng = np.random.default_rng(seed)
+    t = np.arange(points, dtype=np.float32)
+    y = np.empty((n, points), dtype=np.int16)
+    for start in range(0, n, 1024):
+        rows = min(1024, n - start)
+        centre = points * 0.3 + rng.normal(0, 2, (rows, 1))
+        amp = rng.uniform(2000, 8000, (rows, 1))
+        width = max(points / 200, 2.0)
+        s = np.clip(t[None, :] - centre, 0, None)
+        pulse = amp * (1 - np.exp(-s / width)) * np.exp(-s / (10 * width))
+        y[start:start + rows] = (pulse + rng.normal(0, 40, (rows, points))).astype(np.int16)
+    ttags = np.cumsum(rng.exponential(1e-6, n))
+    return SegmentSet(y, ttags, xincr=xincr)
+
+
+def headless_viewer(module_name: str, segment_set: SegmentSet, filter_name: str = "None"):
+    """A GUI object (no Tk) whose draw path renders into an Agg figure."""
+    module = __import__(module_name)
+    cls = getattr(module, GUIS[module_name])
+    view = cls.__new__(cls)
+    view.root = _Root()
+    view.fig = Figure(figsize=(13, 5))
+    view.ax = view.fig.add_subplot()
+    view.canvas = FigureCanvasAgg(view.fig)
+    view.segments = segment_set
+    view.segment_set = segment_set
+    view.current_index = 0
+    view.is_playing = False
+    view.play_speed = 0
+    view._lazy_pending = None
+    for name in ("slider_var", "info_label", "status_label", "play_btn"):
+        setattr(view, name, _Widget())
+    # Main viewer navigation, overview and filter state
+    view.nav_positions = None
+    view.ov_marker = None
+    view.overview = None
+    view.filter_name = filter_name
+    view._filter = None
+    return view
+
+
+def _frames_per_second(draw, frames: int, min_seconds: float) -> float:
+    draw(0)  # first draw builds artists and caches fonts
+    count = 0
+    t0 = time.perf_counter()
+    while count < frames or time.perf_counter() - t0 < min_seconds:
+        draw(count)
+        count += 1
+    return count / (time.perf_counter() - t0)
+
+
+def run_mode(module_name: str, mode: str, segment_set: SegmentSet, frames: int, min_seconds: float) -> float:
+    filter_name = FILTER_PRESET if mode == "filtered" else "None"
+    view = headless_viewer(module_name, segment_set, filter_name)
+    n = len(segment_set)
+    if mode == "filtered":
+        view.segment_set.filtered(view._current_filter(segment_set.xincr), zero_phase=view._zero_phase())
+
+    if mode in ("step", "filtered"):
+        def draw(k):
+            if view.current_index >= n - 1:
+                view.current_index = -1
+            view.next_segment()
+    elif mode == "jump":
+        positions = np.random.default_rng(1).integers(0, n, frames + 1)
+
+        def draw(k):
+            view.plot_segment(int(positions[k % len(positions)]))
+    else:
+        def draw(k):
+            if view.root.pending:
+                callback, args = view.root.pending.pop(0)
+                callback(*args)
+            else:  # start, or restart after the last segment
+                view.current_index = -1
+                view.is_playing = True
+                view._play_next()
+
+    return _frames_per_second(draw, frames, min_seconds)
+
+
+def measure(points_list, segments_list, frames: int, repeat: int, min_seconds: float) -> dict:
+    results = {"fps": {}, "skipped": []}
+    for n in segments_list:
+        for points in points_list:
+            key = f"{n}x{points}"
+            if n * points * 2 > MAX_DATA_BYTES:
+                results["skipped"].append(key)
+                continue
+            segment_set = synthetic_segments(n, points)
+            for module_name in GUIS:
+                for mode in MODES:
+                    if mode == "filtered" and module_name != "scope_setup_and_viewer":
+                        continue
+                    runs = [run_mode(module_name, mode, segment_set, frames, min_seconds)
+                            for _ in range(repeat)]
+                    results["fps"].setdefault(module_name, {}).setdefault(mode, {})[key] = \
+                        statistics.median(runs)
+    results["environment"] = {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "matplotlib": matplotlib.__version__,
+        "machine": platform.machine(),
+        "system": platform.system(),
+    }
+    return results
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    """Return human-readable regressions where fps dropped by more than `tolerance` (fractional)."""
+    regressions = []
+    for module_name, modes in results["fps"].items():
+        for mode, by_size in modes.items():
+            for key, fps in by_size.items():
+                ref = baseline.get("fps", {}).get(module_name, {}).get(mode, {}).get(key)
+                if ref is None:
+                    continue
+                if fps < ref * (1.0 - tolerance):
+                    regressions.append(f"{module_name}[{mode} {key}]: {fps:.1f} fps vs baseline {ref:.1f} fps")
+    return regressions
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument("--points", type=int, nargs="+", default=[1000, 10000, 100000])
+    p.add_argument("--segments", type=int, nargs="+", default=[1000, 10000])
+    p.add_argument("--frames", type=int, default=30, help="Minimum frames per measurement")
+    p.add_argument("--min-seconds", type=float, default=0.5, help="Minimum time per measurement")
+    p.add_argument("--repeat", type=int, default=3)
+    p.add_argument("--save", help="Write results JSON to this path")
+    p.add_argument("--baseline", help="Compare against a previously saved results JSON")
+    p.add_argument("--tolerance", type=float, default=0.25, help="Allowed fps drop fraction")
+    args = p.parse_args(argv)
+
+    results = measure(args.points, args.segments, args.frames, args.repeat, args.min_seconds)
+    for module_name, modes in results["fps"].items():
+        print(f"{module_name} (frames/s, median):")
+        for mode, by_size in modes.items():
+            cells = "  ".join(f"{key}: {fps:7.1f}" for key, fps in by_size.items())
+            print(f"  {mode:<9} {cells}")
+    if results["skipped"]:
+        print(f"Skipped (synthetic data too large): {', '.join(results['skipped'])}")
+
+    if args.save:
+        with open(args.save, "w") as fh:
+            json.dump(results, fh, indent=2)
+    if args.baseline:
+        with open(args.baseline) as fh:
+            regressions = compare(results, json.load(fh), args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,122 @@
+"""
+Startup benchmark for the GUIs and headless tools.
+
+Each measurement runs in a fresh interpreter so module caches do not hide
+import cost. Reports:
+  - import time of each module, and whether pyvisa/matplotlib got loaded
+  - time-to-window for each GUI: interpreter start -> Tk window mapped
+    (skipped when no display is available)
+
+Usage:
+    python benchmarks/startup_benchmark.py [--repeat 5] [--save results.json]
+                                           [--baseline results.json]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODULES = ["scope_io", "segment_capture_cli", "segment_viewer_gui", "scope_setup_and_viewer"]
+GUIS = {
+    "segment_viewer_gui": "SegmentViewerGUI",
+    "scope_setup_and_viewer": "ScopeSetupAndViewerGUI",
+}
+
+_IMPORT_SNIPPET = """
+import json, sys, time
+t0 = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - t0
+print(json.dumps({{"seconds": elapsed,
+                  "heavy": [m for m in ("pyvisa", "matplotlib") if m in sys.modules]}}))
+"""
+
+_WINDOW_SNIPPET = """
+import json, sys, time
+t0 = time.perf_counter()
+import tkinter as tk
+try:
+    root = tk.Tk()
+except tk.TclError as e:
+    print(json.dumps({{"skipped": str(e)}}))
+    sys.exit(0)
+import {module}
+app = {module}.{cls}(root)
+root.update_idletasks()
+root.update()
+elapsed = time.perf_counter() - t0
+root.destroy()
+print(json.dumps({{"seconds": elapsed}}))
+"""
+
+
+def _run(snippet: str) -> dict:
+    out = subprocess.run([sys.executable, "-c", snippet], cwd=REPO_DIR, capture_output=True,
+                         text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def measure(repeat: int) -> dict:
+    results = {"import_s": {}, "heavy_imports": {}, "time_to_window_s": {}}
+    for module in MODULES:
+        runs = [_run(_IMPORT_SNIPPET.format(module=module)) for _ in range(repeat)]
+        results["import_s"][module] = statistics.median(r["seconds"] for r in runs)
+        results["heavy_imports"][module] = runs[0]["heavy"]
+    for module, cls in GUIS.items():
+        runs = [_run(_WINDOW_SNIPPET.format(module=module, cls=cls)) for _ in range(repeat)]
+        if "skipped" in runs[0]:
+            results["time_to_window_s"][module] = None
+        else:
+            results["time_to_window_s"][module] = statistics.median(r["seconds"] for r in runs)
+    return results
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    """Return human-readable regressions beyond `tolerance` (fractional)."""
+    regressions = []
+    for section in ("import_s", "time_to_window_s"):
+        for name, value in results[section].items():
+            ref = baseline.get(section, {}).get(name)
+            if value is None or ref is None:
+                continue
+            if value > ref * (1.0 + tolerance):
+                regressions.append(f"{section}[{name}]: {value*1e3:.1f} ms vs baseline {ref*1e3:.1f} ms")
+    return regressions
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument("--repeat", type=int, default=5)
+    p.add_argument("--save", help="Write results JSON to this path")
+    p.add_argument("--baseline", help="Compare against a previously saved results JSON")
+    p.add_argument("--tolerance", type=float, default=0.25, help="Allowed slowdown fraction")
+    args = p.parse_args(argv)
+
+    results = measure(args.repeat)
+    print("Import time (median):")
+    for name, seconds in results["import_s"].items():
+        heavy = results["heavy_imports"][name]
+        print(f"  {name:<24} {seconds*1e3:8.1f} ms" + (f"  loads {', '.join(heavy)}" if heavy else ""))
+    print("Time to window (median):")
+    for name, seconds in results["time_to_window_s"].items():
+        print(f"  {name:<24} " + ("skipped (no display)" if seconds is None else f"{seconds*1e3:8.1f} ms"))
+
+    if args.save:
+        with open(args.save, "w") as fh:
+            json.dump(results, fh, indent=2)
+    if args.baseline:
+        with open(args.baseline) as fh:
+            regressions = compare(results, json.load(fh), args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
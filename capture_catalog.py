@@ -0,0 +1,333 @@
+"""
+SQLite catalog of saved captures.
+
+One row per capture file (.segz store or .npz): instrument *IDN?, the
+acquisition setup (setup_scope_acquisition parameters), time-tag range and
+trigger-rate statistics, size and location on disk. Indexed columns make
+queries such as "trigger level 0.32 V and rate above 100 kHz" answer from
+the database alone, without opening any capture file.
+
+    python capture_catalog.py scan captures/            # index existing files
+    python capture_catalog.py find --trigger-level 0.32 --min-rate 1e5
+    python segment_capture_cli.py RESOURCE --single -o run7.segz --catalog
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import time
+import zipfile
+
+import numpy as np
+
+DEFAULT_CATALOG_PATH = os.path.join(os.path.expanduser("~"), ".infiniium_captures.sqlite")
+
+# setup_scope_acquisition parameters stored as columns
+SETUP_COLUMNS = ("channel_scale", "timebase_scale", "trigger_level", "timebase_position",
+                 "sample_rate", "acquire_points", "segment_count")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS captures (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    format TEXT,
+    created REAL,
+    recorded REAL,
+    idn TEXT,
+    resource TEXT,
+    source TEXT,
+    channel_scale REAL,
+    timebase_scale REAL,
+    trigger_level REAL,
+    timebase_position REAL,
+    sample_rate TEXT,
+    acquire_points INTEGER,
+    segment_count INTEGER,
+    segments INTEGER,
+    first_segment INTEGER,
+    last_segment INTEGER,
+    points INTEGER,
+    xincr REAL,
+    ttag_first REAL,
+    ttag_last REAL,
+    trigger_rate_hz REAL,
+    interval_min_s REAL,
+    interval_mean_s REAL,
+    interval_max_s REAL,
+    file_bytes INTEGER,
+    extra TEXT
+);
+CREATE INDEX IF NOT EXISTS captures_trigger ON captures (trigger_level, trigger_rate_hz);
+CREATE INDEX IF NOT EXISTS captures_rate ON captures (trigger_rate_hz);
+CREATE INDEX IF NOT EXISTS captures_created ON captures (created);
+CREATE INDEX IF NOT EXISTS captures_idn ON captures (idn, created);
+CREATE INDEX IF NOT EXISTS captures_points ON captures (acquire_points, segment_count);
+"""
+
+# Tolerance for matching float settings (0.32 V must find 0.3200000001)
+_REL_TOL = 1e-6
+
+
+def ttag_summary(ttags) -> dict:
+    """Time-tag range, mean trigger rate and inter-trigger interval statistics."""
+    t = np.asarray(ttags, dtype=np.float64)
+    t = t[np.isfinite(t)]
+    summary = {"ttag_first": None, "ttag_last": None, "trigger_rate_hz": None,
+               "interval_min_s": None, "interval_mean_s": None, "interval_max_s": None}
+    if len(t) == 0:
+        return summary
+    summary["ttag_first"], summary["ttag_last"] = float(t[0]), float(t[-1])
+    if len(t) > 1:
+        dt = np.diff(t)
+        span = float(t[-1] - t[0])
+        summary.update(trigger_rate_hz=(len(t) - 1) / span if span > 0 else None,
+                       interval_min_s=float(dt.min()), interval_mean_s=float(dt.mean()),
+                       interval_max_s=float(dt.max()))
+    return summary
+
+
+def _npz_shape(path: str, name: str = "y"):
+    """Shape of an array inside an .npz without reading its data."""
+    with zipfile.ZipFile(path) as zf:
+        with zf.open(name + ".npy") as fh:
+            version = np.lib.format.read_magic(fh)
+            if version == (1, 0):
+                shape, _, _ = np.lib.format.read_array_header_1_0(fh)
+            else:
+                shape, _, _ = np.lib.format.read_array_header_2_0(fh)
+    return shape
+
+
+def describe_capture(path: str) -> dict:
+    """Catalog record for a .segz or .npz file (reads only headers and time tags)."""
+    record = {"path": os.path.abspath(path), "file_bytes": os.path.getsize(path),
+              "created": os.path.getmtime(path)}
+    if path.endswith(".segz"):
+        from segment_archive import SegmentArchiveReader
+
+        with SegmentArchiveReader(path) as reader:
+            meta = reader.metadata
+            indices = reader.segment_indices
+            ttags = reader.time_tags()
+            points = reader.points
+            record.update(format="segz", xincr=reader.xincr)
+    else:
+        with np.load(path, allow_pickle=False) as data:
+            ttags = data["ttags"]
+            indices = data["indices"]
+            meta = {"idn": str(data["idn"]) if "idn" in data else None}
+            record.update(format="npz", xincr=float(data["xincr"]))
+        shape = _npz_shape(path)
+        points = shape[1] if len(shape) == 2 else 0
+
+    setup = meta.get("setup") or {}
+    record.update(idn=meta.get("idn"), resource=meta.get("resource"), source=meta.get("source"),
+                  segments=len(indices), points=int(points),
+                  first_segment=int(indices[0]) if len(indices) else None,
+                  last_segment=int(indices[-1]) if len(indices) else None)
+    for name in SETUP_COLUMNS:
+        value = setup.get(name)
+        record[name] = str(value) if name == "sample_rate" and value is not None else value
+    record.update(ttag_summary(ttags))
+    return record
+
+
+class CaptureCatalog:
+    """SQLite-backed capture index. Safe to share between processes (WAL journal)."""
+
+    def __init__(self, path: str = DEFAULT_CATALOG_PATH):
+        self.path = path
+        self.conn = sqlite3.connect(path, timeout=30.0)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(_SCHEMA)
+        self._columns = [row["name"] for row in self.conn.execute("PRAGMA table_info(captures)")]
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def add(self, record: dict, extra: dict = None) -> int:
+        """Insert or replace the row for record['path']; returns its id."""
+        row = {k: v for k, v in record.items() if k in self._columns and k != "id"}
+        row["recorded"] = time.time()
+        if extra is not None:
+            row["extra"] = json.dumps(extra)
+        names = list(row)
+        with self.conn:
+            cur = self.conn.execute(
+                f"INSERT OR REPLACE INTO captures ({', '.join(names)}) "
+                f"VALUES ({', '.join('?' for _ in names)})", [row[n] for n in names])
+        return cur.lastrowid
+
+    def add_file(self, path: str, **overrides) -> int:
+        """Describe a capture file and add it; overrides replace described fields."""
+        record = describe_capture(path)
+        extra = overrides.pop("extra", None)
+        record.update(overrides)
+        return self.add(record, extra)
+
+    def scan(self, directory: str, progress=None) -> int:
+        """Add every .segz / .npz file under directory; returns the number added."""
+        added = 0
+        for root, _, files in os.walk(directory):
+            for name in sorted(files):
+                if name.endswith((".segz", ".npz")):
+                    path = os.path.join(root, name)
+                    try:
+                        self.add_file(path)
+                        added += 1
+                    except (OSError, ValueError, KeyError) as e:
+                        if progress is not None:
+                            progress(path, e)
+                        continue
+                    if progress is not None:
+                        progress(path, None)
+        return added
+
+    def remove(self, path: str):
+        with self.conn:
+            self.conn.execute("DELETE FROM captures WHERE path = ?", (os.path.abspath(path),))
+
+    def prune(self) -> int:
+        """Drop rows whose file no longer exists; returns the number removed."""
+        missing = [row["path"] for row in self.conn.execute("SELECT path FROM captures")
+                   if not os.path.exists(row["path"])]
+        with self.conn:
+            self.conn.executemany("DELETE FROM captures WHERE path = ?", [(p,) for p in missing])
+        return len(missing)
+
+    def get(self, path: str):
+        row = self.conn.execute("SELECT * FROM captures WHERE path = ?",
+                                (os.path.abspath(path),)).fetchone()
+        return _as_dict(row) if row is not None else None
+
+    def find(self, trigger_level: float = None, min_rate: float = None, max_rate: float = None,
+             idn: str = None, since: float = None, until: float = None, min_segments: int = None,
+             order_by: str = "created", limit: int = None, **settings) -> list:
+        """
+        Captures matching every given condition, newest first by default.
+
+        trigger_level and other float settings (e.g. channel_scale=0.2) match
+        within a relative tolerance; idn matches as a substring; since/until
+        bound the file time (Unix seconds); min_rate/max_rate bound the mean
+        trigger rate in Hz.
+        """
+        where, params = [], []
+        settings = dict(settings, trigger_level=trigger_level)
+        for name, value in settings.items():
+            if value is None:
+                continue
+            if name not in SETUP_COLUMNS:
+                raise KeyError(f"Unknown setting {name!r}")
+            if isinstance(value, float):
+                tol = abs(value) * _REL_TOL + 1e-15
+                where.append(f"{name} BETWEEN ? AND ?")
+                params += [value - tol, value + tol]
+            else:
+                where.append(f"{name} = ?")
+                params.append(value)
+        for clause, value in (("trigger_rate_hz >= ?", min_rate), ("trigger_rate_hz <= ?", max_rate),
+                              ("created >= ?", since), ("created <= ?", until),
+                              ("segments >= ?", min_segments)):
+            if value is not None:
+                where.append(clause)
+                params.append(value)
+        if idn is not None:
+            where.append("idn LIKE ?")
+            params.append(f"%{idn}%")
+        if order_by.lstrip("-") not in self._columns:
+            raise KeyError(f"Unknown column {order_by!r}")
+        direction = "ASC" if order_by.startswith("-") else "DESC"
+        sql = "SELECT * FROM captures"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += f" ORDER BY {order_by.lstrip('-')} {direction}"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(int(limit))
+        return [_as_dict(row) for row in self.conn.execute(sql, params)]
+
+    def __len__(self):
+        return self.conn.execute("SELECT COUNT(*) FROM captures").fetchone()[0]
+
+
+def _as_dict(row) -> dict:
+    record = dict(row)
+    record["extra"] = json.loads(record["extra"]) if record.get("extra") else None
+    return record
+
+
+def format_record(record: dict) -> str:
+    rate = record.get("trigger_rate_hz")
+    when = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(record["created"])) if record.get("created") else "?"
+    return (f"{when}  {record['segments']:>6} x {record['points'] or 0:<6} "
+            f"trig {record['trigger_level'] if record['trigger_level'] is not None else '?':<6} "
+            f"rate {f'{rate / 1e3:.1f} kHz' if rate else '?':<12} {record['path']}")
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Search and maintain the capture catalog")
+    p.add_argument("--catalog", default=DEFAULT_CATALOG_PATH, help="SQLite catalog file")
+    sub = p.add_subparsers(dest="command", required=True)
+
+    s = sub.add_parser("scan", help="Index every .segz/.npz file under a directory")
+    s.add_argument("directory")
+    a = sub.add_parser("add", help="Index capture files")
+    a.add_argument("paths", nargs="+")
+    sub.add_parser("prune", help="Drop entries whose file was deleted")
+
+    f = sub.add_parser("find", help="List matching captures")
+    f.add_argument("--trigger-level", type=float)
+    f.add_argument("--channel-scale", type=float)
+    f.add_argument("--timebase-scale", type=float)
+    f.add_argument("--acquire-points", type=int)
+    f.add_argument("--segment-count", type=int)
+    f.add_argument("--min-rate", type=float, help="Minimum mean trigger rate (Hz)")
+    f.add_argument("--max-rate", type=float, help="Maximum mean trigger rate (Hz)")
+    f.add_argument("--idn", help="Substring of the instrument *IDN?")
+    f.add_argument("--days", type=float, help="Only captures from the last N days")
+    f.add_argument("--limit", type=int, default=50)
+    f.add_argument("--json", action="store_true", help="Print records as JSON lines")
+
+    args = p.parse_args(argv)
+
+    def report_skipped(path, error):
+        if error is not None:
+            print(f"Skipped {path}: {error}", file=sys.stderr)
+
+    with CaptureCatalog(args.catalog) as catalog:
+        if args.command == "scan":
+            n = catalog.scan(args.directory, progress=report_skipped)
+            print(f"Indexed {n} captures ({len(catalog)} in catalog)")
+        elif args.command == "add":
+            for path in args.paths:
+                catalog.add_file(path)
+            print(f"Indexed {len(args.paths)} captures ({len(catalog)} in catalog)")
+        elif args.command == "prune":
+            print(f"Removed {catalog.prune()} missing captures")
+        else:
+            t0 = time.perf_counter()
+            records = catalog.find(
+                trigger_level=args.trigger_level, channel_scale=args.channel_scale,
+                timebase_scale=args.timebase_scale, acquire_points=args.acquire_points,
+                segment_count=args.segment_count, min_rate=args.min_rate, max_rate=args.max_rate,
+                idn=args.idn, since=time.time() - args.days * 86400 if args.days else None,
+                limit=args.limit)
+            elapsed = time.perf_counter() - t0
+            for record in records:
+                print(json.dumps(record) if args.json else format_record(record))
+            if not args.json:
+                print(f"{len(records)} captures ({elapsed * 1e3:.1f} ms)", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,128 @@
+"""
+Sub-sample event timestamps for segmented captures.
+
+The segment time tag (:WAVeform:SEGMented:TTAG?) gives the trigger time of
+each segment to the trigger's resolution. For timing studies the edge
+itself is located inside every row of the (n, points) array:
+  - "threshold": first crossing of a fixed level (raw ADC)
+  - "cfd": constant-fraction crossing, the last crossing of fraction x
+    pulse amplitude (above the pre-trigger baseline) before the peak, so
+    the time does not walk with amplitude
+and interpolated between samples, linearly or with a cubic through the
+four samples around the crossing. The event time is time tag + crossing
+time on the segment time axis (SegmentSet.t_s). Rows without a crossing
+give NaN.
+"""
+
+import numpy as np
+
+METHODS = ("threshold", "cfd")
+INTERPOLATIONS = ("linear", "cubic")
+
+
+def _first_true(mask: np.ndarray, last: bool = False) -> np.ndarray:
+    """Column of the first (or last) True per row, -1 where there is none."""
+    if last:
+        k = mask.shape[1] - 1 - np.argmax(mask[:, ::-1], axis=1)
+    else:
+        k = np.argmax(mask, axis=1)
+    return np.where(mask.any(axis=1), k, -1)
+
+
+def _cubic_fraction(x: np.ndarray, k: np.ndarray, level: np.ndarray, frac: np.ndarray,
+                    iterations: int = 4) -> np.ndarray:
+    """
+    Refine linear fractions with Newton steps on the cubic through samples
+    k-1 .. k+2 (rows at the record edges keep the linear estimate).
+    """
+    n = x.shape[1]
+    ok = (k >= 1) & (k + 2 < n)
+    rows = np.flatnonzero(ok)
+    if len(rows) == 0:
+        return frac
+    kk = k[rows]
+    p0, p1, p2, p3 = (x[rows, kk + d].astype(np.float64) for d in (-1, 0, 1, 2))
+    # Lagrange cubic on nodes -1, 0, 1, 2 written as a + b u + c u^2 + d u^3
+    a = p1
+    b = -p0 / 3 - p1 / 2 + p2 - p3 / 6
+    c = p0 / 2 - p1 + p2 / 2
+    d = -p0 / 6 + p1 / 2 - p2 / 2 + p3 / 6
+    u = frac[rows].copy()
+    target = level[rows]
+    for _ in range(iterations):
+        f = a + u * (b + u * (c + u * d)) - target
+        slope = b + u * (2 * c + 3 * u * d)
+        step = np.divide(f, slope, out=np.zeros_like(f), where=slope != 0)
+        u = np.clip(u - step, 0.0, 1.0)
+    out = frac.copy()
+    out[rows] = u
+    return out
+
+
+def crossing_positions(block: np.ndarray, method: str = "cfd", level: float = None,
+                       fraction: float = 0.5, interp: str = "linear", polarity: int = 1,
+                       baseline=None) -> np.ndarray:
+    """
+    Fractional sample position of the edge in every row of a (n, points)
+    block (NaN where none is found).
+
+    method "threshold" uses level (raw ADC, required); "cfd" uses fraction
+    of the amplitude above the baseline, measured over the baseline sample
+    range (default: first 10% of the record). polarity -1 times falling
+    (negative-going) edges.
+    """
+    if method not in METHODS:
+        raise ValueError(f"Unknown method {method!r}, expected one of {METHODS}")
+    if interp not in INTERPOLATIONS:
+        raise ValueError(f"Unknown interpolation {interp!r}, expected one of {INTERPOLATIONS}")
+    x = np.asarray(block, dtype=np.float32)
+    if polarity < 0:
+        x = -x
+    n_rows, n = x.shape
+
+    if method == "threshold":
+        if level is None:
+            raise ValueError("Threshold timing needs a level")
+        lvl = np.full(n_rows, float(level) * (1 if polarity >= 0 else -1))
+        mask = (x[:, :-1] < lvl[:, None]) & (x[:, 1:] >= lvl[:, None])
+        k = _first_true(mask)
+    else:
+        b0, b1 = baseline if baseline is not None else (0, max(n // 10, 1))
+        base = x[:, b0:b1].mean(axis=1, dtype=np.float64)
+        peak = np.argmax(x, axis=1)
+        lvl = base + fraction * (x[np.arange(n_rows), peak].astype(np.float64) - base)
+        mask = (x[:, :-1] < lvl[:, None]) & (x[:, 1:] >= lvl[:, None])
+        # Leading edge: the last crossing before the peak
+        mask &= np.arange(n - 1)[None, :] < peak[:, None]
+        k = _first_true(mask, last=True)
+
+    found = k >= 0
+    kc = np.where(found, k, 0)
+    rows = np.arange(n_rows)
+    lo = x[rows, kc].astype(np.float64)
+    hi = x[rows, np.minimum(kc + 1, n - 1)].astype(np.float64)
+    frac = np.divide(lvl - lo, hi - lo, out=np.zeros(n_rows), where=hi != lo)
+    if interp == "cubic":
+        frac = _cubic_fraction(x, kc, lvl, frac)
+    return np.where(found, kc + frac, np.nan)
+
+
+def crossing_times(y: np.ndarray, xincr: float, t0: float = 0.0, chunk_rows: int = 2048,
+                   **kwargs) -> np.ndarray:
+    """Edge time of every row on the segment time axis (t0 + position * xincr), in chunks."""
+    out = np.empty(y.shape[0], dtype=np.float64)
+    for start in range(0, y.shape[0], chunk_rows):
+        block = y[start:start + chunk_rows]
+        out[start:start + len(block)] = crossing_positions(block, **kwargs)
+    return t0 + out * xincr
+
+
+def event_times(segment_set, **kwargs) -> np.ndarray:
+    """
+    Absolute event time per segment: time tag + sub-sample crossing time.
+
+    Time tags are float64 seconds, so event times keep ~0.1 ps resolution
+    for captures up to ~1000 s; for finer work use crossing_times() and the
+    tags separately.
+    """
+    return segment_set.ttags + crossing_times(segment_set.y, segment_set.xincr, segment_set.t0, **kwargs)
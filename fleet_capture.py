@@ -0,0 +1,166 @@
+"""
+Run the same segmented-capture recipe on many scopes in parallel.
+
+Each VISA resource gets its own worker process (or thread) that runs the
+segment_capture_cli phases: optional configure, :SINGle, download to a
+per-instrument .segz capture store. Results are aggregated into a combined
+throughput report; a failing instrument is reported without stopping the
+others.
+
+Capture options not listed below are passed through to segment_capture_cli:
+    python fleet_capture.py TCPIP0::scope1::hislip0::INSTR TCPIP0::scope2::hislip0::INSTR \\
+        --out-dir captures/run1 --configure --single --count 65536
+"""
+
+import argparse
+import os
+import re
+import sys
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+
+from segment_capture_cli import PhaseTimer, build_parser, parse_args, run_capture
+
+
+def store_name(resource: str) -> str:
+    """Filesystem-safe capture store name for a VISA resource."""
+    return re.sub(r"[^A-Za-z0-9_.-]+", "_", resource).strip("_") + ".segz"
+
+
+def parse_capture_args(capture_args) -> argparse.Namespace:
+    """
+    Parse the pass-through segment_capture_cli options once, before any
+    worker starts; argparse reports a bad option and exits here.
+    """
+    parser = build_parser()
+    parser.prog = "fleet_capture.py (segment_capture_cli options)"
+    # Placeholders; every worker fills in its resource and .segz store path
+    return parse_args(["RESOURCE", "-o", "STORE.segz", "--quiet"] + list(capture_args), parser)
+
+
+def capture_one(resource: str, base_args: argparse.Namespace, output_path: str) -> dict:
+    """Worker entry point: run one instrument's capture, never raises."""
+    timer = PhaseTimer()
+    result = {"resource": resource, "output": output_path, "ok": False}
+    try:
+        args = argparse.Namespace(**vars(base_args))
+        args.resource = resource
+        args.output = output_path
+        result.update(run_capture(args, timer))
+        result["ok"] = True
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+        result["traceback"] = traceback.format_exc()
+    result["phases"] = timer.phases
+    return result
+
+
+def run_fleet(resources, capture_args, out_dir: str, workers: int = None, mode: str = "process",
+              on_result=None) -> dict:
+    """
+    Capture from every resource concurrently. Returns a dict with per-instrument
+    'results' (in input order), 'failures', and combined wall time/throughput.
+    capture_args is a list of segment_capture_cli options or an already
+    parsed Namespace (see parse_capture_args).
+    """
+    names = [store_name(res) for res in resources]
+    duplicates = sorted({res for res, name in zip(resources, names) if names.count(name) > 1})
+    if duplicates:
+        # Their workers would write the same capture store
+        raise ValueError(f"Resources listed more than once or sharing a store name: "
+                         f"{', '.join(duplicates)}")
+    if not isinstance(capture_args, argparse.Namespace):
+        capture_args = parse_capture_args(capture_args)
+    os.makedirs(out_dir, exist_ok=True)
+    workers = workers or len(resources)
+    executor_cls = ProcessPoolExecutor if mode == "process" else ThreadPoolExecutor
+
+    t0 = time.perf_counter()
+    by_position = {}
+    with executor_cls(max_workers=workers) as pool:
+        futures = {
+            pool.submit(capture_one, res, capture_args, os.path.join(out_dir, names[pos])): pos
+            for pos, res in enumerate(resources)
+        }
+        for future in as_completed(futures):
+            pos = futures[future]
+            res = resources[pos]
+            try:
+                result = future.result()
+            except Exception as e:  # worker process died
+                result = {"resource": res, "ok": False, "error": f"{type(e).__name__}: {e}",
+                          "phases": {}}
+            by_position[pos] = result
+            if on_result is not None:
+                on_result(result)
+    wall_s = time.perf_counter() - t0
+
+    results = [by_position[pos] for pos in range(len(resources))]
+    ok = [r for r in results if r["ok"]]
+    total_bytes = sum(r["bytes"] for r in ok)
+    total_segments = sum(r["segments"] for r in ok)
+    return {
+        "results": results,
+        "failures": [r for r in results if not r["ok"]],
+        "wall_s": wall_s,
+        "segments": total_segments,
+        "bytes": total_bytes,
+        "segments_per_s": total_segments / wall_s if wall_s else 0.0,
+        "mb_per_s": total_bytes / 1e6 / wall_s if wall_s else 0.0,
+    }
+
+
+def print_report(report: dict, out=sys.stdout):
+    print(f"{'Instrument':<45} {'Segments':>9} {'MB':>9} {'seg/s':>9} {'MB/s':>8}  Status", file=out)
+    for r in report["results"]:
+        if r["ok"]:
+            print(f"{r['resource']:<45} {r['segments']:>9} {r['bytes']/1e6:>9.2f} "
+                  f"{r['segments_per_s']:>9.1f} {r['mb_per_s']:>8.2f}  ok", file=out)
+        else:
+            print(f"{r['resource']:<45} {'-':>9} {'-':>9} {'-':>9} {'-':>8}  FAILED: {r['error']}",
+                  file=out)
+    print(f"Combined: {report['segments']} segments, {report['bytes']/1e6:.2f} MB in "
+          f"{report['wall_s']:.3f} s -> {report['segments_per_s']:.1f} segments/s, "
+          f"{report['mb_per_s']:.2f} MB/s", file=out)
+    if report["failures"]:
+        print(f"{len(report['failures'])} of {len(report['results'])} instruments failed", file=out)
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(
+        description="Parallel segmented capture across many scopes. "
+                    "Unrecognised options are passed to segment_capture_cli.")
+    p.add_argument("resources", nargs="*", help="VISA resources")
+    p.add_argument("--resources-file", help="File with one VISA resource per line")
+    p.add_argument("--out-dir", required=True, help="Directory for per-instrument capture stores")
+    p.add_argument("--workers", type=int, default=None, help="Parallel workers (default: one per scope)")
+    p.add_argument("--mode", choices=("process", "thread"), default="process")
+    args, capture_args = p.parse_known_args(argv)
+
+    resources = list(args.resources)
+    if args.resources_file:
+        with open(args.resources_file) as fh:
+            resources += [line.strip() for line in fh
+                          if line.strip() and not line.lstrip().startswith("#")]
+    if not resources:
+        p.error("no VISA resources given")
+    duplicates = sorted({res for res in resources if resources.count(res) > 1})
+    if duplicates:
+        # Both workers would write the same capture store
+        p.error(f"resources listed more than once: {', '.join(duplicates)}")
+    base_args = parse_capture_args(capture_args)
+
+    def progress(result):
+        status = "ok" if result["ok"] else f"FAILED ({result['error']})"
+        print(f"  {result['resource']}: {status}", flush=True)
+
+    print(f"Capturing from {len(resources)} instruments ({args.mode} workers)...")
+    report = run_fleet(resources, base_args, args.out_dir, workers=args.workers,
+                       mode=args.mode, on_result=progress)
+    print_report(report)
+    return 1 if report["failures"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,143 @@
+"""
+Memory budget planning before a segment download.
+
+65536 segments x long records can exceed the RAM of a lab PC, and the
+download only fails (or swaps) once it is well under way. plan_download
+estimates the footprint of the requested segments in the chosen
+container, compares it with available memory and a budget, and picks:
+  - "memory": hold everything in RAM
+  - "memmap": a disk-backed array (numpy memmap) in spill_dir; the OS
+    pages it in and out so only the working set stays resident
+  - "stream": chunked download straight into a .segz capture store;
+    memory stays at one batch whatever the segment count
+"""
+
+import ctypes
+import os
+import shutil
+import sys
+
+# Bytes per segment on top of the samples, per container
+#   array:        SegmentSet / (n, points) int16 plus time tag and index
+#   session_list: segment dicts sharing one time axis (ScopeSegmentSession)
+#   segment_list: segment dicts from extract_segments_mode_a and
+#                 extract_segment_indices, which also share one time axis
+#   segment_list_and_set: segment_list plus the SegmentSet copy the viewer builds
+_DICT_OVERHEAD = 600
+CONTAINERS = ("array", "session_list", "segment_list", "segment_list_and_set")
+STRATEGIES = ("memory", "memmap", "stream")
+
+
+def available_memory_bytes():
+    """Physical memory available to new allocations, or None if unknown."""
+    if sys.platform.startswith("linux"):
+        try:
+            with open("/proc/meminfo") as fh:
+                for line in fh:
+                    if line.startswith("MemAvailable:"):
+                        return int(line.split()[1]) * 1024
+        except OSError:
+            pass
+    if sys.platform == "win32":
+        class MEMORYSTATUSEX(ctypes.Structure):
+            _fields_ = [("dwLength", ctypes.c_ulong), ("dwMemoryLoad", ctypes.c_ulong),
+                        ("ullTotalPhys", ctypes.c_ulonglong), ("ullAvailPhys", ctypes.c_ulonglong),
+                        ("ullTotalPageFile", ctypes.c_ulonglong), ("ullAvailPageFile", ctypes.c_ulonglong),
+                        ("ullTotalVirtual", ctypes.c_ulonglong), ("ullAvailVirtual", ctypes.c_ulonglong),
+                        ("ullAvailExtendedVirtual", ctypes.c_ulonglong)]
+
+        status = MEMORYSTATUSEX()
+        status.dwLength = ctypes.sizeof(MEMORYSTATUSEX)
+        if ctypes.windll.kernel32.GlobalMemoryStatusEx(ctypes.byref(status)):
+            return int(status.ullAvailPhys)
+        return None
+    try:
+        return os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE")
+    except (ValueError, OSError, AttributeError):
+        return None
+
+
+def estimate_footprint(n_segments: int, points: int, container: str = "array",
+                       bytes_per_sample: int = 2) -> int:
+    """Resident bytes to hold n_segments records of `points` samples in `container`."""
+    samples = n_segments * points * bytes_per_sample
+    if container == "array":
+        return samples + n_segments * 16
+    if container in ("session_list", "segment_list"):
+        return samples + n_segments * _DICT_OVERHEAD + points * 8
+    if container == "segment_list_and_set":
+        return (estimate_footprint(n_segments, points, "segment_list", bytes_per_sample)
+                + estimate_footprint(n_segments, points, "array", bytes_per_sample))
+    raise ValueError(f"Unknown container {container!r}; expected one of {CONTAINERS}")
+
+
+def plan_download(n_segments: int, points: int, container: str = "array", budget_bytes: int = None,
+                  budget_fraction: float = 0.5, spill_dir: str = None, batch: int = 256,
+                  available: int = None, bytes_per_sample: int = 2) -> dict:
+    """
+    Choose a download strategy. The budget is budget_bytes if given, else
+    budget_fraction of available memory (capped by budget_bytes when both
+    apply). memmap needs spill_dir with room for the samples; otherwise
+    the plan falls back to streaming.
+    """
+    footprint = estimate_footprint(n_segments, points, container, bytes_per_sample)
+    if available is None:
+        available = available_memory_bytes()
+    budget = None
+    if available is not None:
+        budget = int(available * budget_fraction)
+    if budget_bytes is not None:
+        budget = budget_bytes if budget is None else min(budget, budget_bytes)
+
+    plan = {
+        "segments": n_segments,
+        "points": points,
+        "container": container,
+        "footprint_bytes": footprint,
+        "available_bytes": available,
+        "budget_bytes": budget,
+        "batch_bytes": estimate_footprint(min(batch, n_segments), points, "session_list", bytes_per_sample),
+    }
+    if budget is None or footprint <= budget:
+        plan["strategy"] = "memory"
+        plan["reason"] = ("fits in budget" if budget is not None
+                          else "available memory unknown and no budget set")
+        return plan
+
+    disk_free = None
+    if spill_dir is not None:
+        disk_free = shutil.disk_usage(spill_dir or ".").free
+        plan["disk_free_bytes"] = disk_free
+    samples = n_segments * points * bytes_per_sample
+    if disk_free is not None and samples < 0.9 * disk_free:
+        plan["strategy"] = "memmap"
+        plan["reason"] = f"{footprint / 1e6:.1f} MB exceeds {budget / 1e6:.1f} MB budget; spilling to disk"
+    else:
+        plan["strategy"] = "stream"
+        plan["reason"] = (f"{footprint / 1e6:.1f} MB exceeds {budget / 1e6:.1f} MB budget"
+                          + ("" if spill_dir is None else " and free disk space"))
+    return plan
+
+
+def query_download_plan(resource: str, start_segment: int = 1, num_segments: int = None,
+                        source: str = "CHANnel1", sample_window=None, time_window=None, **kwargs) -> dict:
+    """Query the captured segment count and record length, then plan_download()."""
+    from scope_io import ScopeSegmentSession
+
+    session = ScopeSegmentSession(resource, source=source, sample_window=sample_window,
+                                  time_window=time_window)
+    try:
+        total, points = session.total_segments, session.points
+    finally:
+        session.close()
+    end = total if num_segments is None else min(start_segment + num_segments - 1, total)
+    plan = plan_download(max(0, end - start_segment + 1), points, **kwargs)
+    plan["total_segments"] = total
+    return plan
+
+
+def format_plan(plan: dict) -> str:
+    avail = plan["available_bytes"]
+    return (f"Plan: {plan['strategy']} - {plan['segments']} x {plan['points']} points, "
+            f"~{plan['footprint_bytes'] / 1e6:.1f} MB in {plan['container']}, "
+            f"available {'unknown' if avail is None else f'{avail / 1e6:.0f} MB'} ({plan['reason']})")
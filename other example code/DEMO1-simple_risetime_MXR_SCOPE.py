@@ -5,9 +5,15 @@
 #MXR Scope , source should be 5GB/sec(bert or pattern gen)
 # This script demonstrates how to set up a Keysight MXR608B Infiniium oscilloscope using PyVISA
 
+import os
+import sys
 import pyvisa as visa
 import time
 
+# streaming_stats.py lives in the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from streaming_stats import MeasurementStats, parse_measure_results
+
 def main():
     rm = visa.ResourceManager()
     scope = rm.open_resource('TCPIP0::192.168.50.126::hislip0::INSTR')
@@ -33,6 +39,8 @@ def main():
         scope.write(':ACQuire:POINts:ANALog 5000')
         scope.write(':TIMebase:SCALe 1e-08')
         scope.write(':MEASure:RISetime CHANnel1')
+        # Full statistics, the layout parse_measure_results expects
+        scope.write(':MEASure:STATistics ON')
         scope.write(':MARKer:MODE MEASurement')
         print("Oscilloscope setup complete.\n")
     except Exception as e:
@@ -41,19 +49,18 @@ def main():
         rm.close()
         return
 
+    # Constant-memory statistics over every acquisition of this session
+    stats = MeasurementStats()
     try:
         while True:
             input("Press Enter to acquire SINGLE and print results (Ctrl+C to exit)...")
             scope.write(':SINGle')
             time.sleep(1)  # Wait for acquisition to complete
-            results = scope.query(':MEASure:RESults?').strip()
-            results_list = [x.strip() for x in results.split(',')]
+            results = parse_measure_results(scope.query(':MEASure:RESults?'), default_name="Risetime")
+            stats.update_results(results)
             display = (
-                f"Current: {results_list}\n"
-                # f"Current: {results_list[0]}\n"
-                # f"Min: {results_list[1]}\n"
-                # f"Max: {results_list[2]}\n"
-                # f"Points: {results_list[3]}\n"
+                "\n".join(f"Current {r['name']}: {r['values']}" for r in results) + "\n"
+                + stats.format(scale=1e12, unit=" ps") + "\n"
                 + "-"*60
             )
             print(display)
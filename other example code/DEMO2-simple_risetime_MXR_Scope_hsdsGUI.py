@@ -5,19 +5,26 @@
 #MXR Scope , source should be 5GB/sec(bert or pattern gen)
 # This script demonstrates how to set up a Keysight MXR608B Infiniium oscilloscope using PyVISA
 
+import os
+import sys
 import pyvisa as visa
 import time
 import tkinter as tk
 from tkinter import ttk
 
+# streaming_stats.py lives in the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from streaming_stats import MeasurementStats, parse_measure_results
+
 class MXRGuiApp(tk.Tk):
     def __init__(self):
         super().__init__()
         self.title("Keysight MXR Risetime Measurement")
         self.geometry("500x300")
+        self.stats = MeasurementStats()
 
         # GUI widgets
-        self.results_label = ttk.Label(self, text="Results (Risetime, Stdev, Count, Points):")
+        self.results_label = ttk.Label(self, text="Results (Risetime, Stdev, Count):")
         self.results_label.pack()
 
         self.results_text = tk.Text(self, height=10, width=60, wrap="none", font=("Consolas", 10))
@@ -68,6 +75,8 @@ class MXRGuiApp(tk.Tk):
             self.scope.write(':TIMebase:SCALe 500e-12')
             self.log_stage("Setting up measurement...")
             self.scope.write(':MEASure:RISetime CHANnel1')
+            # Full statistics, the layout parse_measure_results expects
+            self.scope.write(':MEASure:STATistics ON')
             self.scope.write(':MARKer:MODE MEASurement')
             self.log_stage("Running initial SINGLE acquisition...")
             self.scope.write(':SINGle')
@@ -79,12 +88,28 @@ class MXRGuiApp(tk.Tk):
     def acquire_and_update(self):
         self.scope.write(':SINGle')
         time.sleep(1)  # Wait for acquisition to complete
-        results = self.scope.query(':MEASure:RESults?').strip()
-        results_list = [x.strip() for x in results.split(',')]
-        display = f"Risetime: {results_list[0]}\nStdev: {results_list[1]}\nCount: {results_list[2]}\nPoints: {results_list[3]}\n"
+        results = parse_measure_results(self.scope.query(':MEASure:RESults?'), default_name="Risetime")
+        self.stats.update_results(results)
+        # Replace the text with a fixed-size summary instead of appending forever
+        lines = []
+        for r in results:
+            current = r.get('current')
+            if current is None or current != current:
+                # No valid value for this measurement yet (missing, or 9.9E+37 parsed as NaN)
+                lines.append(f"{r['name']}: --- (no valid result yet)")
+                continue
+            lines.append(f"{r['name']}: {current * 1e12:.3f} ps "
+                         f"(scope stdev {r.get('std_dev', float('nan')) * 1e12:.3f} ps, "
+                         f"count {r.get('count', 0):.0f})")
+        for name, summary in self.stats.summaries.items():
+            d = summary.summary()
+            lines.append(f"{name} over {d['count']} acquisitions:")
+            lines.append(f"  mean {d['mean'] * 1e12:.3f} ps  std {d['std'] * 1e12:.3f} ps")
+            lines.append(f"  min {d['min'] * 1e12:.3f}  median {d['median'] * 1e12:.3f}  "
+                         f"max {d['max'] * 1e12:.3f} ps")
         self.results_text.config(state=tk.NORMAL)
-        self.results_text.insert(tk.END, display)
-        self.results_text.see(tk.END)
+        self.results_text.delete("1.0", tk.END)
+        self.results_text.insert(tk.END, "\n".join(lines))
         self.results_text.config(state=tk.DISABLED)
 
     def on_close(self):
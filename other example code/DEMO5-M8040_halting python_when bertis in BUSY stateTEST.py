@@ -2,28 +2,16 @@
 # if you are working with python version lower than 3.6, use 'import visa' instead of import pyvisa as visa
 
 import pyvisa as visa
-import time
+
+# m8070b_readiness.py lives next to this script (the script's directory is on sys.path)
+from m8070b_readiness import M8070BReadiness
 # start of Untitled
 
 #this is the Most reliable way to ensure the M8070B is not in BUSY state 
-# before proceeding with any command that causes an intrument busy condition
-#
-def wait_for_dataout1_ready(instr, timeout=30):
-    #return # exit early to demo no wait for M8070B to be ready
-    #"""Polls :STATus:INSTrument:RUN? 'M1.DataOut1' until it returns 1 or timeout (seconds) is reached."""
-    import time
-    start_time = time.time()
-    while True:
-        status = int(instr.query(':STATus:INSTrument:RUN? "M1.DataOut1"').strip())
-        print(f"Polling DataOut1 ready status: {status}")
-        if status == 1:
-            print("Instrument is ready.")
-            break
-        if (time.time() - start_time) > timeout:
-            print("Timeout waiting for M1.DataOut1 to be ready.")
-            break
-        time.sleep(0.5)
-    #print("skipping wait process")
+# before proceeding with any command that causes an intrument busy condition.
+# M8070BReadiness waits on DataOut1 and DataOut2 together, using the blocking
+# :STATus:INSTrument:RUN:WAIT? form when available and fast backoff polling
+# of :STATus:INSTrument:RUN? otherwise, and raises InstrumentNotReady on timeout.
 rm = visa.ResourceManager()
 print("Resource manager created.")
 
@@ -33,6 +21,8 @@ print("Connected to M8070B instrument.")
 M8070B.timeout = 40000
 print("Timeout set to 40000 ms.")
 
+bert = M8070BReadiness(M8070B, channels=("M1.DataOut1", "M1.DataOut2"), timeout=30, verbose=True)
+
 idn = M8070B.query('*IDN?')
 print(f"Instrument ID: {idn}")
 
@@ -40,8 +30,7 @@ print(f"Instrument ID: {idn}")
 # ;:STATus:INSTrument:RUN:WAIT? 'M1.DataOut1';:STATus:INSTrument:RUN:WAIT? 'M1.DataOut2'
 #  ensures the BERT is finished its process. It is similar to an *opc? command in behaviour but is specific to this instrument series.
 print("Instrument reset with *RST and wait for DataOut1 and DataOut2 to finish.")
-M8070B.write("*RST;")
-wait_for_dataout1_ready(M8070B)
+bert.run_and_wait("*RST;")
 print("Instrument reset complete.") 
 
 temp_values = M8070B.query_ascii_values(':SOURce:FREQuency? \"%s\"' % ('M1.ClkGen'))
@@ -53,20 +42,16 @@ state = int(temp_values[0])
 print(f"Data output 1 state: {state}")
 
 print("Set the clock generator frequency to 4.5 GHz and waited for DataOut1 and DataOut2 to finish.")
-M8070B.write(":SOURce:FREQuency 'M1.ClkGen',4500000000" )
-wait_for_dataout1_ready(M8070B)
+bert.run_and_wait(":SOURce:FREQuency 'M1.ClkGen',4500000000")
 
 print("Reset and wait until not busy before proceeding.")
-M8070B.write("*RST")
-wait_for_dataout1_ready(M8070B)
+bert.run_and_wait("*RST")
 
 print("Set the clock generator frequency to 3.5 GHz and waited for DataOut1 and DataOut2 to finish.")
-M8070B.write(":SOURce:FREQuency 'M1.ClkGen',3500000000" )
-wait_for_dataout1_ready(M8070B)
+bert.run_and_wait(":SOURce:FREQuency 'M1.ClkGen',3500000000")
 
 print("Set the interference state to random for DataOut1 and waited for it to be ready.")
-M8070B.write(":SOURce:INTerference:RANDom:STATe 'M3.DataOut1',1;")
-wait_for_dataout1_ready(M8070B)
+bert.run_and_wait(":SOURce:INTerference:RANDom:STATe 'M3.DataOut1',1;", channels=("M3.DataOut1",))
 
 M8070B.close()
 print("M8070B connection closed.")
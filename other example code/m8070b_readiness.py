@@ -0,0 +1,191 @@
+# Readiness waiting for the M8070B BERT software (M8040A/M8020A modules).
+#
+# After *RST or any setting that reconfigures a module, the BERT stays BUSY
+# for a while and commands sent in that window can be lost. This module
+# waits on several module channels at once:
+#   - preferred: the blocking :STATus:INSTrument:RUN:WAIT? query for every
+#     channel, sent as one compound command so the instrument answers the
+#     moment the last channel is ready
+#   - fallback: adaptive backoff polling of :STATus:INSTrument:RUN? for all
+#     still-pending channels in one compound query (starts at a few ms,
+#     grows to poll_max), used when RUN:WAIT? is not supported
+# Until RUN:WAIT? has answered once, a blocking wait is limited to
+# probe_timeout seconds so an instrument that ignores it costs little.
+# Only that first probe ends in a device clear (to find out whether the
+# query is supported); a RUN:WAIT? that times out because the BERT is
+# simply still busy (long *RST, pattern load) is left pending and its
+# answer is read when the channels become ready.
+# Both raise InstrumentNotReady on timeout instead of carrying on silently.
+#
+# Example:
+#     bert = M8070BReadiness(M8070B, channels=("M1.DataOut1", "M1.DataOut2"))
+#     bert.run_and_wait("*RST")
+
+import re
+import time
+
+DEFAULT_CHANNELS = ("M1.DataOut1", "M1.DataOut2")
+
+RUN_QUERY = ':STATus:INSTrument:RUN? "{}"'
+RUN_WAIT_QUERY = ':STATus:INSTrument:RUN:WAIT? "{}"'
+
+
+class InstrumentNotReady(TimeoutError):
+    """Raised when channels are still busy after the timeout."""
+
+    def __init__(self, pending, timeout):
+        self.pending = tuple(pending)
+        super().__init__(f"Not ready after {timeout:.1f} s: {', '.join(self.pending)}")
+
+
+def _parse_states(response: str, count: int):
+    values = [v for v in re.split(r"[;,\s]+", response.strip()) if v]
+    if len(values) != count:
+        raise ValueError(f"Expected {count} run states, got {response!r}")
+    return [int(float(v)) == 1 for v in values]
+
+
+def _is_visa_timeout(exc) -> bool:
+    """True for a VISA I/O timeout (VI_ERROR_TMO) or a plain TimeoutError."""
+    if isinstance(exc, TimeoutError):
+        return True
+    try:
+        from pyvisa.constants import StatusCode
+        from pyvisa.errors import VisaIOError
+    except ImportError:
+        return False
+    return isinstance(exc, VisaIOError) and exc.error_code == StatusCode.error_timeout
+
+
+class M8070BReadiness:
+    """
+    Waits until module channels report RUN state 1 (ready).
+    Remembers whether the instrument accepted RUN:WAIT? so later waits go
+    straight to polling if it did not.
+    """
+
+    def __init__(self, instr, channels=DEFAULT_CHANNELS, timeout=30.0, prefer_wait=True,
+                 poll_initial=0.005, poll_max=0.25, backoff=1.5, probe_timeout=2.0, verbose=False):
+        self.instr = instr
+        self.channels = tuple(channels)
+        self.timeout = timeout
+        self.wait_supported = None if prefer_wait else False
+        self.poll_initial = poll_initial
+        self.poll_max = poll_max
+        self.backoff = backoff
+        self.probe_timeout = probe_timeout
+        self.verbose = verbose
+        self._probed = False
+        self._late_reply = False  # a timed-out RUN:WAIT? still owes its answer
+
+    def _log(self, msg):
+        if self.verbose:
+            print(msg)
+
+    def query_states(self, channels):
+        """Ready flag per channel, all read with one compound query."""
+        cmd = ";".join(RUN_QUERY.format(ch) for ch in channels)
+        return dict(zip(channels, _parse_states(self.instr.query(cmd), len(channels))))
+
+    def _blocking_wait(self, channels, deadline):
+        """RUN:WAIT? for every channel in one command; True if it answered."""
+        cmd = ";".join(RUN_WAIT_QUERY.format(ch) for ch in channels)
+        limit = deadline - time.monotonic()
+        if self.wait_supported is None:
+            limit = min(limit, self.probe_timeout)
+        old_timeout = self.instr.timeout
+        self.instr.timeout = max(1, int(limit * 1000))
+        try:
+            self.instr.query(cmd)
+            return True
+        except Exception as e:
+            if not _is_visa_timeout(e):
+                raise
+            first_probe = self.wait_supported is None and not self._probed
+            self._probed = True
+            if not first_probe:
+                # Still busy: the answer arrives once the channels are ready, keep it
+                self._late_reply = True
+                return False
+            # First probe timed out: either still busy, or the query is unknown and never
+            # answered. Device clear drops a late answer so it cannot be read by the next query.
+            try:
+                self.instr.clear()
+                self.instr.timeout = 2000
+                error = self.instr.query(":SYSTem:ERRor?").strip()
+            except Exception:
+                error = ""
+            if error and not error.startswith(("0", "+0")):
+                self._log(f"RUN:WAIT? not supported ({error}); polling instead")
+                self.wait_supported = False
+            return False
+        finally:
+            self.instr.timeout = old_timeout
+
+    def _read_late_reply(self, deadline):
+        """Read the answer of a timed-out RUN:WAIT?; True once it has arrived."""
+        old_timeout = self.instr.timeout
+        self.instr.timeout = max(1, int((deadline - time.monotonic()) * 1000))
+        try:
+            self.instr.read()
+            self._late_reply = False
+            return True
+        except Exception as e:
+            if not _is_visa_timeout(e):
+                raise
+            return False
+        finally:
+            self.instr.timeout = old_timeout
+
+    def _poll(self, pending, deadline):
+        delay = self.poll_initial
+        while pending:
+            states = self.query_states(pending)
+            pending = [ch for ch in pending if not states[ch]]
+            self._log(f"Polling run state: {len(states) - len(pending)}/{len(states)} ready")
+            if not pending:
+                break
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            time.sleep(min(delay, remaining))
+            delay = min(self.poll_max, delay * self.backoff)
+        return pending
+
+    def wait(self, channels=None, timeout=None):
+        """
+        Block until every channel is ready. Returns the seconds waited;
+        raises InstrumentNotReady on timeout.
+        """
+        channels = tuple(channels or self.channels)
+        timeout = self.timeout if timeout is None else timeout
+        start = time.monotonic()
+        deadline = start + timeout
+
+        # An answer still owed from an earlier wait must be read before any new query
+        if self._late_reply and not self._read_late_reply(deadline):
+            raise InstrumentNotReady(channels, timeout)
+        if self.wait_supported is not False and self._blocking_wait(channels, deadline):
+            self.wait_supported = True
+        elif self._late_reply:
+            # RUN:WAIT? timed out while still busy: its answer is the ready signal
+            if not self._read_late_reply(deadline):
+                raise InstrumentNotReady(channels, timeout)
+            self.wait_supported = True
+        # Confirm with RUN?; also the rest of the wait if RUN:WAIT? timed out or is unavailable
+        pending = self._poll(list(channels), deadline)
+        if pending:
+            raise InstrumentNotReady(pending, timeout)
+        elapsed = time.monotonic() - start
+        self._log(f"Ready after {elapsed:.3f} s: {', '.join(channels)}")
+        return elapsed
+
+    def run_and_wait(self, command, channels=None, timeout=None):
+        """Send a command that makes the BERT busy and wait until it is ready again."""
+        self.instr.write(command)
+        return self.wait(channels, timeout)
+
+
+def wait_until_ready(instr, channels=DEFAULT_CHANNELS, timeout=30.0, **kwargs):
+    """One-shot form of M8070BReadiness(...).wait()."""
+    return M8070BReadiness(instr, channels, timeout, **kwargs).wait()
@@ -0,0 +1,204 @@
+"""
+Pulse-height (MCA-style) analysis of segmented pulse captures.
+
+Each segment holds one triggered pulse. For a chunk of segments at a time:
+  - baseline: mean (and rms) of the pre-trigger samples, subtracted per row
+  - height: peak of the baseline-subtracted pulse inside the gate, refined
+    by a parabola through the peak sample and its neighbours
+  - charge: integral of the baseline-subtracted gate (ADC counts x seconds)
+  - pile-up: a second rising threshold crossing inside the gate, or a
+    pulse in the pre-trigger samples (baseline rms far above the usual)
+
+PulseHeightSpectrum folds every chunk into fixed-bin height and charge
+histograms (pile-up rejected), so it can run over all segments of an
+acquisition as they are downloaded or streamed, with memory bounded by one
+chunk plus the per-segment results.
+"""
+
+import numpy as np
+
+from streaming_stats import FixedHistogram, RunningStats
+
+
+def _gate_slices(points: int, baseline=None, gate=None):
+    """Resolve (start, stop) sample ranges; default baseline is the first 10% of the record."""
+    if baseline is None:
+        baseline = (0, max(points // 10, 1))
+    if gate is None:
+        gate = (baseline[1], points)
+    b0, b1 = max(0, baseline[0]), min(points, baseline[1])
+    g0, g1 = max(0, gate[0]), min(points, gate[1])
+    if b1 <= b0 or g1 - g0 < 3:
+        raise ValueError(f"Empty baseline {baseline} or gate {gate} for {points}-point records")
+    return slice(b0, b1), slice(g0, g1)
+
+
+def _count_pulses(x: np.ndarray, level: np.ndarray, hysteresis: float = 0.5) -> np.ndarray:
+    """
+    Pulses per row: rising crossings of level, re-armed only after the
+    signal has fallen below hysteresis x level (so noise on a slow tail
+    does not count as a second pulse).
+    """
+    high = x > level[:, None]
+    changed = high | (x < hysteresis * level[:, None])
+    # Carry the last high/low event forward along each row
+    cols = np.arange(x.shape[1], dtype=np.int32)
+    last = np.maximum.accumulate(np.where(changed, cols, 0), axis=1)
+    state = np.take_along_axis(high, last, axis=1)
+    return state[:, 0] + (state[:, 1:] & ~state[:, :-1]).sum(axis=1)
+
+
+def measure_pulses(block: np.ndarray, xincr: float = 1.0, baseline=None, gate=None,
+                   polarity: int = 1, threshold_sigma: float = 5.0, pileup_fraction: float = 0.2,
+                   hysteresis: float = 0.5, baseline_rms_limit: float = None) -> dict:
+    """
+    Measure one pulse per row of a (n, points) block.
+
+    baseline and gate are (start, stop) sample ranges. polarity -1 measures
+    negative-going pulses. The pile-up threshold is the larger of
+    threshold_sigma x baseline rms and pileup_fraction x height; a pulse
+    must fall below hysteresis x threshold before another one counts.
+    baseline_rms_limit flags rows whose pre-trigger rms exceeds it (default:
+    4x the median rms of the block).
+
+    Returns arrays: baseline, baseline_rms, height, peak_sample, charge, pileup.
+    """
+    x = np.asarray(block, dtype=np.float32)
+    base_sl, gate_sl = _gate_slices(x.shape[1], baseline, gate)
+    pre = x[:, base_sl]
+    base = pre.mean(axis=1)
+    rms = pre.std(axis=1)
+    g = (x[:, gate_sl] - base[:, None]) * (1 if polarity >= 0 else -1)
+
+    rows = np.arange(g.shape[0])
+    k = np.argmax(g, axis=1)
+    peak = g[rows, k]
+    # Parabolic refinement where both neighbours exist
+    inner = (k > 0) & (k < g.shape[1] - 1)
+    left = g[rows, np.maximum(k - 1, 0)]
+    right = g[rows, np.minimum(k + 1, g.shape[1] - 1)]
+    curvature = left - 2 * peak + right
+    ok = inner & (curvature < 0)
+    offset = np.zeros_like(peak)
+    offset[ok] = 0.5 * (left[ok] - right[ok]) / curvature[ok]
+    height = peak - 0.25 * (left - right) * offset
+
+    level = np.maximum(threshold_sigma * rms, pileup_fraction * height)
+    pileup = _count_pulses(g, level, hysteresis) > 1
+    if baseline_rms_limit is None:
+        baseline_rms_limit = 4.0 * float(np.median(rms)) if len(rms) else np.inf
+    pileup |= rms > baseline_rms_limit
+
+    return {
+        "baseline": base.astype(np.float64),
+        "baseline_rms": rms.astype(np.float64),
+        "height": height.astype(np.float64),
+        "peak_sample": gate_sl.start + k + offset.astype(np.float64),
+        "charge": g.sum(axis=1, dtype=np.float64) * xincr,
+        "pileup": pileup,
+    }
+
+
+class PulseHeightSpectrum:
+    """
+    Incremental pulse-height and charge spectra.
+
+    height_range / charge_range are histogram ranges (ADC counts, ADC
+    counts x seconds); the charge histogram is only kept when charge_range
+    is given. keep_results stores the per-segment measurements (about 50
+    bytes per segment) so individual pulses can be looked up afterwards.
+    """
+
+    def __init__(self, xincr: float = 1.0, height_range=(0.0, 65536.0), bins: int = 1024,
+                 charge_range=None, charge_bins: int = 1024, keep_results: bool = True,
+                 **measure_kwargs):
+        self.xincr = float(xincr)
+        self.heights = FixedHistogram(*height_range, bins)
+        self.charges = FixedHistogram(*charge_range, charge_bins) if charge_range else None
+        self.height_stats = RunningStats()
+        self.baseline_stats = RunningStats()
+        self.count = 0
+        self.pileup_count = 0
+        self.keep_results = keep_results
+        self._measure_kwargs = measure_kwargs
+        self._results = []
+
+    def update(self, block: np.ndarray, first_position: int = 0) -> dict:
+        """Measure a block of segments and add the accepted pulses; returns the measurements."""
+        result = measure_pulses(block, self.xincr, **self._measure_kwargs)
+        accepted = ~result["pileup"]
+        self.count += len(accepted)
+        self.pileup_count += int(result["pileup"].sum())
+        self.heights.update_many(result["height"][accepted])
+        if self.charges is not None:
+            self.charges.update_many(result["charge"][accepted])
+        self.height_stats.update_many(result["height"][accepted])
+        self.baseline_stats.update_many(result["baseline"])
+        if self.keep_results:
+            result["position"] = first_position + np.arange(len(accepted))
+            self._results.append(result)
+        return result
+
+    def update_segments(self, segments, first_position: int = 0) -> dict:
+        """Add a list of segment dicts (e.g. one ScopeSegmentSession.fetch batch)."""
+        points = min(len(seg["y_raw"]) for seg in segments)
+        return self.update(np.stack([seg["y_raw"][:points] for seg in segments]), first_position)
+
+    @property
+    def accepted(self) -> int:
+        return self.count - self.pileup_count
+
+    def spectrum(self):
+        """(bin centres, counts) of the pile-up rejected height spectrum."""
+        edges = self.heights.edges
+        return 0.5 * (edges[:-1] + edges[1:]), self.heights.counts
+
+    def results(self) -> dict:
+        """Per-segment measurements concatenated over all updates."""
+        if not self._results:
+            return {}
+        return {key: np.concatenate([r[key] for r in self._results]) for key in self._results[0]}
+
+    def resolution(self):
+        """(peak position, FWHM / position) of the tallest spectrum peak, or None."""
+        centres, counts = self.spectrum()
+        if not counts.any():
+            return None
+        k = int(np.argmax(counts))
+        half = counts[k] / 2.0
+        lo = k
+        while lo > 0 and counts[lo - 1] > half:
+            lo -= 1
+        hi = k
+        while hi < len(counts) - 1 and counts[hi + 1] > half:
+            hi += 1
+        width = centres[1] - centres[0]
+        return float(centres[k]), float((hi - lo + 1) * width / centres[k]) if centres[k] else np.nan
+
+
+def detect_polarity(y: np.ndarray, max_rows: int = 1024) -> int:
+    """+1 or -1 from the mean of up to max_rows evenly spaced segments."""
+    rows = np.unique(np.linspace(0, y.shape[0] - 1, min(max_rows, y.shape[0])).astype(np.int64))
+    mean = np.asarray(y[rows], dtype=np.float64).mean(axis=0)
+    base = np.median(mean)
+    return 1 if mean.max() - base >= base - mean.min() else -1
+
+
+def pulse_height_spectrum(y: np.ndarray, xincr: float = 1.0, chunk_rows: int = 4096,
+                          height_range=None, bins: int = 1024, polarity: int = None,
+                          **kwargs) -> PulseHeightSpectrum:
+    """
+    Run a PulseHeightSpectrum over every segment of a (n, points) array in
+    chunks. Without height_range the histogram spans 0 .. the ADC span of y;
+    without polarity it is detected from the mean pulse.
+    """
+    if polarity is None:
+        polarity = detect_polarity(y)
+    kwargs["polarity"] = polarity
+    if height_range is None:
+        span = float(np.max(y)) - float(np.min(y)) if y.size else 1.0
+        height_range = (0.0, max(span, 1.0))
+    spectrum = PulseHeightSpectrum(xincr, height_range, bins, **kwargs)
+    for start in range(0, y.shape[0], chunk_rows):
+        spectrum.update(y[start:start + chunk_rows], start)
+    return spectrum
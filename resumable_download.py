@@ -0,0 +1,183 @@
+"""
+Resumable segment downloads with checkpoints.
+
+Segments are streamed into a .segz capture store and flushed every batch,
+so each batch is a checkpoint on disk. Transient VISA errors (timeouts,
+dropped connections) close the session, back off exponentially and
+reconnect; the download then resumes after the last checkpointed segment.
+Re-running with the same output path and resume=True after a crash
+resumes the same way.
+Every (re)connect re-reads the time tag of the last checkpointed segment
+and refuses to continue if the scope now holds a different acquisition.
+"""
+
+import math
+import os
+import random
+import time
+from contextlib import nullcontext
+
+from scope_io import ScopeSegmentSession
+from segment_archive import SegmentArchiveWriter
+
+
+class DownloadAborted(RuntimeError):
+    """Raised when retries are exhausted; the checkpoint on disk stays valid."""
+
+
+def is_transient_error(exc: BaseException) -> bool:
+    """VISA I/O errors, timeouts and connection drops are worth retrying."""
+    if isinstance(exc, (TimeoutError, ConnectionError)):
+        return True
+    try:
+        from pyvisa.errors import VisaIOError
+    except ImportError:
+        return False
+    return isinstance(exc, VisaIOError)
+
+
+def backoff_delay(attempt: int, base_s: float, max_s: float) -> float:
+    """Exponential backoff with +/-25 % jitter for attempt 1, 2, 3, ..."""
+    delay = min(max_s, base_s * (2 ** (attempt - 1)))
+    return delay * random.uniform(0.75, 1.25)
+
+
+def _check_same_acquisition(metadata: dict, total: int, window, path: str):
+    """Refuse to resume a store written from a different capture setup."""
+    saved_total = metadata.get("total_segments")
+    if saved_total is not None and saved_total != total:
+        raise ValueError(f"{path} checkpoints an acquisition with {saved_total} segments, "
+                         f"scope now holds {total}; refusing to resume")
+    window = list(window) if window else None
+    if "window" in metadata and metadata["window"] != window:
+        raise ValueError(f"{path} was downloaded with window {metadata['window']}, not {window}")
+
+
+def _check_last_checkpoint(writer, session, path: str):
+    """
+    Refuse to append to a store whose last checkpointed segment has a
+    different time tag on the scope: a new :SINGle with the same segment
+    count would otherwise be mixed into the old capture.
+    """
+    last = writer.last_segment
+    if last is None or writer.last_ttag is None:
+        return
+    ttag = session.time_tag(last)
+    if not math.isclose(ttag, writer.last_ttag, rel_tol=1e-12, abs_tol=1e-15):
+        raise ValueError(f"{path} checkpoints segment {last} with time tag {writer.last_ttag!r} s, "
+                         f"scope now reports {ttag!r} s (a new acquisition); refusing to resume")
+
+
+def download_segments_resumable(resource: str, path: str, source="CHANnel1", start_segment: int = 1,
+                                num_segments: int = None, sample_window=None, time_window=None,
+                                batch: int = 64, max_retries: int = 5, backoff_s: float = 0.5,
+                                max_backoff_s: float = 30.0, codec: str = "zlib",
+                                metadata: dict = None, progress=None, timer=None, tuner=None,
+                                resume: bool = False) -> dict:
+    """
+    Download segments start_segment .. start_segment + num_segments - 1 (all
+    captured segments when num_segments is None) into the archive at `path`.
+    With resume=True an existing archive is continued from its last
+    checkpoint; otherwise an existing path raises FileExistsError.
+
+    progress(done_index, end_index) is called after every checkpoint.
+    timer, if given, is a PhaseTimer that receives 'download' and 'write' time.
+    tuner, if given, is a TransferTuner used for every (re)connected session.
+    Raises DownloadAborted after max_retries consecutive transient failures.
+    """
+    phase = timer.phase if timer is not None else (lambda name: nullcontext())
+    if not resume and os.path.exists(path):
+        raise FileExistsError(f"{path} already exists; pass resume=True to continue it")
+    resumed_from = None
+    session = None
+    verified = False
+    writer = None
+    retries = 0
+    attempts = 0
+    nbytes = 0
+    fetched = 0
+
+    try:
+        while True:
+            try:
+                if session is None:
+                    with phase("download"):
+                        session = ScopeSegmentSession(resource, source=source,
+                                                      sample_window=sample_window,
+                                                      time_window=time_window,
+                                                      tuner=tuner)
+                    verified = False
+                total = session.total_segments
+                end = total if num_segments is None else min(start_segment + num_segments - 1, total)
+
+                if writer is None:
+                    resuming = resume and os.path.exists(path)
+                    meta = dict(metadata or {})
+                    meta.update({"resource": resource, "source": source, "total_segments": total,
+                                 "window": list(session.window) if session.window else None})
+                    writer = SegmentArchiveWriter(path, xincr=session.xincr, t0=session.t0,
+                                                  codec=codec, metadata=meta, append=True)
+                    if resuming:
+                        _check_same_acquisition(writer.metadata, total, session.window, path)
+                        first = writer.first_segment
+                        if first is not None and first > start_segment:
+                            raise ValueError(f"{path} starts at segment {first}, after the requested "
+                                             f"start {start_segment}; segments {start_segment}.."
+                                             f"{first - 1} cannot be prepended; start from segment "
+                                             f"{first} or use a new output path")
+                        resumed_from = writer.last_segment
+                if not verified:
+                    # Also after a reconnect: the scope may have re-triggered meanwhile
+                    _check_last_checkpoint(writer, session, path)
+                    verified = True
+
+                last = writer.last_segment
+                next_index = start_segment if last is None or last < start_segment else last + 1
+                if next_index > end:
+                    break
+
+                indices = list(range(next_index, min(next_index + batch - 1, end) + 1))
+                with phase("download"):
+                    segs = session.fetch(indices)
+                with phase("write"):
+                    for seg in segs:
+                        writer.append(seg["index"], seg["y_raw"], seg["ttag_s"])
+                        nbytes += seg["y_raw"].nbytes
+                    writer.flush()  # checkpoint
+                fetched += len(segs)
+                retries = 0
+                if progress is not None:
+                    progress(indices[-1], end)
+            except Exception as e:
+                if not is_transient_error(e):
+                    raise
+                retries += 1
+                attempts += 1
+                if session is not None:
+                    try:
+                        session.close()
+                    except Exception:
+                        pass
+                    session = None
+                if retries > max_retries:
+                    raise DownloadAborted(
+                        f"Giving up after {max_retries} retries; segments up to "
+                        f"{writer.last_segment if writer else None} are saved in {path}: {e}"
+                    ) from e
+                time.sleep(backoff_delay(retries, backoff_s, max_backoff_s))
+    finally:
+        if writer is not None:
+            with phase("write"):
+                writer.close()
+        if session is not None:
+            session.close()
+
+    return {
+        "path": path,
+        "segments": fetched,
+        "bytes": nbytes,
+        "total_segments": total,
+        "last_segment": end,
+        "resumed_from": resumed_from,
+        "retries": attempts,
+    }
@@ -0,0 +1,220 @@
+"""
+State-diffing scope configuration and parameter sweeps.
+
+setup_scope_acquisition sends *RST and every setting, which costs seconds
+even when only the trigger level changed. ScopeConfigurator keeps a model
+of the scope state, verified with one compound query on connect (sync),
+and apply() sends only the settings that differ from the model, batched
+into one write followed by *OPC?.
+
+SweepRunner steps through a grid of settings, ordering the points so that
+expensive settings (segment count, memory depth, sample rate) change
+least often and consecutive points differ in as few settings as possible.
+"""
+
+import math
+import time
+
+# name -> (set command, query, parser); sent in this order
+SETTINGS = {
+    "channel_scale": (":CHANnel1:SCALe {}", ":CHANnel1:SCALe?", float),
+    "timebase_scale": (":TIMebase:SCALe {}", ":TIMebase:SCALe?", float),
+    "trigger_level": (":TRIGger:LEVel CHANNEL1,{}", ":TRIGger:LEVel? CHANNEL1", float),
+    "timebase_position": (":TIMebase:POSition {}", ":TIMebase:POSition?", float),
+    "acquire_mode": (":ACQuire:MODE {}", ":ACQuire:MODE?", str),
+    "sample_rate": (":ACQuire:SRATe:ANALog {}", ":ACQuire:SRATe:ANALog?", float),
+    "acquire_points": (":ACQuire:POINts:ANALog {}", ":ACQuire:POINts:ANALog?", int),
+    "segment_count": (":ACQuire:SEGMented:COUNt {}", ":ACQuire:SEGMented:COUNt?", int),
+}
+
+# Relative cost of changing a setting (memory reallocation dominates)
+CHANGE_COST = {
+    "trigger_level": 1,
+    "channel_scale": 1,
+    "timebase_position": 1,
+    "timebase_scale": 2,
+    "acquire_mode": 5,
+    "sample_rate": 5,
+    "acquire_points": 8,
+    "segment_count": 10,
+}
+
+# Scope replies with short mnemonics (SEGM) to long-form settings (SEGMented)
+_MODE_SHORT = {"SEGMENTED": "SEGM", "RTIME": "RTIM", "ETIME": "ETIM", "HRESOLUTION": "HRES"}
+
+
+def _normalize(name, value):
+    """Comparable form of a requested or queried value."""
+    if isinstance(value, str):
+        text = value.strip().strip('"').upper()
+        if name == "acquire_mode":
+            return _MODE_SHORT.get(text, text)
+        if text in ("MAX", "MIN", "AUTO"):
+            return text
+        value = text
+    parser = SETTINGS[name][2]
+    if parser is str:
+        return str(value).upper()
+    return parser(float(value))
+
+
+def _same(name, a, b) -> bool:
+    a, b = _normalize(name, a), _normalize(name, b)
+    if isinstance(a, float) and isinstance(b, float):
+        return math.isclose(a, b, rel_tol=1e-6, abs_tol=1e-15)
+    return a == b
+
+
+class ScopeConfigurator:
+    """
+    Model of the acquisition settings of one scope. Methods take an open
+    VISA session (connect_scope) with read_termination "\\n".
+    """
+
+    def __init__(self, settings=SETTINGS):
+        self.settings = settings
+        self.state = {}
+        self.commands_sent = 0
+
+    def sync(self, inst, names=None) -> dict:
+        """Read the given (default: all) settings with one compound query."""
+        names = list(names or self.settings)
+        reply = inst.query(";".join(self.settings[n][1] for n in names)).strip()
+        values = [v.strip() for v in reply.split(";")]
+        if len(values) != len(names):
+            raise ValueError(f"Expected {len(names)} values from bulk query, got {reply!r}")
+        for name, value in zip(names, values):
+            self.state[name] = _normalize(name, value)
+        return dict(self.state)
+
+    def check_names(self, names):
+        unknown = set(names) - set(self.settings)
+        if unknown:
+            raise KeyError(f"Unknown settings: {', '.join(sorted(unknown))}")
+
+    def diff(self, **requested) -> dict:
+        """Settings whose requested value differs from the model (unknown counts as different)."""
+        self.check_names(requested)
+        return {name: value for name, value in requested.items()
+                if value is not None
+                and (name not in self.state or not _same(name, self.state[name], value))}
+
+    def apply(self, inst, **requested) -> dict:
+        """
+        Send only the changed settings, in SETTINGS order, as one write and
+        wait for *OPC?. Returns the dict of settings that were sent.
+        """
+        changes = self.diff(**requested)
+        if not changes:
+            return {}
+        commands = [self.settings[name][0].format(changes[name])
+                    for name in self.settings if name in changes]
+        inst.write(";".join(commands))
+        inst.query("*OPC?")
+        self.commands_sent += len(commands)
+        for name, value in changes.items():
+            # The requested form, so asking for the same value again is a no-op
+            # even if the scope coerced it (e.g. MAX sample rate)
+            self.state[name] = _normalize(name, value)
+        return changes
+
+    def reset(self, inst):
+        """*RST and re-read the model from the instrument."""
+        inst.write("*RST")
+        inst.query("*OPC?")
+        self.state.clear()
+        return self.sync(inst)
+
+    def invalidate(self):
+        """Forget the model, e.g. after front-panel changes; the next apply sends everything."""
+        self.state.clear()
+
+
+class SweepRunner:
+    """
+    Run `action(inst, point)` at every point of a settings grid.
+
+    grid maps setting names to lists of values; fixed maps names to values
+    applied once. Expensive settings form the outer loops and the inner
+    loops run back and forth (serpentine order), so consecutive points
+    differ in one setting.
+    """
+
+    def __init__(self, configurator: ScopeConfigurator, grid: dict, fixed: dict = None):
+        self.configurator = configurator
+        self.grid = {name: list(values) for name, values in grid.items()}
+        self.fixed = dict(fixed or {})
+        configurator.check_names(list(self.grid) + list(self.fixed))
+
+    def points(self):
+        """Sweep points in execution order."""
+        names = sorted(self.grid, key=lambda n: CHANGE_COST.get(n, 1), reverse=True)
+        points = [{}]
+        for name in names:
+            values = self.grid[name]
+            expanded = []
+            for k, point in enumerate(points):
+                ordered = values if k % 2 == 0 else values[::-1]
+                expanded.extend(dict(point, **{name: v}) for v in ordered)
+            points = expanded
+        return points
+
+    def estimated_changes(self) -> int:
+        """Setting changes the sweep will send after the first point."""
+        points = self.points()
+        return sum(sum(1 for n in a if not _same(n, a[n], b[n]))
+                   for a, b in zip(points, points[1:]))
+
+    def run(self, inst, action, on_point=None) -> list:
+        """
+        Returns one record per point: point, changed settings, configure_s,
+        result (action's return value). on_point(k, n, record) reports progress.
+        """
+        self.configurator.apply(inst, **self.fixed)
+        points = self.points()
+        records = []
+        for k, point in enumerate(points):
+            t0 = time.perf_counter()
+            changed = self.configurator.apply(inst, **point)
+            configure_s = time.perf_counter() - t0
+            record = {"point": point, "changed": changed, "configure_s": configure_s,
+                      "result": action(inst, point)}
+            records.append(record)
+            if on_point is not None:
+                on_point(k, len(points), record)
+        return records
+
+
+def sync_scope(configurator: ScopeConfigurator, resource: str) -> dict:
+    """Open a session and read the model with one bulk query."""
+    from scope_io import connect_scope
+
+    inst = connect_scope(resource)
+    try:
+        inst.read_termination = "\n"
+        return configurator.sync(inst)
+    finally:
+        inst.close()
+
+
+def configure_scope_incremental(configurator: ScopeConfigurator, resource: str, reset: bool = False,
+                                **settings) -> dict:
+    """
+    Open a session and apply settings through the configurator (syncing
+    the model first if it is empty). Returns the settings that were sent.
+    """
+    from scope_io import connect_scope
+
+    inst = connect_scope(resource)
+    try:
+        inst.read_termination = "\n"
+        try:
+            if reset:
+                configurator.reset(inst)
+            elif not configurator.state:
+                configurator.sync(inst)
+        except ValueError:
+            configurator.invalidate()  # unparsable reply (either path): send every setting
+        return configurator.apply(inst, acquire_mode="SEGMented", **settings)
+    finally:
+        inst.close()
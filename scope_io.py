@@ -0,0 +1,406 @@
+"""
+Instrument I/O helpers for Infiniium segmented acquisitions.
+
+Shared by the GUI viewers and the headless tools; this module deliberately
+imports neither tkinter nor matplotlib. PyVISA is imported on first connect
+so the GUIs can show their window before the VISA library loads.
+"""
+
+import threading
+import time
+
+import numpy as np
+
+# Sample windows are 0-based offsets into the record (t_s = offset * xincr).
+# The <start> of ":WAVeform:DATA? <start>,<size>" is the first waveform
+# point to transfer, and Infiniium numbers record points from 1, so offset
+# k is requested as point k + WAVEFORM_START_BASE.
+WAVEFORM_START_BASE = 1
+
+
+def _read_ieee_block_from_instrument(inst) -> bytes:
+    """
+    Read IEEE 488.2 definite-length binary block directly from instrument.
+    Handles partial reads by continuing until all expected bytes are received.
+    Returns payload bytes only (without IEEE header).
+    """
+    header = inst.read_bytes(2)
+    if header[0:1] != b"#":
+        raise ValueError("Not an IEEE block (missing '#').")
+    
+    nd = int(chr(header[1]))
+    if nd <= 0:
+        raise ValueError(f"Invalid IEEE block ndigits={nd}")
+    
+    len_bytes = inst.read_bytes(nd)
+    nbytes = int(len_bytes.decode("ascii"))
+    
+    payload = bytearray()
+    remaining = nbytes
+    while remaining > 0:
+        chunk = inst.read_bytes(remaining)
+        payload.extend(chunk)
+        remaining = nbytes - len(payload)
+    
+    try:
+        inst.read_bytes(1)  # consume newline
+    except:
+        pass
+    
+    return bytes(payload)
+
+
+_resource_manager = None
+_resource_manager_lock = threading.Lock()
+
+
+def get_resource_manager():
+    """Import pyvisa and create the shared ResourceManager on first use."""
+    global _resource_manager
+    with _resource_manager_lock:
+        if _resource_manager is None:
+            import pyvisa
+            _resource_manager = pyvisa.ResourceManager()
+        return _resource_manager
+
+
+def connect_scope(resource: str, timeout_ms: int = 30000, tuner=None):
+    """Open a session; a TransferTuner, if given, supplies the cached chunk size."""
+    rm = get_resource_manager()
+    inst = rm.open_resource(resource)
+    inst.timeout = timeout_ms
+    inst.write_termination = "\n"
+    inst.read_termination = None
+    inst.chunk_size = tuner.chunk_size(resource) if tuner is not None else 1024 * 1024
+    return inst
+
+
+def setup_scope_acquisition(resource: str, channel_scale: float, timebase_scale: float,
+                           trigger_level: float, timebase_position: float,
+                           sample_rate: str, acquire_points: int, segment_count: int):
+    """Configure scope for segmented acquisition"""
+    inst = connect_scope(resource)
+    try:
+        inst.read_termination = "\n"
+        inst.write('*RST')
+        inst.write(f':CHANnel1:SCALe {channel_scale}')
+        inst.write(f':TIMebase:SCALe {timebase_scale}')
+        inst.write(f':TRIGger:LEVel CHANNEL1,{trigger_level}')
+        inst.write(f':TIMebase:POSition {timebase_position}')
+        inst.write(':ACQuire:MODE SEGMented')
+        inst.write(f':ACQuire:SRATe:ANALog {sample_rate}')
+        inst.write(f':ACQuire:POINts:ANALog {acquire_points}')
+        inst.write(f':ACQuire:SEGMented:COUNt {segment_count}')
+    finally:
+        inst.close()
+
+
+def setup_waveform_transfer(inst, source="CHANnel1", fmt="WORD", byteorder="LSBF"):
+    inst.write(f":WAVeform:SOURce {source}")
+    inst.write(f":WAVeform:FORMat {fmt}")
+    inst.write(f":WAVeform:BYTeorder {byteorder}")
+
+
+def query_captured_segment_count(inst) -> int:
+    return int(float(inst.query(":WAVeform:SEGMented:COUNt?").strip()))
+
+
+def query_timebase(inst):
+    xincr = float(inst.query(":WAVeform:XINCrement?").strip())
+    return xincr
+
+
+def query_record_points(inst) -> int:
+    return int(float(inst.query(":WAVeform:POINts?").strip()))
+
+
+def query_acquisition_identity(inst, total_segs: int = None) -> tuple:
+    """
+    Scope-side identity of the acquisition in memory: (segment count, time
+    tag of the last segment). Segment 1 is the time-tag reference (always
+    0), so the last tag is what differs between captures, including a
+    :SINGle from the front panel or another client. Expects
+    read_termination "\n" and the waveform source already selected.
+    """
+    if total_segs is None:
+        total_segs = query_captured_segment_count(inst)
+    if total_segs < 1:
+        return (0, None)
+    inst.write(f":ACQuire:SEGMented:INDex {total_segs}")
+    return (total_segs, float(inst.query(":WAVeform:SEGMented:TTAG?").strip()))
+
+
+def resolve_sample_window(inst, xincr, sample_window=None, time_window=None):
+    """
+    Convert a (start, size) sample window or a (t_start, t_stop) time window
+    in seconds (same axis as 't_s') into a clipped (start, size) pair.
+    Returns None when no window was requested (full record).
+    """
+    if sample_window is None and time_window is None:
+        return None
+    if sample_window is not None and time_window is not None:
+        raise ValueError("Specify either sample_window or time_window, not both.")
+    
+    if time_window is not None:
+        t_start, t_stop = time_window
+        if t_stop <= t_start:
+            raise ValueError(f"Invalid time window {time_window}")
+        start = int(np.floor(t_start / xincr))
+        size = int(np.ceil(t_stop / xincr)) - start
+    else:
+        start, size = (int(v) for v in sample_window)
+    
+    points = query_record_points(inst)
+    start = max(0, start)
+    size = min(size, points - start)
+    if size <= 0:
+        raise ValueError(f"Window lies outside the {points}-point record")
+    return start, size
+
+
+def read_segment_word(inst, seg_index: int, window=None):
+    """
+    Read one segment as int16. 'window' is an optional (start, size) pair
+    with a 0-based start; only that span is transferred using the
+    :WAVeform:DATA? start,size form (see WAVEFORM_START_BASE).
+    """
+    inst.write(f":ACQuire:SEGMented:INDex {seg_index}")
+    if window is None:
+        inst.write(":WAVeform:DATA?")
+    else:
+        inst.write(f":WAVeform:DATA? {window[0] + WAVEFORM_START_BASE},{window[1]}")
+    payload = _read_ieee_block_from_instrument(inst)
+    y = np.frombuffer(payload, dtype=np.int16)
+    inst.read_termination = "\n"
+    ttag = float(inst.query(":WAVeform:SEGMented:TTAG?").strip())
+    inst.read_termination = None
+    return y, ttag
+
+
+def tune_transfer(inst, resource: str, tuner, window, total_segs: int):
+    """
+    Let a TransferTuner probe chunk sizes on the first transfer from this
+    resource (reading segment 1) and size the timeout for one block.
+    Expects read_termination "\n"; leaves it as None for block reads.
+    Returns the expected block size in bytes.
+    """
+    points = window[1] if window else query_record_points(inst)
+    inst.read_termination = None
+    read_block = None
+    if total_segs > 0:
+        read_block = lambda: read_segment_word(inst, 1, window)[0].tobytes()
+    tuner.tune(inst, resource, 2 * points, read_block)
+    return 2 * points
+
+
+def extract_segments_mode_a(resource: str, source="CHANnel1", start_segment=1, num_segments=10,
+                            sample_window=None, time_window=None, tuner=None):
+    inst = connect_scope(resource, tuner=tuner)
+    try:
+        inst.read_termination = "\n"
+        setup_waveform_transfer(inst, source=source, fmt="WORD", byteorder="LSBF")
+        xincr = query_timebase(inst)
+        total_segs = query_captured_segment_count(inst)
+        window = resolve_sample_window(inst, xincr, sample_window, time_window)
+        t0 = window[0] * xincr if window else 0.0
+        if tuner is not None:
+            tune_transfer(inst, resource, tuner, window, total_segs)
+        
+        end_segment = min(start_segment + num_segments - 1, total_segs)
+        
+        inst.read_termination = None
+        segments = []
+
+        t_axes = {}
+
+        for i in range(start_segment, end_segment + 1):
+            y, ttag = read_segment_word(inst, i, window)
+            t = t_axes.get(len(y))
+            if t is None:
+                t = t_axes[len(y)] = t0 + np.arange(len(y)) * xincr
+            segments.append({"index": i, "ttag_s": ttag, "t_s": t, "y_raw": y})
+
+        return segments, total_segs
+    finally:
+        inst.close()
+
+
+def extract_segments_window(resource: str, source="CHANnel1", start_segment=1, num_segments=10,
+                            sample_window=None, time_window=None, tuner=None):
+    """
+    Download only a sample or time window of every segment.
+    Returns (y, ttags, t_s, total_segs) where y is a compact (n, window) int16
+    array, ttags is float64 (n,) and t_s is the shared time axis of the window.
+    """
+    inst = connect_scope(resource, tuner=tuner)
+    try:
+        inst.read_termination = "\n"
+        setup_waveform_transfer(inst, source=source, fmt="WORD", byteorder="LSBF")
+        xincr = query_timebase(inst)
+        total_segs = query_captured_segment_count(inst)
+        window = resolve_sample_window(inst, xincr, sample_window, time_window)
+        if window is None:
+            window = (0, query_record_points(inst))
+        if tuner is not None:
+            tune_transfer(inst, resource, tuner, window, total_segs)
+        
+        end_segment = min(start_segment + num_segments - 1, total_segs)
+        n = max(0, end_segment - start_segment + 1)
+        
+        inst.read_termination = None
+        y = np.empty((n, window[1]), dtype=np.int16)
+        ttags = np.empty(n, dtype=np.float64)
+        width = window[1]
+
+        for row, i in enumerate(range(start_segment, end_segment + 1)):
+            seg_y, ttags[row] = read_segment_word(inst, i, window)
+            # Scope may return fewer points than requested near the record end
+            width = min(width, len(seg_y))
+            y[row, :width] = seg_y[:width]
+
+        t = (window[0] + np.arange(width)) * xincr
+        return y[:, :width], ttags, t, total_segs
+    finally:
+        inst.close()
+
+
+def extract_segment_indices(resource: str, indices, source="CHANnel1",
+                            sample_window=None, time_window=None, tuner=None, progress=None):
+    """
+    Download an arbitrary list of segment indices (e.g. only those missing
+    from the cache). Indices beyond the captured count are skipped.
+    progress(done, count) is called after every segment.
+    """
+    inst = connect_scope(resource, tuner=tuner)
+    try:
+        inst.read_termination = "\n"
+        setup_waveform_transfer(inst, source=source, fmt="WORD", byteorder="LSBF")
+        xincr = query_timebase(inst)
+        total_segs = query_captured_segment_count(inst)
+        window = resolve_sample_window(inst, xincr, sample_window, time_window)
+        t0 = window[0] * xincr if window else 0.0
+        if tuner is not None:
+            tune_transfer(inst, resource, tuner, window, total_segs)
+        
+        inst.read_termination = None
+        segments = []
+        indices = [i for i in indices if 1 <= i <= total_segs]
+
+        t_axes = {}
+
+        for done, i in enumerate(indices, 1):
+            y, ttag = read_segment_word(inst, i, window)
+            t = t_axes.get(len(y))
+            if t is None:
+                t = t_axes[len(y)] = t0 + np.arange(len(y)) * xincr
+            segments.append({"index": i, "ttag_s": ttag, "t_s": t, "y_raw": y})
+            if progress is not None:
+                progress(done, len(indices))
+
+        return segments, total_segs
+    finally:
+        inst.close()
+
+
+class ScopeSegmentSession:
+    """
+    Persistent VISA session for on-demand segment reads (used by
+    LazySegmentSource and the headless tools). The time axis is shared
+    between segments; an optional sample/time window applies to every read.
+    An optional TransferTuner tunes the session and learns from every fetch.
+    """
+    
+    def __init__(self, resource: str, source="CHANnel1", sample_window=None, time_window=None,
+                 tuner=None):
+        self.resource = resource
+        self.tuner = tuner
+        self.inst = connect_scope(resource, tuner=tuner)
+        try:
+            self.inst.read_termination = "\n"
+            setup_waveform_transfer(self.inst, source=source, fmt="WORD", byteorder="LSBF")
+            self.xincr = query_timebase(self.inst)
+            self.total_segments = query_captured_segment_count(self.inst)
+            self.window = resolve_sample_window(self.inst, self.xincr, sample_window, time_window)
+            self.t0 = self.window[0] * self.xincr if self.window else 0.0
+            self.points = self.window[1] if self.window else query_record_points(self.inst)
+            self.identity = query_acquisition_identity(self.inst, self.total_segments)
+            if tuner is not None:
+                self._block_bytes = tune_transfer(self.inst, resource, tuner, self.window,
+                                                  self.total_segments)
+            self.inst.read_termination = None
+        except Exception:
+            self.inst.close()
+            raise
+        self._t_axes = {}
+    
+    def fetch(self, indices, progress=None):
+        """Read the given segments; progress(done, count) is called after each one."""
+        segments = []
+        start = time.perf_counter()
+        for done, i in enumerate(indices, 1):
+            y, ttag = read_segment_word(self.inst, i, self.window)
+            t = self._t_axes.get(len(y))
+            if t is None:
+                t = self._t_axes[len(y)] = self.t0 + np.arange(len(y)) * self.xincr
+            segments.append({"index": i, "ttag_s": ttag, "t_s": t, "y_raw": y})
+            if progress is not None:
+                progress(done, len(indices))
+        if self.tuner is not None and segments:
+            # Each segment costs a data and a time-tag round trip
+            self.tuner.observe(self.resource, sum(s["y_raw"].nbytes for s in segments),
+                               time.perf_counter() - start, count=2 * len(segments))
+            self.tuner.apply(self.inst, self.resource, self._block_bytes)
+        return segments
+    
+    def time_tag(self, index: int) -> float:
+        """Time tag of one segment without transferring its samples."""
+        self.inst.write(f":ACQuire:SEGMented:INDex {index}")
+        self.inst.read_termination = "\n"
+        try:
+            return float(self.inst.query(":WAVeform:SEGMented:TTAG?").strip())
+        finally:
+            self.inst.read_termination = None
+
+    def close(self):
+        if self.tuner is not None:
+            self.tuner.save()
+        self.inst.close()
+
+
+def get_instrument_id(resource: str):
+    """Query instrument identification"""
+    inst = connect_scope(resource)
+    try:
+        inst.read_termination = "\n"
+        idn = inst.query("*IDN?").strip()
+        return idn
+    finally:
+        inst.close()
+
+
+def wait_for_acquisition_done(inst, timeout_s: float = 60.0, poll_s: float = 0.05):
+    """
+    Poll the Acquisition Done Event Register (:ADER?) until the acquisition
+    completes. Raises TimeoutError if it does not finish within timeout_s.
+    """
+    deadline = time.monotonic() + timeout_s
+    while True:
+        if int(float(inst.query(":ADER?").strip())) == 1:
+            return
+        if time.monotonic() > deadline:
+            raise TimeoutError(f"Acquisition not complete after {timeout_s:.1f} s")
+        time.sleep(poll_s)
+
+
+def trigger_single_acquisition(resource: str, wait: bool = False, timeout_s: float = 60.0):
+    """Trigger single acquisition on scope, optionally waiting for it to complete"""
+    inst = connect_scope(resource)
+    try:
+        inst.read_termination = "\n"
+        if wait:
+            inst.query(":ADER?")  # reading clears the done flag of the previous acquisition
+        inst.write(":SINGle")
+        if wait:
+            wait_for_acquisition_done(inst, timeout_s)
+    finally:
+        inst.close()
@@ -1,143 +1,35 @@
 import numpy as np
-import pyvisa
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 import tkinter as tk
 from tkinter import ttk
 import threading
 
-
-def _read_ieee_block_from_instrument(inst) -> bytes:
-    """Read IEEE 488.2 definite-length binary block from instrument."""
-    header = inst.read_bytes(2)
-    if header[0:1] != b"#":
-        raise ValueError("Not an IEEE block (missing '#').")
-    
-    nd = int(chr(header[1]))
-    if nd <= 0:
-        raise ValueError(f"Invalid IEEE block ndigits={nd}")
-    
-    len_bytes = inst.read_bytes(nd)
-    nbytes = int(len_bytes.decode("ascii"))
-    
-    payload = bytearray()
-    remaining = nbytes
-    while remaining > 0:
-        chunk = inst.read_bytes(remaining)
-        payload.extend(chunk)
-        remaining = nbytes - len(payload)
-    
-    try:
-        inst.read_bytes(1)
-    except:
-        pass
-    
-    return bytes(payload)
-
-
-def connect_scope(resource: str, timeout_ms: int = 30000):
-    rm = pyvisa.ResourceManager()
-    inst = rm.open_resource(resource)
-    inst.timeout = timeout_ms
-    inst.write_termination = "\n"
-    inst.read_termination = None
-    inst.chunk_size = 1024 * 1024
-    return inst
-
-
-def setup_scope_acquisition(resource: str, channel_scale: float, timebase_scale: float,
-                           trigger_level: float, timebase_position: float,
-                           sample_rate: str, acquire_points: int, segment_count: int):
-    """Configure scope for segmented acquisition"""
-    inst = connect_scope(resource)
-    try:
-        inst.read_termination = "\n"
-        inst.write('*RST')
-        inst.write(f':CHANnel1:SCALe {channel_scale}')
-        inst.write(f':TIMebase:SCALe {timebase_scale}')
-        inst.write(f':TRIGger:LEVel CHANNEL1,{trigger_level}')
-        inst.write(f':TIMebase:POSition {timebase_position}')
-        inst.write(':ACQuire:MODE SEGMented')
-        inst.write(f':ACQuire:SRATe:ANALog {sample_rate}')
-        inst.write(f':ACQuire:POINts:ANALog {acquire_points}')
-        inst.write(f':ACQuire:SEGMented:COUNt {segment_count}')
-    finally:
-        inst.close()
-
-
-def setup_waveform_transfer(inst, source="CHANnel1", fmt="WORD", byteorder="LSBF"):
-    inst.write(f":WAVeform:SOURce {source}")
-    inst.write(f":WAVeform:FORMat {fmt}")
-    inst.write(f":WAVeform:BYTeorder {byteorder}")
-
-
-def query_captured_segment_count(inst) -> int:
-    return int(float(inst.query(":WAVeform:SEGMented:COUNt?").strip()))
-
-
-def query_timebase(inst):
-    xincr = float(inst.query(":WAVeform:XINCrement?").strip())
-    return xincr
-
-
-def read_segment_word(inst, seg_index: int):
-    inst.write(f":ACQuire:SEGMented:INDex {seg_index}")
-    inst.write(":WAVeform:DATA?")
-    payload = _read_ieee_block_from_instrument(inst)
-    y = np.frombuffer(payload, dtype=np.int16)
-    inst.read_termination = "\n"
-    ttag = float(inst.query(":WAVeform:SEGMented:TTAG?").strip())
-    inst.read_termination = None
-    return y, ttag
-
-
-def extract_segments_mode_a(resource: str, source="CHANnel1", start_segment=1, num_segments=10):
-    inst = connect_scope(resource)
-    try:
-        inst.read_termination = "\n"
-        setup_waveform_transfer(inst, source=source, fmt="WORD", byteorder="LSBF")
-        xincr = query_timebase(inst)
-        total_segs = query_captured_segment_count(inst)
-        
-        end_segment = min(start_segment + num_segments - 1, total_segs)
-        
-        inst.read_termination = None
-        segments = []
-
-        for i in range(start_segment, end_segment + 1):
-            y, ttag = read_segment_word(inst, i)
-            t = np.arange(len(y)) * xincr
-            segments.append({"index": i, "ttag_s": ttag, "t_s": t, "y_raw": y})
-
-        return segments, total_segs
-    finally:
-        inst.close()
-
-
-def get_instrument_id(resource: str):
-    """Query instrument identification"""
-    inst = connect_scope(resource)
-    try:
-        inst.read_termination = "\n"
-        idn = inst.query("*IDN?").strip()
-        return idn
-    finally:
-        inst.close()
-
-
-def trigger_single_acquisition(resource: str):
-    """Trigger single acquisition on scope"""
-    inst = connect_scope(resource)
-    try:
-        inst.read_termination = "\n"
-        inst.write(":SINGle")
-    finally:
-        inst.close()
+from scope_io import (
+    ScopeSegmentSession,
+    get_instrument_id,
+    trigger_single_acquisition,
+)
+from scope_configurator import ScopeConfigurator, configure_scope_incremental, sync_scope
+from memory_planner import plan_download
+from segment_cache import SegmentCache
+from transfer_tuning import TransferTuner
+from segment_source import LazySegmentSource
+from ui_event_bus import UIEventBus
+from segment_set import SegmentSet
+from segment_triage import METRICS, triage_segments
+from coherent_average import coherent_average
+from segment_spectrum import compute_spectra, to_db
+from pulse_height import pulse_height_spectrum
+from event_timing import crossing_times
+from segment_filters import PRESETS, make_preset, preset_zero_phase
+from segment_overview import SegmentOverview
 
 
 class ScopeSetupAndViewerGUI:
     def __init__(self, root):
         self.root = root
+        # Worker threads post UI updates here; drained on the Tk thread every 40 ms
+        self.events = UIEventBus(root)
+        self.events.start()
         self.root.title("Oscilloscope Setup & Segment Viewer")
         self.root.geometry("1400x900")
         
@@ -147,7 +39,21 @@ class ScopeSetupAndViewerGUI:
         self.is_playing = False
         self.play_speed = 500
         self.connected = False
+        self.configurator = ScopeConfigurator()
         self.total_segments_available = 0
+        self.fig = None  # matplotlib is loaded on first draw, see _ensure_figure
+        self.segment_cache = SegmentCache()
+        self.transfer_tuner = TransferTuner()  # chunk size/timeout learned per resource
+        self.acq_generation = 0
+        self._lazy_pending = None  # on-demand segment shown as a placeholder
+        self.segment_set = None
+        self.filter_name = "None"
+        self._filter = None
+        self.ttag_index = None
+        self.nav_positions = None
+        self.outlier_positions = None
+        self.overview = None
+        self.ov_fig = None
         
         self._create_widgets()
     
@@ -213,6 +119,8 @@ class ScopeSetupAndViewerGUI:
         self.setup_btn = ttk.Button(setup_frame, text="Configure Scope", 
                                     command=self.configure_scope, width=20, state=tk.DISABLED)
         self.setup_btn.pack(side=tk.LEFT, padx=20)
+        self.reset_first_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(setup_frame, text="*RST first", variable=self.reset_first_var).pack(side=tk.LEFT)
         
         # Acquisition panel
         acq_frame = ttk.LabelFrame(self.root, text="Data Acquisition", padding="10")
@@ -238,9 +146,85 @@ class ScopeSetupAndViewerGUI:
                                       command=self.collect_segments, width=15, state=tk.DISABLED)
         self.collect_btn.pack(side=tk.LEFT, padx=5)
         
+        self.browse_btn = ttk.Button(acq_frame, text="Browse All", 
+                                     command=self.browse_all_segments, width=12, state=tk.DISABLED)
+        self.browse_btn.pack(side=tk.LEFT, padx=5)
+        
         self.seg_info_label = ttk.Label(acq_frame, text="", font=("Arial", 9))
         self.seg_info_label.pack(side=tk.LEFT, padx=10)
         
+        # Time tag panel
+        ttag_frame = ttk.LabelFrame(self.root, text="Time Tags", padding="10")
+        ttag_frame.pack(side=tk.TOP, fill=tk.X, padx=10, pady=5)
+        
+        ttk.Label(ttag_frame, text="Window (µs):").pack(side=tk.LEFT, padx=5)
+        self.ttag_from_var = tk.DoubleVar(value=0.0)
+        ttk.Entry(ttag_frame, textvariable=self.ttag_from_var, width=10).pack(side=tk.LEFT, padx=2)
+        ttk.Label(ttag_frame, text="to").pack(side=tk.LEFT, padx=2)
+        self.ttag_to_var = tk.DoubleVar(value=1000.0)
+        ttk.Entry(ttag_frame, textvariable=self.ttag_to_var, width=10).pack(side=tk.LEFT, padx=2)
+        
+        self.ttag_window_btn = ttk.Button(ttag_frame, text="Show Window",
+                                          command=self.show_time_window, width=14, state=tk.DISABLED)
+        self.ttag_window_btn.pack(side=tk.LEFT, padx=(10, 2))
+        
+        self.ttag_anomaly_btn = ttk.Button(ttag_frame, text="Anomalous Intervals",
+                                           command=self.show_anomalous_intervals, width=18, state=tk.DISABLED)
+        self.ttag_anomaly_btn.pack(side=tk.LEFT, padx=2)
+        
+        self.show_all_btn = ttk.Button(ttag_frame, text="Show All",
+                                       command=self.show_all_segments, width=10, state=tk.DISABLED)
+        self.show_all_btn.pack(side=tk.LEFT, padx=2)
+        
+        self.ttag_stats_label = ttk.Label(ttag_frame, text="", font=("Arial", 9))
+        self.ttag_stats_label.pack(side=tk.LEFT, padx=10)
+        
+        # Analysis panel
+        analysis_frame = ttk.LabelFrame(self.root, text="Analysis", padding="10")
+        analysis_frame.pack(side=tk.TOP, fill=tk.X, padx=10, pady=5)
+        
+        ttk.Label(analysis_frame, text="Outlier metric:").pack(side=tk.LEFT, padx=5)
+        self.metric_var = tk.StringVar(value=METRICS[0])
+        metric_combo = ttk.Combobox(analysis_frame, textvariable=self.metric_var, width=12, state="readonly")
+        metric_combo['values'] = METRICS
+        metric_combo.pack(side=tk.LEFT, padx=2)
+        
+        self.triage_btn = ttk.Button(analysis_frame, text="Find Outliers",
+                                     command=self.find_outliers, width=14, state=tk.DISABLED)
+        self.triage_btn.pack(side=tk.LEFT, padx=(10, 2))
+        
+        self.outliers_only_var = tk.BooleanVar(value=False)
+        self.outliers_only_chk = ttk.Checkbutton(analysis_frame, text="Show outliers only",
+                                                 variable=self.outliers_only_var,
+                                                 command=self.toggle_outliers_only, state=tk.DISABLED)
+        self.outliers_only_chk.pack(side=tk.LEFT, padx=10)
+        
+        self.average_btn = ttk.Button(analysis_frame, text="Coherent Average",
+                                      command=self.compute_coherent_average, width=16, state=tk.DISABLED)
+        self.average_btn.pack(side=tk.LEFT, padx=2)
+        
+        self.spectrum_btn = ttk.Button(analysis_frame, text="Compute Spectrum",
+                                       command=self.compute_spectrum, width=16, state=tk.DISABLED)
+        self.spectrum_btn.pack(side=tk.LEFT, padx=2)
+        
+        self.pha_btn = ttk.Button(analysis_frame, text="Pulse Heights",
+                                  command=self.compute_pulse_heights, width=14, state=tk.DISABLED)
+        self.pha_btn.pack(side=tk.LEFT, padx=2)
+        
+        self.timing_btn = ttk.Button(analysis_frame, text="Edge Timing",
+                                     command=self.compute_edge_timing, width=12, state=tk.DISABLED)
+        self.timing_btn.pack(side=tk.LEFT, padx=2)
+        
+        ttk.Label(analysis_frame, text="Filter:").pack(side=tk.LEFT, padx=(10, 2))
+        self.filter_var = tk.StringVar(value="None")
+        filter_combo = ttk.Combobox(analysis_frame, textvariable=self.filter_var, width=24, state="readonly")
+        filter_combo['values'] = list(PRESETS)
+        filter_combo.pack(side=tk.LEFT, padx=2)
+        filter_combo.bind("<<ComboboxSelected>>", lambda event: self.select_filter())
+        
+        self.analysis_label = ttk.Label(analysis_frame, text="", font=("Arial", 9))
+        self.analysis_label.pack(side=tk.LEFT, padx=10)
+        
         # Control panel
         control_frame = ttk.Frame(self.root, padding="10")
         control_frame.pack(side=tk.TOP, fill=tk.X)
@@ -281,14 +265,89 @@ class ScopeSetupAndViewerGUI:
                                       command=self.update_speed)
         self.speed_spin.pack(side=tk.LEFT, padx=2)
         
-        # Matplotlib figure
-        self.fig, self.ax = plt.subplots(figsize=(13, 5))
-        self.canvas = FigureCanvasTkAgg(self.fig, master=self.root)
-        self.canvas.get_tk_widget().pack(side=tk.TOP, fill=tk.BOTH, expand=True)
+        # Segment slider (covers every loaded or lazily browsable segment)
+        self.slider_var = tk.DoubleVar(value=0)
+        self.seg_slider = ttk.Scale(self.root, from_=0, to=0, orient=tk.HORIZONTAL,
+                                    variable=self.slider_var, command=self._on_slider)
+        self.seg_slider.pack(side=tk.TOP, fill=tk.X, padx=10)
+        self._slider_pending = None
+        
+        # Plot tabs
+        self.plot_tabs = ttk.Notebook(self.root)
+        self.plot_tabs.pack(side=tk.TOP, fill=tk.BOTH, expand=True)
+        time_tab = ttk.Frame(self.plot_tabs)
+        spectrum_tab = ttk.Frame(self.plot_tabs)
+        pha_tab = ttk.Frame(self.plot_tabs)
+        self.plot_tabs.add(time_tab, text="Time Domain")
+        self.plot_tabs.add(spectrum_tab, text="Spectrum")
+        self.plot_tabs.add(pha_tab, text="Pulse Heights")
+        self.time_tab = time_tab
+        self.spectrum_tab = spectrum_tab
+        self.pha_tab = pha_tab
+        self.spec_fig = None
+        self.pha_fig = None
+        
+        # Placeholder until the first draw creates the matplotlib figure
+        self.plot_placeholder = ttk.Label(time_tab, text="No data loaded", font=("Arial", 12),
+                                          foreground="gray", anchor=tk.CENTER)
+        self.plot_placeholder.pack(side=tk.TOP, fill=tk.BOTH, expand=True)
         
         self._set_button_state(tk.DISABLED)
     
+    def _ensure_figure(self):
+        """Import matplotlib and create the time-domain figure on first draw"""
+        if self.fig is not None:
+            return
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+        
+        self.plot_placeholder.destroy()
+        self.fig = Figure(figsize=(13, 5))
+        self.ax = self.fig.add_subplot()
+        self.canvas = FigureCanvasTkAgg(self.fig, master=self.time_tab)
+        self.canvas.get_tk_widget().pack(side=tk.TOP, fill=tk.BOTH, expand=True)
+    
+    def _ensure_overview_figure(self):
+        """Overview strip under the time plot: one column per segment, click to jump"""
+        if self.ov_fig is not None:
+            return
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+        
+        self.ov_fig = Figure(figsize=(13, 1.6))
+        self.ov_ax = self.ov_fig.add_subplot()
+        self.ov_fig.subplots_adjust(left=0.06, right=0.99, bottom=0.28, top=0.95)
+        self.ov_canvas = FigureCanvasTkAgg(self.ov_fig, master=self.time_tab)
+        self.ov_canvas.get_tk_widget().pack(side=tk.BOTTOM, fill=tk.X)
+        self.ov_canvas.mpl_connect("button_press_event", self._on_overview_click)
+        self.ov_marker = None
+    
+    def _ensure_spectrum_figure(self):
+        """Spectrum figure: average / max-hold and spectrogram over segment index"""
+        if self.spec_fig is not None:
+            return
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+        
+        self.spec_fig = Figure(figsize=(13, 5))
+        self.spec_ax, self.sgram_ax = self.spec_fig.subplots(1, 2)
+        self.spec_canvas = FigureCanvasTkAgg(self.spec_fig, master=self.spectrum_tab)
+        self.spec_canvas.get_tk_widget().pack(side=tk.TOP, fill=tk.BOTH, expand=True)
+    
+    def _ensure_pha_figure(self):
+        """Pulse-height figure: height spectrum and height vs charge"""
+        if self.pha_fig is not None:
+            return
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+        
+        self.pha_fig = Figure(figsize=(13, 5))
+        self.pha_ax, self.charge_ax = self.pha_fig.subplots(1, 2)
+        self.pha_canvas = FigureCanvasTkAgg(self.pha_fig, master=self.pha_tab)
+        self.pha_canvas.get_tk_widget().pack(side=tk.TOP, fill=tk.BOTH, expand=True)
+    
     def _set_button_state(self, state):
+        self.seg_slider.config(state=state)
         self.first_btn.config(state=state)
         self.prev_btn.config(state=state)
         self.play_btn.config(state=state)
@@ -297,29 +356,39 @@ class ScopeSetupAndViewerGUI:
     
     def connect_scope(self):
         """Connect to the oscilloscope"""
+        resource = self.ip_var.get()  # Tk variables are read on the Tk thread
+        
         def connect():
             try:
-                self.status_label.config(text="Connecting...")
-                resource = self.ip_var.get()
+                self.events.post("status", self.status_label.config, text="Connecting...")
                 idn = get_instrument_id(resource)
-                self.root.after(0, lambda: self._connected(resource, idn))
+                configurator = ScopeConfigurator()
+                try:
+                    sync_scope(configurator, resource)  # one bulk query; configure then sends only changes
+                except Exception:
+                    configurator.invalidate()  # unknown state: first configure sends everything
+                self.events.call(self._connected, resource, idn, configurator)
             except Exception as e:
-                self.root.after(0, lambda: self._connect_error(str(e)))
+                self.events.call(self._connect_error, str(e))
         
         self.connect_btn.config(state=tk.DISABLED)
         thread = threading.Thread(target=connect, daemon=True)
         thread.start()
     
-    def _connected(self, resource, idn):
+    def _connected(self, resource, idn, configurator):
         """Called when connection succeeds"""
         self.visa_resource = resource
         self.connected = True
+        self.configurator = configurator
+        self._invalidate_cache()
+        self._drop_lazy_source()
         self.idn_label.config(text=f"✓ {idn}", foreground="green")
         self.status_label.config(text="Connected - Ready to configure")
         self.connect_btn.config(state=tk.NORMAL, text="Reconnect")
         self.setup_btn.config(state=tk.NORMAL)
         self.capture_btn.config(state=tk.NORMAL)
         self.collect_btn.config(state=tk.NORMAL)
+        self.browse_btn.config(state=tk.NORMAL)
     
     def _connect_error(self, error_msg):
         """Called when connection fails"""
@@ -328,27 +397,42 @@ class ScopeSetupAndViewerGUI:
         self.connect_btn.config(state=tk.NORMAL)
     
     def configure_scope(self):
-        """Configure scope with setup parameters"""
+        """Configure scope, sending only the settings that changed"""
+        reset = self.reset_first_var.get()
+        # Tk variables are read on the Tk thread
+        settings = dict(
+            channel_scale=self.ch_scale_var.get(),
+            timebase_scale=self.tb_scale_var.get(),
+            trigger_level=self.trig_level_var.get(),
+            timebase_position=self.tb_pos_var.get(),
+            sample_rate=self.srate_var.get(),
+            acquire_points=self.acq_pts_var.get(),
+            segment_count=self.seg_count_var.get()
+        )
+        
         def setup():
             try:
-                self.root.after(0, lambda: self.status_label.config(text="Configuring scope..."))
+                self.events.post("status", self.status_label.config, text="Configuring scope...")
                 
-                setup_scope_acquisition(
+                changed = configure_scope_incremental(
+                    self.configurator,
                     self.visa_resource,
-                    channel_scale=self.ch_scale_var.get(),
-                    timebase_scale=self.tb_scale_var.get(),
-                    trigger_level=self.trig_level_var.get(),
-                    timebase_position=self.tb_pos_var.get(),
-                    sample_rate=self.srate_var.get(),
-                    acquire_points=self.acq_pts_var.get(),
-                    segment_count=self.seg_count_var.get()
+                    reset=reset,
+                    **settings
                 )
                 
-                self.root.after(0, lambda: self.status_label.config(text="Scope configured - Ready to capture"))
-                self.root.after(0, lambda: self.setup_btn.config(state=tk.NORMAL))
+                if changed or reset:
+                    self._invalidate_cache()
+                    self.events.call(self._drop_lazy_source)
+                    text = f"Scope configured ({len(changed)} settings changed) - Ready to capture"
+                else:
+                    text = "Scope already configured - nothing sent"
+                self.events.post("status", self.status_label.config, text=text)
+                self.events.call(self.setup_btn.config, state=tk.NORMAL)
             except Exception as e:
-                self.root.after(0, lambda: self.status_label.config(text=f"Setup error: {str(e)}"))
-                self.root.after(0, lambda: self.setup_btn.config(state=tk.NORMAL))
+                self.configurator.invalidate()  # partial apply: resend everything next time
+                self.events.post("status", self.status_label.config, text=f"Setup error: {e}")
+                self.events.call(self.setup_btn.config, state=tk.NORMAL)
         
         self.setup_btn.config(state=tk.DISABLED)
         thread = threading.Thread(target=setup, daemon=True)
@@ -358,58 +442,563 @@ class ScopeSetupAndViewerGUI:
         """Trigger single acquisition on scope"""
         def capture():
             try:
-                self.root.after(0, lambda: self.status_label.config(text="Triggering :SINGle acquisition..."))
+                self.events.post("status", self.status_label.config, text="Triggering :SINGle acquisition...")
+                self._invalidate_cache()
+                self.events.call(self._drop_lazy_source)
                 trigger_single_acquisition(self.visa_resource)
-                self.root.after(0, lambda: self.status_label.config(text="Acquisition triggered - waiting for trigger event"))
+                self.events.post("status", self.status_label.config, text="Acquisition triggered - waiting for trigger event")
             except Exception as e:
-                self.root.after(0, lambda: self.status_label.config(text=f"Capture error: {str(e)}"))
-                self.root.after(0, lambda: self.capture_btn.config(state=tk.NORMAL))
+                self.events.post("status", self.status_label.config, text=f"Capture error: {e}")
+                self.events.call(self.capture_btn.config, state=tk.NORMAL)
                 return
-            self.root.after(0, lambda: self.capture_btn.config(state=tk.NORMAL))
+            self.events.call(self.capture_btn.config, state=tk.NORMAL)
         
         self.capture_btn.config(state=tk.DISABLED)
         thread = threading.Thread(target=capture, daemon=True)
         thread.start()
     
+    def _acquisition_key(self, identity):
+        """
+        Identity of the acquisition currently held in scope memory. The
+        generation covers changes made here; identity (segment count and
+        last time tag, read from the scope) covers captures made elsewhere.
+        """
+        return (self.visa_resource, "CHANnel1", self.acq_generation, identity)
+    
+    def _invalidate_cache(self):
+        """Scope memory changed (:SINGle, reconfigure or reconnect); safe from workers"""
+        self.acq_generation += 1
+        self.segment_cache.invalidate()
+    
+    def _drop_lazy_source(self):
+        """Release an on-demand source for an acquisition that is gone (Tk thread)"""
+        if not isinstance(self.segments, LazySegmentSource):
+            return
+        self.segments.close()
+        self.segments = []
+        self._lazy_pending = None
+        self.is_playing = False
+        self.play_btn.config(text="▶ Play")
+        self.seg_slider.config(to=0)
+        self._set_button_state(tk.DISABLED)
+    
+    def browse_all_segments(self):
+        """Browse every captured segment, fetching on demand with read-ahead"""
+        def open_source():
+            try:
+                self.events.post("status", self.status_label.config, text="Opening segment session...")
+                session = ScopeSegmentSession(self.visa_resource, source="CHANnel1",
+                                              tuner=self.transfer_tuner)
+                key = self._acquisition_key(session.identity)
+                self.segment_cache.set_total(key, session.total_segments)
+                source = LazySegmentSource(session.fetch, session.total_segments,
+                                           self.segment_cache, key, on_close=session.close,
+                                           on_ready=lambda: self.events.post("segment_ready",
+                                                                             self._segment_ready))
+                source.set_playback_rate(1000.0 / self.play_speed)
+                self.events.call(self._data_loaded, source, session.total_segments)
+            except Exception as e:
+                self.events.call(self._load_error, str(e))
+        
+        self.browse_btn.config(state=tk.DISABLED)
+        self._set_button_state(tk.DISABLED)
+        thread = threading.Thread(target=open_source, daemon=True)
+        thread.start()
+    
     def collect_segments(self):
-        """Collect segments from scope in background thread"""
+        """Collect segments from scope in background thread, reusing cached ones"""
+        start = self.start_seg_var.get()  # Tk variables are read on the Tk thread
+        count = self.count_var.get()
+        
         def collect():
+            session = None
             try:
-                start = self.start_seg_var.get()
-                count = self.count_var.get()
-                self.root.after(0, lambda: self.status_label.config(
-                    text=f"Downloading segments {start} to {start+count-1}..."
-                ))
+                # One session gives the cache key, the segment count and the
+                # record length, and then downloads whatever is missing
+                session = ScopeSegmentSession(self.visa_resource, source="CHANnel1",
+                                              tuner=self.transfer_tuner)
+                key = self._acquisition_key(session.identity)
+                total = session.total_segments
+                self.segment_cache.set_total(key, total)
+                end = min(start + count - 1, total)
                 
-                segs, total = extract_segments_mode_a(
-                    self.visa_resource, 
-                    source="CHANnel1",
-                    start_segment=start,
-                    num_segments=count
-                )
-                self.root.after(0, lambda: self._data_loaded(segs, total))
+                found = {}
+                missing = []
+                for i in range(start, end + 1):
+                    seg = self.segment_cache.get(key, i)
+                    if seg is None:
+                        missing.append(i)
+                    else:
+                        found[i] = seg
+                
+                if missing:
+                    plan = plan_download(len(missing), session.points, container="segment_list_and_set")
+                    if plan["strategy"] != "memory":
+                        # Too large to hold: browse on demand instead (bounded cache + read-ahead)
+                        self.events.call(self._collect_as_browse, plan)
+                        return
+                if missing:
+                    self.events.post("status", self.status_label.config,
+                                     text=f"Downloading {len(missing)} of {end - start + 1} segments "
+                                          f"({start} to {end})...")
+
+                    def progress(done, n):
+                        # Per-segment updates coalesce to one label change per bus tick
+                        self.events.post("status", self.status_label.config,
+                                         text=f"Downloading segment {done} of {n} ({start} to {end})...")
+
+                    for seg in session.fetch(missing, progress=progress):
+                        self.segment_cache.put(key, seg)
+                        found[seg["index"]] = seg
+                
+                segs = [found[i] for i in range(start, end + 1) if i in found]
+                self.events.call(self._data_loaded, segs, total)
             except Exception as e:
-                self.root.after(0, lambda: self._load_error(str(e)))
+                self.events.call(self._load_error, str(e))
+            finally:
+                if session is not None:
+                    session.close()
         
         self.collect_btn.config(state=tk.DISABLED)
         self._set_button_state(tk.DISABLED)
         thread = threading.Thread(target=collect, daemon=True)
         thread.start()
     
+    def _collect_as_browse(self, plan):
+        self.collect_btn.config(state=tk.NORMAL)
+        self.browse_all_segments()
+        self.status_label.config(text=f"{plan['segments']} segments need "
+                                      f"~{plan['footprint_bytes'] / 1e6:.0f} MB "
+                                      f"({plan['reason']}); browsing on demand instead...")
+    
     def _data_loaded(self, segments, total_available):
         """Called when data is loaded"""
+        if isinstance(self.segments, LazySegmentSource) and self.segments is not segments:
+            self.segments.close()
         self.segments = segments
+        self.seg_slider.config(to=max(len(segments) - 1, 0))
+        self.browse_btn.config(state=tk.NORMAL)
         self.total_segments_available = total_available
-        self.status_label.config(text=f"Loaded {len(self.segments)} segments")
+        if isinstance(segments, LazySegmentSource):
+            self.status_label.config(text=f"Browsing {len(self.segments)} segments on demand")
+        else:
+            self.status_label.config(text=f"Loaded {len(self.segments)} segments")
         self.seg_info_label.config(text=f"(Total available on scope: {total_available})")
         self.collect_btn.config(state=tk.NORMAL)
         self._set_button_state(tk.NORMAL)
+        self._set_navigation(None)
+        if isinstance(segments, LazySegmentSource):
+            self.segment_set = None
+        else:
+            self.segment_set = SegmentSet.from_segments(segments)
+        self._update_ttag_index()
+        self._reset_analysis()
         self.plot_segment(0)
+        self._build_overview()
+        if self.filter_name != "None" and self.segment_set is not None:
+            self.select_filter()
+    
+    def _update_ttag_index(self):
+        """Rebuild time-tag analytics for a downloaded segment list"""
+        state = tk.DISABLED
+        if self.segment_set is None or len(self.segment_set) < 2:
+            self.ttag_index = None
+            self.ttag_stats_label.config(text="")
+        else:
+            self.ttag_index = self.segment_set.time_index()
+            stats = self.ttag_index.dead_time_stats()
+            self.ttag_stats_label.config(
+                text=f"Rate: {stats['trigger_rate_hz']:.4g} Hz | "
+                     f"Median Δt: {stats['median_interval_s']*1e6:.3f} µs | "
+                     f"Gaps: {stats['gap_count']} | "
+                     f"Dead time: {stats['dead_time_s']*1e6:.3f} µs "
+                     f"(live {stats['live_fraction']*100:.1f}%)"
+            )
+            state = tk.NORMAL
+        self.ttag_window_btn.config(state=state)
+        self.ttag_anomaly_btn.config(state=state)
+    
+    def _build_overview(self):
+        """Render the decimated overview of the loaded segments in background thread"""
+        self.overview = None
+        segment_set = self.segment_set
+        if segment_set is None or len(segment_set) < 2:
+            if self.ov_fig is not None:
+                self.ov_ax.clear()
+                self.ov_ax.set_axis_off()
+                self.ov_marker = None
+                self.ov_canvas.draw_idle()
+            return
+        
+        def build():
+            try:
+                overview = SegmentOverview(segment_set.y)
+                self.events.call(self._plot_overview, segment_set, overview)
+            except Exception as e:
+                self.events.post("status", self.status_label.config, text=f"Overview error: {e}")
+        
+        thread = threading.Thread(target=build, daemon=True)
+        thread.start()
+    
+    def _plot_overview(self, segment_set, overview):
+        if segment_set is not self.segment_set:
+            return  # data was replaced while rendering
+        self.overview = overview
+        self._ensure_overview_figure()
+        t = segment_set.t_s * 1e9
+        self.ov_ax.clear()
+        self.ov_ax.set_axis_on()
+        self.ov_ax.imshow(overview.image, aspect="auto", origin="lower", interpolation="nearest",
+                          extent=overview.extent(t[0], t[-1]), cmap="viridis")
+        self.ov_ax.set_xlabel("Segment position (click to jump)", fontsize=9)
+        self.ov_ax.set_ylabel("ns", fontsize=9)
+        self.ov_ax.tick_params(labelsize=8)
+        self.ov_marker = self.ov_ax.axvline(self.current_index, color="red", linewidth=1)
+        self.ov_canvas.draw_idle()
+    
+    def _on_overview_click(self, event):
+        if self.overview is None or event.inaxes is not self.ov_ax or event.xdata is None:
+            return
+        self.plot_segment(self.overview.position_at(event.xdata))
+    
+    def _set_navigation(self, positions, label=""):
+        """Restrict First/Prev/Next/Last/Play to a subset of segment positions"""
+        if positions is None:
+            self.nav_positions = None
+            self.show_all_btn.config(state=tk.DISABLED)
+        else:
+            self.nav_positions = np.unique(np.asarray(positions, dtype=np.int64))
+            self.show_all_btn.config(state=tk.NORMAL)
+        self.nav_label = label
+    
+    def _nav_step(self, direction):
+        """Next position in the active navigation set, or None at the end"""
+        if self.nav_positions is None:
+            target = self.current_index + direction
+            return target if 0 <= target < len(self.segments) else None
+        nav = self.nav_positions
+        if direction > 0:
+            k = np.searchsorted(nav, self.current_index, side="right")
+            return int(nav[k]) if k < len(nav) else None
+        k = np.searchsorted(nav, self.current_index, side="left") - 1
+        return int(nav[k]) if k >= 0 else None
+    
+    def _show_subset(self, positions, label):
+        if len(positions) == 0:
+            self.status_label.config(text=f"No segments: {label}")
+            return
+        self._set_navigation(positions, label)
+        self.status_label.config(text=f"Showing {len(self.nav_positions)} segments: {label}")
+        self.plot_segment(int(self.nav_positions[0]))
+    
+    def show_time_window(self):
+        """Navigate only segments whose time tag lies in the window"""
+        if self.ttag_index is None:
+            return
+        t_from = self.ttag_from_var.get() * 1e-6
+        t_to = self.ttag_to_var.get() * 1e-6
+        positions = self.ttag_index.range_query(t_from, t_to)
+        self.outliers_only_var.set(False)
+        self._show_subset(positions, f"time tags {t_from*1e6:g}-{t_to*1e6:g} µs")
+    
+    def show_anomalous_intervals(self):
+        """Navigate only segments that follow an anomalous trigger interval"""
+        if self.ttag_index is None:
+            return
+        self.outliers_only_var.set(False)
+        self._show_subset(self.ttag_index.anomalous_intervals(), "anomalous trigger intervals")
+    
+    def _reset_analysis(self):
+        """Clear per-dataset analysis results"""
+        self.outlier_positions = None
+        self.outliers_only_var.set(False)
+        self.outliers_only_chk.config(state=tk.DISABLED)
+        self.analysis_label.config(text="")
+        state = tk.NORMAL if self.segment_set is not None and len(self.segment_set) > 2 else tk.DISABLED
+        self.triage_btn.config(state=state)
+        self.average_btn.config(state=state)
+        self.spectrum_btn.config(state=state)
+        self.pha_btn.config(state=state)
+        self.timing_btn.config(state=state)
+    
+    def find_outliers(self):
+        """Score all loaded segments against a robust template in background thread"""
+        segment_set = self.segment_set
+        metric = self.metric_var.get()
+        
+        def triage():
+            try:
+                result = triage_segments(segment_set.y, metric=metric)
+                self.events.call(self._outliers_found, segment_set, result)
+            except Exception as e:
+                self.events.post("analysis", self.analysis_label.config, text=f"Triage error: {e}")
+                self.events.call(self.triage_btn.config, state=tk.NORMAL)
+        
+        self.triage_btn.config(state=tk.DISABLED)
+        self.analysis_label.config(text=f"Scoring {len(segment_set)} segments ({metric})...")
+        thread = threading.Thread(target=triage, daemon=True)
+        thread.start()
+    
+    def _outliers_found(self, segment_set, result):
+        self.triage_btn.config(state=tk.NORMAL)
+        if segment_set is not self.segment_set:
+            return  # data was replaced while scoring
+        self.outlier_positions = result["outliers"]
+        ranked = ", ".join(str(int(segment_set.indices[p])) for p in self.outlier_positions[:5])
+        self.analysis_label.config(
+            text=f"{len(self.outlier_positions)} outliers of {len(segment_set)}"
+                 + (f" | worst: {ranked}" if ranked else "")
+        )
+        self.outliers_only_chk.config(state=tk.NORMAL if len(self.outlier_positions) else tk.DISABLED)
+        if self.outliers_only_var.get():
+            self.toggle_outliers_only()
+    
+    def compute_coherent_average(self):
+        """Align all loaded segments with FFT cross-correlation and average them"""
+        segment_set = self.segment_set
+        
+        def average():
+            try:
+                result = coherent_average(segment_set.y)
+                self.events.call(self._plot_average, segment_set, result)
+            except Exception as e:
+                self.events.post("analysis", self.analysis_label.config, text=f"Averaging error: {e}")
+            self.events.call(self.average_btn.config, state=tk.NORMAL)
+        
+        self.average_btn.config(state=tk.DISABLED)
+        self.analysis_label.config(text=f"Aligning {len(segment_set)} segments...")
+        thread = threading.Thread(target=average, daemon=True)
+        thread.start()
+    
+    def _plot_average(self, segment_set, result):
+        """Show aligned and naive averages (navigating redraws single segments)"""
+        if segment_set is not self.segment_set:
+            return  # data was replaced while averaging
+        t_ns = segment_set.t_s * 1e9
+        delays_ns = result["delays"] * segment_set.xincr * 1e9
+        self._ensure_figure()
+        self.ax.clear()
+        self.ax.plot(t_ns, result["naive_average"], linewidth=1, linestyle="--",
+                     color="gray", label="Naive average")
+        self.ax.plot(t_ns, result["average"], linewidth=1.5, label="Coherent average")
+        self.ax.set_xlabel('Time (ns)', fontsize=12)
+        self.ax.set_ylabel('ADC Value (raw)', fontsize=12)
+        self.ax.set_title(f"Coherent average of {result['count']} segments | "
+                          f"jitter (std): {np.std(delays_ns)*1e3:.1f} ps",
+                          fontsize=14, fontweight='bold')
+        self.ax.grid(True, alpha=0.3)
+        self.ax.legend(loc="upper right")
+        self.analysis_label.config(
+            text=f"Delay range {delays_ns.min()*1e3:.1f} to {delays_ns.max()*1e3:.1f} ps"
+        )
+        self.canvas.draw()
+    
+    def compute_spectrum(self):
+        """Windowed rFFT of every loaded segment, accumulated in chunks"""
+        segment_set = self.segment_set
+        
+        def spectrum():
+            try:
+                acc = compute_spectra(segment_set.y, segment_set.xincr)
+                self.events.call(self._plot_spectrum, segment_set, acc)
+            except Exception as e:
+                self.events.post("analysis", self.analysis_label.config, text=f"Spectrum error: {e}")
+            self.events.call(self.spectrum_btn.config, state=tk.NORMAL)
+        
+        self.spectrum_btn.config(state=tk.DISABLED)
+        self.analysis_label.config(text=f"Computing spectra of {len(segment_set)} segments...")
+        thread = threading.Thread(target=spectrum, daemon=True)
+        thread.start()
+    
+    def _plot_spectrum(self, segment_set, acc):
+        if segment_set is not self.segment_set:
+            return  # data was replaced while computing spectra
+        f_ghz = acc.freqs * 1e-9
+        self._ensure_spectrum_figure()
+        self.spec_ax.clear()
+        self.spec_ax.plot(f_ghz, to_db(acc.average), linewidth=1, label="Average")
+        self.spec_ax.plot(f_ghz, to_db(acc.max_hold), linewidth=1, alpha=0.7, label="Max hold")
+        self.spec_ax.set_xlabel('Frequency (GHz)', fontsize=12)
+        self.spec_ax.set_ylabel('Magnitude (dB ADC)', fontsize=12)
+        self.spec_ax.set_title(f"Spectrum of {acc.count} segments", fontsize=14, fontweight='bold')
+        self.spec_ax.grid(True, alpha=0.3)
+        self.spec_ax.legend(loc="upper right")
+        
+        self.sgram_ax.clear()
+        first, last = segment_set.indices[0], segment_set.indices[-1]
+        self.sgram_ax.imshow(to_db(acc.spectrogram()), aspect="auto", origin="lower",
+                             extent=(f_ghz[0], f_ghz[-1], first, last + 1),
+                             interpolation="nearest", cmap="viridis")
+        self.sgram_ax.set_xlabel('Frequency (GHz)', fontsize=12)
+        self.sgram_ax.set_ylabel('Segment', fontsize=12)
+        self.sgram_ax.set_title("Spectrogram over segments", fontsize=14, fontweight='bold')
+        
+        self.spec_fig.tight_layout()
+        self.spec_canvas.draw()
+        self.analysis_label.config(text=f"Spectrum: {acc.count} segments, {len(acc.freqs)} bins")
+        self.plot_tabs.select(self.spectrum_tab)
+    
+    def compute_pulse_heights(self):
+        """Baseline, height, charge and pile-up of every loaded segment, histogrammed in chunks"""
+        segment_set = self.segment_set
+        
+        def pulse_heights():
+            try:
+                pha = pulse_height_spectrum(segment_set.y, segment_set.xincr, bins=512)
+                self.events.call(self._plot_pulse_heights, segment_set, pha)
+            except Exception as e:
+                self.events.post("analysis", self.analysis_label.config, text=f"Pulse height error: {e}")
+            self.events.call(self.pha_btn.config, state=tk.NORMAL)
+        
+        self.pha_btn.config(state=tk.DISABLED)
+        self.analysis_label.config(text=f"Measuring pulses in {len(segment_set)} segments...")
+        thread = threading.Thread(target=pulse_heights, daemon=True)
+        thread.start()
+    
+    def _plot_pulse_heights(self, segment_set, pha):
+        if segment_set is not self.segment_set:
+            return  # data was replaced while measuring
+        centres, counts = pha.spectrum()
+        results = pha.results()
+        accepted = ~results["pileup"]
+        self._ensure_pha_figure()
+        self.pha_ax.clear()
+        self.pha_ax.step(centres, counts, where="mid", linewidth=1)
+        self.pha_ax.set_xlabel('Pulse height (ADC)', fontsize=12)
+        self.pha_ax.set_ylabel('Counts', fontsize=12)
+        self.pha_ax.set_title(f"Pulse-height spectrum ({pha.accepted} pulses)", fontsize=14, fontweight='bold')
+        self.pha_ax.grid(True, alpha=0.3)
+        
+        self.charge_ax.clear()
+        self.charge_ax.plot(results["height"][accepted], results["charge"][accepted] * 1e9,
+                            ",", alpha=0.5, label="Accepted")
+        self.charge_ax.plot(results["height"][~accepted], results["charge"][~accepted] * 1e9,
+                            ",", color="red", label="Pile-up")
+        self.charge_ax.set_xlabel('Pulse height (ADC)', fontsize=12)
+        self.charge_ax.set_ylabel('Charge (ADC x ns)', fontsize=12)
+        self.charge_ax.set_title("Height vs charge", fontsize=14, fontweight='bold')
+        self.charge_ax.grid(True, alpha=0.3)
+        self.charge_ax.legend(loc="upper left", markerscale=20)
+        
+        self.pha_fig.tight_layout()
+        self.pha_canvas.draw()
+        peak = pha.resolution()
+        self.analysis_label.config(
+            text=f"{pha.pileup_count} pile-up of {pha.count} | baseline {pha.baseline_stats.mean:.1f} ADC"
+                 + (f" | main peak {peak[0]:.0f} ADC, FWHM {peak[1] * 100:.1f}%" if peak else "")
+        )
+        self.plot_tabs.select(self.pha_tab)
+    
+    def compute_edge_timing(self):
+        """50% constant-fraction edge time of every loaded segment (cubic interpolation)"""
+        segment_set = self.segment_set
+        
+        def timing():
+            try:
+                t_edge = crossing_times(segment_set.y, segment_set.xincr, segment_set.t0, interp="cubic")
+                self.events.call(self._show_edge_timing, segment_set, t_edge)
+            except Exception as e:
+                self.events.post("analysis", self.analysis_label.config, text=f"Timing error: {e}")
+            self.events.call(self.timing_btn.config, state=tk.NORMAL)
+        
+        self.timing_btn.config(state=tk.DISABLED)
+        self.analysis_label.config(text=f"Timing edges in {len(segment_set)} segments...")
+        thread = threading.Thread(target=timing, daemon=True)
+        thread.start()
+    
+    def _show_edge_timing(self, segment_set, t_edge):
+        if segment_set is not self.segment_set:
+            return
+        # Event times are time tag + t_edge; the spread of t_edge is the
+        # edge jitter relative to the trigger
+        valid = t_edge[np.isfinite(t_edge)]
+        if len(valid) == 0:
+            self.analysis_label.config(text="Edge timing: no crossings found")
+            return
+        self.analysis_label.config(
+            text=f"Edge timing (CFD 50%): {len(valid)}/{len(t_edge)} edges | "
+                 f"mean {valid.mean() * 1e9:.3f} ns | jitter (std) {valid.std() * 1e12:.2f} ps"
+        )
+    
+    def _current_filter(self, xincr):
+        """Filter for the selected preset at this sample interval (None for no filter)"""
+        if self.filter_name == "None":
+            return None
+        if self._filter is None or self._filter[0] != (self.filter_name, xincr):
+            self._filter = ((self.filter_name, xincr), make_preset(self.filter_name, xincr))
+        return self._filter[1]
+    
+    def _zero_phase(self):
+        """Whether the selected preset is applied forward and backward (else causally)"""
+        return preset_zero_phase(self.filter_name)
+    
+    def select_filter(self):
+        """Filter every loaded segment once in background thread; plots use the cached view"""
+        self.filter_name = self.filter_var.get()
+        segment_set = self.segment_set
+        try:
+            filt = self._current_filter(segment_set.xincr) if segment_set is not None else None
+        except ValueError as e:
+            self.analysis_label.config(text=f"Filter error: {e}")
+            self.filter_var.set("None")
+            self.filter_name = "None"
+            filt = None
+        if filt is None or segment_set.cached_filtered(filt, zero_phase=self._zero_phase()) is not None:
+            self.plot_segment(self.current_index)
+            return
+        
+        zero_phase = self._zero_phase()
+        
+        def apply_filter():
+            try:
+                segment_set.filtered(filt, zero_phase=zero_phase)
+                self.events.call(self._filter_ready, segment_set, filt)
+            except Exception as e:
+                self.events.post("analysis", self.analysis_label.config, text=f"Filter error: {e}")
+        
+        self.analysis_label.config(text=f"Filtering {len(segment_set)} segments ({filt.name})...")
+        self.plot_segment(self.current_index)
+        thread = threading.Thread(target=apply_filter, daemon=True)
+        thread.start()
+    
+    def _filter_ready(self, segment_set, filt):
+        if segment_set is self.segment_set:
+            self.analysis_label.config(text=f"Filtered {len(segment_set)} segments ({filt.name})")
+            self.plot_segment(self.current_index)
+    
+    def _filtered_row(self, index, seg):
+        """Filtered samples of one segment: cached view if ready, else just this row"""
+        t = seg['t_s']
+        try:
+            filt = self._current_filter(float(t[1] - t[0]) if len(t) > 1 else 1.0)
+        except ValueError:
+            return None
+        if filt is None:
+            return None
+        if self.segment_set is not None:
+            view = self.segment_set.cached_filtered(filt, zero_phase=self._zero_phase())
+            if view is not None:
+                return view[index]
+        return filt.apply(seg['y_raw'][None, :], zero_phase=self._zero_phase())[0]
+    
+    def toggle_outliers_only(self):
+        if self.outliers_only_var.get() and self.outlier_positions is not None:
+            self._show_subset(self.outlier_positions, "outliers")
+        else:
+            self.show_all_segments()
+    
+    def show_all_segments(self):
+        self.outliers_only_var.set(False)
+        self._set_navigation(None)
+        self.status_label.config(text=f"Showing all {len(self.segments)} segments")
+        self.plot_segment(self.current_index)
     
     def _load_error(self, error_msg):
         """Called when loading fails"""
         self.status_label.config(text=f"Error: {error_msg}")
         self.collect_btn.config(state=tk.NORMAL)
+        self.browse_btn.config(state=tk.NORMAL)
+        self._ensure_figure()
         self.ax.clear()
         self.ax.text(0.5, 0.5, f"Failed to load data:\n{error_msg}", 
                     ha='center', va='center', transform=self.ax.transAxes, fontsize=12)
@@ -422,9 +1011,21 @@ class ScopeSetupAndViewerGUI:
         
         self.current_index = index
         seg = self.segments[index]
+        self.slider_var.set(index)
+        if seg is None:
+            self._show_pending(index)
+            return
+        self._lazy_pending = None
+        self._ensure_figure()
         
         self.ax.clear()
-        self.ax.plot(seg['t_s'] * 1e9, seg['y_raw'], linewidth=1)
+        filtered = self._filtered_row(index, seg)
+        if filtered is None:
+            self.ax.plot(seg['t_s'] * 1e9, seg['y_raw'], linewidth=1)
+        else:
+            self.ax.plot(seg['t_s'] * 1e9, seg['y_raw'], linewidth=1, color="lightgray", label="Raw")
+            self.ax.plot(seg['t_s'] * 1e9, filtered, linewidth=1.2, label=self._filter[1].name)
+            self.ax.legend(loc="upper right")
         
         self.ax.set_xlabel('Time (ns)', fontsize=12)
         self.ax.set_ylabel('ADC Value (raw)', fontsize=12)
@@ -432,25 +1033,68 @@ class ScopeSetupAndViewerGUI:
                          fontsize=14, fontweight='bold')
         self.ax.grid(True, alpha=0.3)
         
+        subset = ""
+        if self.nav_positions is not None:
+            k = int(np.searchsorted(self.nav_positions, index)) + 1
+            subset = f" | {self.nav_label} {k}/{len(self.nav_positions)}"
         self.info_label.config(
-            text=f"Segment {index + 1}/{len(self.segments)} | Points: {len(seg['y_raw'])}"
+            text=f"Segment {index + 1}/{len(self.segments)} | Points: {len(seg['y_raw'])}{subset}"
         )
         
         self.canvas.draw()
+        if self.ov_marker is not None and self.overview is not None:
+            self.ov_marker.set_xdata([index, index])
+            self.ov_canvas.draw_idle()
+    
+    def _show_pending(self, index):
+        """On-demand segment not fetched yet: keep the last plot, redraw when it arrives"""
+        self._lazy_pending = index
+        error = self.segments.last_error
+        state = f"fetch failed, retrying ({error})" if error else "fetching..."
+        self.info_label.config(text=f"Segment {index + 1}/{len(self.segments)} | {state}")
+    
+    def _segment_ready(self):
+        """A read-ahead fetch finished (posted by the source's on_ready)"""
+        if self._lazy_pending is None or not isinstance(self.segments, LazySegmentSource):
+            return
+        if self.segments.is_cached(self._lazy_pending):
+            self.plot_segment(self._lazy_pending)
+        else:
+            self._show_pending(self._lazy_pending)
+    
+    def _on_slider(self, value):
+        """Coalesce slider drags into one redraw per idle cycle"""
+        index = int(round(float(value)))
+        if self._slider_pending is None:
+            self._slider_pending = self.root.after_idle(self._apply_slider)
+        self._slider_target = index
+    
+    def _apply_slider(self):
+        self._slider_pending = None
+        if self._slider_target != self.current_index:
+            self.plot_segment(self._slider_target)
     
     def first_segment(self):
-        self.plot_segment(0)
+        if self.nav_positions is not None:
+            self.plot_segment(int(self.nav_positions[0]))
+        else:
+            self.plot_segment(0)
     
     def last_segment(self):
-        self.plot_segment(len(self.segments) - 1)
+        if self.nav_positions is not None:
+            self.plot_segment(int(self.nav_positions[-1]))
+        else:
+            self.plot_segment(len(self.segments) - 1)
     
     def prev_segment(self):
-        if self.current_index > 0:
-            self.plot_segment(self.current_index - 1)
+        target = self._nav_step(-1)
+        if target is not None:
+            self.plot_segment(target)
     
     def next_segment(self):
-        if self.current_index < len(self.segments) - 1:
-            self.plot_segment(self.current_index + 1)
+        target = self._nav_step(1)
+        if target is not None:
+            self.plot_segment(target)
     
     def toggle_play(self):
         self.is_playing = not self.is_playing
@@ -463,8 +1107,12 @@ class ScopeSetupAndViewerGUI:
     def _play_next(self):
         if not self.is_playing:
             return
+        if self._lazy_pending is not None:
+            # Hold the frame until the on-demand segment arrives
+            self.root.after(self.play_speed, self._play_next)
+            return
         
-        if self.current_index < len(self.segments) - 1:
+        if self._nav_step(1) is not None:
             self.next_segment()
             self.root.after(self.play_speed, self._play_next)
         else:
@@ -473,6 +1121,8 @@ class ScopeSetupAndViewerGUI:
     
     def update_speed(self):
         self.play_speed = self.speed_var.get()
+        if isinstance(self.segments, LazySegmentSource):
+            self.segments.set_playback_rate(1000.0 / self.play_speed)
 
 
 def main():
@@ -0,0 +1,376 @@
+"""
+Compressed segment archive (.segz) for segmented int16 captures.
+
+Segments are stored in chunked blocks of `chunk_segments` rows. Each block is
+delta-encoded along the time axis, byte-shuffled and compressed with stdlib
+zlib or lzma. A chunk index at the end of the file lets a reader decompress
+only the block that holds the requested segment.
+
+File layout:
+    header   MAGIC, u32 json length, json (codec, xincr, t0, metadata)
+    chunks   CHNK, u32 first segment, u32 rows, u32 points, u32 payload len,
+             float64 time tags[rows], compressed payload
+    index    INDX, u32 entries, (u64 offset, u32 first segment, u32 rows)...
+    trailer  u64 index offset, TRAILER_MAGIC
+
+Every chunk is self-describing, so an archive whose index was never written
+(e.g. the process was killed) can still be opened by scanning the chunks.
+"""
+
+import json
+import lzma
+import os
+import struct
+import zlib
+
+import numpy as np
+
+
+MAGIC = b"SEGARC1\0"
+TRAILER_MAGIC = b"SEGAIDX\0"
+CHUNK_MAGIC = b"CHNK"
+INDEX_MAGIC = b"INDX"
+
+_CHUNK_HEADER = struct.Struct("<4sIIII")
+_INDEX_ENTRY = struct.Struct("<QII")
+_TRAILER = struct.Struct("<Q8s")
+
+CODECS = ("zlib", "lzma")
+
+
+def _encode_block(y: np.ndarray, codec: str, level: int) -> bytes:
+    """Delta-encode rows, shuffle low/high bytes and compress."""
+    y = np.ascontiguousarray(y, dtype="<i2")
+    delta = np.diff(y, axis=1, prepend=np.zeros((y.shape[0], 1), dtype="<i2"))
+    # Byte shuffle: all low bytes then all high bytes compress much better
+    shuffled = delta.view(np.uint8).reshape(-1, 2).T.tobytes()
+    if codec == "zlib":
+        return zlib.compress(shuffled, level)
+    return lzma.compress(shuffled, preset=level)
+
+
+def _decode_block(payload: bytes, codec: str, rows: int, points: int) -> np.ndarray:
+    raw = zlib.decompress(payload) if codec == "zlib" else lzma.decompress(payload)
+    planes = np.frombuffer(raw, dtype=np.uint8).reshape(2, -1)
+    delta = np.ascontiguousarray(planes.T).view("<i2").reshape(rows, points)
+    # int16 cumsum wraps exactly like the int16 diff did, so this is lossless
+    return np.cumsum(delta, axis=1, dtype=np.int16)
+
+
+class SegmentArchiveWriter:
+    """
+    Write segments to a .segz archive.
+
+    Rows are buffered until a chunk is full, then compressed and appended.
+    Use as a context manager or call close() to write the chunk index.
+
+    With append=True an existing archive is reopened for writing: its header
+    (codec, xincr, metadata) is kept, the old index and any truncated final
+    chunk are cut off and new chunks continue after the last complete one.
+    Every flush() is therefore a checkpoint that survives a crash.
+    """
+
+    def __init__(self, path, xincr: float = 1.0, codec: str = "zlib", level: int = None,
+                 chunk_segments: int = 256, metadata: dict = None, append: bool = False,
+                 t0: float = 0.0):
+        if append and os.path.exists(path):
+            self._reopen(path, level)
+            return
+        if codec not in CODECS:
+            raise ValueError(f"Unknown codec {codec!r}, expected one of {CODECS}")
+        self.path = path
+        self.codec = codec
+        # zlib level 1 / lzma preset 0 keep up with the VISA download rate
+        self.level = level if level is not None else (1 if codec == "zlib" else 0)
+        self.chunk_segments = int(chunk_segments)
+        self.xincr = float(xincr)
+        self.t0 = float(t0)  # time of the first stored sample (window start)
+        self.metadata = dict(metadata or {})
+        self._index = []
+        self._pending_y = []
+        self._pending_ttag = []
+        self._pending_first = None
+        self._next_index = None
+        self._last_ttag = None
+
+        self._fh = open(path, "wb")
+        header = json.dumps({
+            "codec": self.codec,
+            "xincr": self.xincr,
+            "t0": self.t0,
+            "chunk_segments": self.chunk_segments,
+            "metadata": self.metadata,
+        }).encode("utf-8")
+        self._fh.write(MAGIC)
+        self._fh.write(struct.pack("<I", len(header)))
+        self._fh.write(header)
+
+    def _reopen(self, path, level):
+        with SegmentArchiveReader(path) as reader:
+            chunks = reader._chunks
+            data_start = reader._data_start
+            self.codec = reader.codec
+            self.xincr = reader.xincr
+            self.t0 = reader.t0
+            self.chunk_segments = reader.chunk_segments
+            self.metadata = reader.metadata
+            last = max((c["first"] + c["rows"] - 1 for c in chunks), default=None)
+            self._last_ttag = reader.time_tag(last) if last is not None else None
+        self.path = path
+        self.level = level if level is not None else (1 if self.codec == "zlib" else 0)
+        self._index = [(c["offset"], c["first"], c["rows"]) for c in chunks]
+        self._pending_y = []
+        self._pending_ttag = []
+        self._pending_first = None
+        self._next_index = chunks[-1]["first"] + chunks[-1]["rows"] if chunks else None
+
+        end = chunks[-1]["payload_offset"] + chunks[-1]["payload_len"] if chunks else data_start
+        self._fh = open(path, "r+b")
+        self._fh.truncate(end)
+        self._fh.seek(end)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    @property
+    def segments_written(self) -> int:
+        return sum(rows for _, _, rows in self._index) + len(self._pending_y)
+
+    @property
+    def first_segment(self):
+        """Lowest segment index safely on disk (flushed), or None."""
+        if not self._index:
+            return None
+        return min(first for _, first, _ in self._index)
+
+    @property
+    def last_ttag(self):
+        """Time tag of last_segment, or None."""
+        return self._last_ttag
+
+    @property
+    def last_segment(self):
+        """Highest segment index safely on disk (flushed), or None."""
+        if not self._index:
+            return None
+        _, first, rows = max(self._index, key=lambda entry: entry[1] + entry[2])
+        return first + rows - 1
+
+    def append(self, seg_index: int, y: np.ndarray, ttag: float):
+        """Append one segment. Segment indices must be consecutive."""
+        if self._pending_y and len(y) != len(self._pending_y[0]):
+            self.flush()
+        if self._next_index is not None and seg_index != self._next_index:
+            self.flush()
+        if not self._pending_y:
+            self._pending_first = seg_index
+        self._pending_y.append(np.asarray(y, dtype=np.int16))
+        self._pending_ttag.append(float(ttag))
+        self._next_index = seg_index + 1
+        if len(self._pending_y) >= self.chunk_segments:
+            self.flush()
+
+    def append_block(self, first_index: int, y: np.ndarray, ttags):
+        """Append a (n, points) block of consecutive segments."""
+        for row in range(y.shape[0]):
+            self.append(first_index + row, y[row], ttags[row])
+
+    def flush(self):
+        """Compress and write any buffered segments as one chunk."""
+        if not self._pending_y:
+            return
+        y = np.stack(self._pending_y)
+        ttags = np.asarray(self._pending_ttag, dtype="<f8")
+        payload = _encode_block(y, self.codec, self.level)
+
+        offset = self._fh.tell()
+        self._fh.write(_CHUNK_HEADER.pack(CHUNK_MAGIC, self._pending_first, y.shape[0],
+                                          y.shape[1], len(payload)))
+        self._fh.write(ttags.tobytes())
+        self._fh.write(payload)
+        self._fh.flush()
+        if self.last_segment is None or self._pending_first + y.shape[0] - 1 > self.last_segment:
+            self._last_ttag = float(ttags[-1])
+        self._index.append((offset, self._pending_first, y.shape[0]))
+
+        self._pending_y = []
+        self._pending_ttag = []
+        self._pending_first = None
+
+    def close(self):
+        if self._fh is None:
+            return
+        self.flush()
+        index_offset = self._fh.tell()
+        self._fh.write(INDEX_MAGIC)
+        self._fh.write(struct.pack("<I", len(self._index)))
+        for entry in self._index:
+            self._fh.write(_INDEX_ENTRY.pack(*entry))
+        self._fh.write(_TRAILER.pack(index_offset, TRAILER_MAGIC))
+        self._fh.close()
+        self._fh = None
+
+
+class SegmentArchiveReader:
+    """
+    Random-access reader for .segz archives.
+
+    Reading a segment decompresses only the chunk that contains it; the most
+    recently used chunk is kept so sequential access decodes each chunk once.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._fh = open(path, "rb")
+        if self._fh.read(len(MAGIC)) != MAGIC:
+            self._fh.close()
+            raise ValueError(f"{path} is not a segment archive")
+        (hlen,) = struct.unpack("<I", self._fh.read(4))
+        header = json.loads(self._fh.read(hlen).decode("utf-8"))
+        self._data_start = self._fh.tell()
+        self.codec = header["codec"]
+        self.xincr = header["xincr"]
+        self.metadata = header["metadata"]
+        # Archives written before t0 was stored: derive it from the sample window
+        window = self.metadata.get("window")
+        self.t0 = header.get("t0", window[0] * self.xincr if window else 0.0)
+        self.chunk_segments = header["chunk_segments"]
+
+        self._chunks = self._load_index()
+        self._chunk_firsts = np.array([c["first"] for c in self._chunks], dtype=np.int64)
+        self._cached_chunk = None
+        self._cached_y = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def __len__(self):
+        return sum(c["rows"] for c in self._chunks)
+
+    def _read_chunk_header(self, offset):
+        self._fh.seek(offset)
+        raw = self._fh.read(_CHUNK_HEADER.size)
+        if len(raw) < _CHUNK_HEADER.size:
+            return None
+        magic, first, rows, points, plen = _CHUNK_HEADER.unpack(raw)
+        if magic != CHUNK_MAGIC:
+            return None
+        ttag_offset = offset + _CHUNK_HEADER.size
+        return {"offset": offset, "first": first, "rows": rows, "points": points,
+                "payload_len": plen, "ttag_offset": ttag_offset,
+                "payload_offset": ttag_offset + rows * 8}
+
+    def _load_index(self):
+        self._fh.seek(0, 2)
+        size = self._fh.tell()
+        if size >= self._data_start + _TRAILER.size:
+            self._fh.seek(size - _TRAILER.size)
+            index_offset, magic = _TRAILER.unpack(self._fh.read(_TRAILER.size))
+            if magic == TRAILER_MAGIC:
+                self._fh.seek(index_offset)
+                if self._fh.read(4) == INDEX_MAGIC:
+                    (count,) = struct.unpack("<I", self._fh.read(4))
+                    entries = [_INDEX_ENTRY.unpack(self._fh.read(_INDEX_ENTRY.size))
+                               for _ in range(count)]
+                    return [self._read_chunk_header(off) for off, _, _ in entries]
+        return self._scan_chunks(size)
+
+    def _scan_chunks(self, size):
+        """Rebuild the index by walking chunk headers (archive not closed)."""
+        chunks = []
+        offset = self._data_start
+        while offset < size:
+            chunk = self._read_chunk_header(offset)
+            if chunk is None:
+                break
+            end = chunk["payload_offset"] + chunk["payload_len"]
+            if end > size:
+                break  # truncated final chunk
+            chunks.append(chunk)
+            offset = end
+        return chunks
+
+    @property
+    def points(self) -> int:
+        """Samples per segment (0 for an empty archive)."""
+        return self._chunks[0]["points"] if self._chunks else 0
+
+    @property
+    def segment_indices(self) -> np.ndarray:
+        if not self._chunks:
+            return np.empty(0, dtype=np.int64)
+        return np.concatenate([np.arange(c["first"], c["first"] + c["rows"])
+                               for c in self._chunks])
+
+    def time_tags(self) -> np.ndarray:
+        """All time tags, read without decompressing any waveform data."""
+        out = []
+        for c in self._chunks:
+            self._fh.seek(c["ttag_offset"])
+            out.append(np.frombuffer(self._fh.read(c["rows"] * 8), dtype="<f8"))
+        return np.concatenate(out) if out else np.empty(0, dtype=np.float64)
+
+    def _find_chunk(self, seg_index: int) -> int:
+        pos = int(np.searchsorted(self._chunk_firsts, seg_index, side="right")) - 1
+        if pos < 0 or seg_index >= self._chunks[pos]["first"] + self._chunks[pos]["rows"]:
+            raise IndexError(f"Segment {seg_index} not in archive")
+        return pos
+
+    def read_chunk(self, pos: int) -> np.ndarray:
+        if pos != self._cached_chunk:
+            c = self._chunks[pos]
+            self._fh.seek(c["payload_offset"])
+            payload = self._fh.read(c["payload_len"])
+            self._cached_y = _decode_block(payload, self.codec, c["rows"], c["points"])
+            self._cached_chunk = pos
+        return self._cached_y
+
+    def time_tag(self, seg_index: int) -> float:
+        """Time tag of one scope segment index, without decompressing its chunk."""
+        c = self._chunks[self._find_chunk(seg_index)]
+        self._fh.seek(c["ttag_offset"] + (seg_index - c["first"]) * 8)
+        (ttag,) = struct.unpack("<d", self._fh.read(8))
+        return ttag
+
+    def read_segment(self, seg_index: int):
+        """Return (y, ttag) for one scope segment index."""
+        pos = self._find_chunk(seg_index)
+        c = self._chunks[pos]
+        row = seg_index - c["first"]
+        y = self.read_chunk(pos)[row]
+        self._fh.seek(c["ttag_offset"] + row * 8)
+        (ttag,) = struct.unpack("<d", self._fh.read(8))
+        return y, ttag
+
+    def iter_blocks(self):
+        """Yield (first_index, y, ttags) per chunk in file order."""
+        for pos, c in enumerate(self._chunks):
+            self._fh.seek(c["ttag_offset"])
+            ttags = np.frombuffer(self._fh.read(c["rows"] * 8), dtype="<f8")
+            yield c["first"], self.read_chunk(pos), ttags
+
+    def segments(self, start_segment: int, num_segments: int):
+        """Return segments in the same dict form as extract_segments_mode_a."""
+        segments = []
+        t_axes = {}
+        for i in range(start_segment, start_segment + num_segments):
+            try:
+                y, ttag = self.read_segment(i)
+            except IndexError:
+                break
+            t = t_axes.get(len(y))
+            if t is None:
+                t = t_axes[len(y)] = self.t0 + np.arange(len(y)) * self.xincr
+            segments.append({"index": i, "ttag_s": ttag, "t_s": t, "y_raw": y})
+        return segments
+
+    def close(self):
+        if self._fh is not None:
+            self._fh.close()
+            self._fh = None
@@ -0,0 +1,92 @@
+"""
+LRU cache of downloaded segments.
+
+Entries are keyed by (acquisition key, segment index). The acquisition key
+identifies one captured record on the scope, e.g. (resource, source,
+generation, scope identity) where the generation is bumped on every :SINGle
+or reconfigure from this program and the scope identity
+(scope_io.query_acquisition_identity) catches captures made elsewhere, so
+segments from an older acquisition are never served for a new one.
+"""
+
+import threading
+from collections import OrderedDict
+
+
+def segment_nbytes(seg: dict) -> int:
+    """
+    Approximate memory held by one segment dict. The t_s axis is shared by
+    every segment of a download, so only the samples are charged.
+    """
+    return getattr(seg.get("y_raw"), "nbytes", 0) + 64
+
+
+class SegmentCache:
+    """Thread-safe segment cache with a byte-budget LRU eviction policy."""
+
+    def __init__(self, max_bytes: int = 512 * 1024 * 1024):
+        self.max_bytes = int(max_bytes)
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._totals = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, acq_key, seg_index: int):
+        """Return the cached segment dict or None, marking it recently used."""
+        key = (acq_key, seg_index)
+        with self._lock:
+            seg = self._entries.get(key)
+            if seg is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return seg
+
+    def put(self, acq_key, seg: dict):
+        key = (acq_key, seg["index"])
+        nbytes = segment_nbytes(seg)
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.current_bytes -= segment_nbytes(old)
+            self._entries[key] = seg
+            self.current_bytes += nbytes
+            self._evict()
+
+    def _evict(self):
+        # Always keep the most recent entry even if it alone exceeds the budget
+        while self.current_bytes > self.max_bytes and len(self._entries) > 1:
+            _, seg = self._entries.popitem(last=False)
+            self.current_bytes -= segment_nbytes(seg)
+
+    def missing(self, acq_key, indices) -> list:
+        """Return the indices not currently cached for this acquisition."""
+        with self._lock:
+            return [i for i in indices if (acq_key, i) not in self._entries]
+
+    def set_total(self, acq_key, total_segments: int):
+        with self._lock:
+            self._totals[acq_key] = total_segments
+
+    def total(self, acq_key):
+        """Captured segment count reported for this acquisition, if known."""
+        with self._lock:
+            return self._totals.get(acq_key)
+
+    def invalidate(self, acq_key=None):
+        """Drop one acquisition, or everything when acq_key is None."""
+        with self._lock:
+            if acq_key is None:
+                self._entries.clear()
+                self._totals.clear()
+                self.current_bytes = 0
+                return
+            for key in [k for k in self._entries if k[0] == acq_key]:
+                self.current_bytes -= segment_nbytes(self._entries.pop(key))
+            self._totals.pop(acq_key, None)
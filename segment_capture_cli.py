@@ -0,0 +1,330 @@
+"""
+Headless segmented capture from the command line.
+
+Wraps setup_scope_acquisition, trigger_single_acquisition and segment
+extraction for unattended captures on a lab server, writes the segments to
+disk and reports segments/s, MB/s and per-phase timings. Imports neither
+tkinter nor matplotlib so it starts quickly.
+
+Example:
+    python segment_capture_cli.py TCPIP0::192.168.0.2::inst0::INSTR \\
+        --configure --single --count 65536 -o run1.segz
+"""
+
+import argparse
+import os
+import sys
+import time
+from contextlib import contextmanager
+
+import numpy as np
+
+from scope_io import (
+    ScopeSegmentSession,
+    get_instrument_id,
+    setup_scope_acquisition,
+    trigger_single_acquisition,
+)
+from resumable_download import download_segments_resumable
+from scope_configurator import SETTINGS, ScopeConfigurator, configure_scope_incremental, sync_scope
+from capture_catalog import DEFAULT_CATALOG_PATH, CaptureCatalog
+from memory_planner import format_plan, plan_download
+from segment_archive import CODECS
+from transfer_tuning import DEFAULT_CACHE_PATH, TransferTuner
+
+
+class PhaseTimer:
+    """Accumulates wall-clock time per named phase, in first-use order."""
+
+    def __init__(self):
+        self.phases = {}
+
+    def add(self, name: str, seconds: float):
+        self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    @contextmanager
+    def phase(self, name: str):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - t0)
+
+    def report(self, out=sys.stdout):
+        total = sum(self.phases.values())
+        print("Phase timings:", file=out)
+        for name, seconds in self.phases.items():
+            print(f"  {name:<10} {seconds:9.3f} s", file=out)
+        print(f"  {'total':<10} {total:9.3f} s", file=out)
+
+
+def build_parser():
+    p = argparse.ArgumentParser(description="Headless Infiniium segmented capture")
+    p.add_argument("resource", help="VISA resource, e.g. TCPIP0::192.168.0.2::inst0::INSTR")
+    p.add_argument("-o", "--output", help="Output file (.segz archive or .npz)")
+    p.add_argument("--source", default="CHANnel1")
+
+    setup = p.add_argument_group("scope setup (used with --configure)")
+    setup.add_argument("--configure", action="store_true", help="*RST and configure before capture")
+    setup.add_argument("--no-reset", action="store_true",
+                       help="With --configure: skip *RST and send only settings that differ")
+    setup.add_argument("--channel-scale", type=float, default=0.2)
+    setup.add_argument("--timebase-scale", type=float, default=2e-8)
+    setup.add_argument("--trigger-level", type=float, default=0.32)
+    setup.add_argument("--timebase-position", type=float, default=0.0)
+    setup.add_argument("--sample-rate", default="MAX")
+    setup.add_argument("--acquire-points", type=int, default=1500)
+    setup.add_argument("--segment-count", type=int, default=65536)
+
+    acq = p.add_argument_group("acquisition")
+    acq.add_argument("--single", action="store_true", help="Trigger :SINGle and wait for completion")
+    acq.add_argument("--acq-timeout", type=float, default=120.0, help="Seconds to wait for :SINGle")
+    acq.add_argument("--start", type=int, default=1, help="First segment to download")
+    acq.add_argument("--count", type=int, default=None, help="Segments to download (default: all)")
+    acq.add_argument("--window", type=int, nargs=2, metavar=("START", "SIZE"),
+                     help="Download only this sample window of each segment")
+    acq.add_argument("--time-window", type=float, nargs=2, metavar=("T_START", "T_STOP"),
+                     help="Download only this time window (s) of each segment")
+    acq.add_argument("--autotune", action="store_true",
+                     help="Probe VISA chunk sizes on first use and size timeouts from measured bandwidth")
+    acq.add_argument("--tuning-cache", default=DEFAULT_CACHE_PATH,
+                     help="JSON file caching the tuned settings per resource")
+
+    out = p.add_argument_group("output")
+    out.add_argument("--codec", choices=CODECS, default="zlib")
+    out.add_argument("--resume", action="store_true",
+                     help="Continue an existing .segz capture store from its last checkpoint")
+    out.add_argument("--retries", type=int, default=5, help="Retries per transient VISA error")
+    out.add_argument("--batch", type=int, default=256, help="Segments per progress/write batch")
+    out.add_argument("--memory-budget", type=float, default=None, metavar="MB",
+                     help="RAM budget for .npz output (default: half of available memory); "
+                          "larger captures spill to a memory-mapped file next to the output")
+    out.add_argument("--catalog", nargs="?", const=DEFAULT_CATALOG_PATH, default=None, metavar="DB",
+                     help=f"Record the saved capture in a SQLite catalog (default {DEFAULT_CATALOG_PATH})")
+    out.add_argument("--quiet", action="store_true")
+    return p
+
+
+def parse_args(argv=None, parser=None) -> argparse.Namespace:
+    """Parse and cross-check the options; errors exit through argparse."""
+    parser = parser or build_parser()
+    args = parser.parse_args(argv)
+    if args.single and args.resume:
+        # :SINGle replaces the acquisition the checkpoint belongs to
+        parser.error("--single cannot be combined with --resume")
+    if args.resume and not (args.output or "").endswith(".segz"):
+        # Only .segz capture stores have checkpoints to continue from
+        parser.error("--resume needs a .segz output (-o capture.segz)")
+    return args
+
+
+def _save_npz(path, y, ttags, indices, xincr, t0, metadata):
+    np.savez(path, y=y, ttags=np.asarray(ttags), indices=np.asarray(indices),
+             xincr=xincr, t0=t0, idn=metadata.get("idn", ""))
+
+
+def _allocate_rows(args, count: int, points: int, out):
+    """
+    (count, points) int16 buffer for .npz output, placed by the memory
+    planner: a RAM array, or a memory-mapped spill file next to the output.
+    Returns (y, spill_path or None); y is None when the capture only fits
+    streamed into a capture store.
+    """
+    budget = None if args.memory_budget is None else int(args.memory_budget * 1e6)
+    plan = plan_download(count, points, "array", budget_bytes=budget,
+                         spill_dir=os.path.dirname(os.path.abspath(args.output)), batch=args.batch)
+    if not args.quiet:
+        print(format_plan(plan), file=out)
+    if plan["strategy"] == "memory":
+        return np.zeros((count, points), dtype=np.int16), None
+    if plan["strategy"] == "memmap":
+        spill = args.output + ".part.npy"
+        return np.lib.format.open_memmap(spill, mode="w+", dtype=np.int16, shape=(count, points)), spill
+    return None, None
+
+
+def _print_progress(done: int, count: int, elapsed: float, out):
+    print(f"\r  {done}/{count} segments ({done / elapsed if elapsed else 0:.0f} seg/s)",
+          end="", file=out)
+
+
+def _make_tuner(args):
+    return TransferTuner(args.tuning_cache) if args.autotune else None
+
+
+def _download_to_store(args, timer, metadata, out):
+    """Checkpointed, retrying download into a .segz capture store."""
+    if not args.resume and os.path.exists(args.output):
+        os.remove(args.output)
+    printed = []
+
+    def progress(done_index, end_index):
+        printed.append(done_index)
+        if not args.quiet:
+            _print_progress(done_index - args.start + 1, end_index - args.start + 1,
+                            timer.phases.get("download", 0.0), out)
+
+    result = download_segments_resumable(
+        args.resource, args.output, source=args.source, start_segment=args.start,
+        num_segments=args.count, sample_window=args.window, time_window=args.time_window,
+        batch=args.batch, max_retries=args.retries, codec=args.codec, metadata=metadata,
+        progress=progress, timer=timer, tuner=_make_tuner(args), resume=args.resume)
+    if not args.quiet:
+        if printed:
+            print(file=out)
+        if result["resumed_from"] is not None:
+            print(f"Resumed after segment {result['resumed_from']}", file=out)
+        if result["retries"]:
+            print(f"Recovered from {result['retries']} transient errors", file=out)
+    indices = range(result["last_segment"] - result["segments"] + 1, result["last_segment"] + 1)
+    return result["bytes"], indices, result["total_segments"]
+
+
+def _download_in_memory(args, timer, metadata, out):
+    """
+    Plain download, optionally saved as .npz at the end. Returns None
+    without downloading if the .npz would not fit in memory or on disk.
+    """
+    with timer.phase("download"):
+        session = ScopeSegmentSession(args.resource, source=args.source,
+                                      sample_window=args.window, time_window=args.time_window,
+                                      tuner=_make_tuner(args))
+    try:
+        total = session.total_segments
+        end = total if args.count is None else min(args.start + args.count - 1, total)
+        indices = list(range(args.start, end + 1))
+        metadata = dict(metadata, resource=args.resource, source=args.source, total_segments=total)
+
+        y = spill = None
+        if args.output:
+            y, spill = _allocate_rows(args, len(indices), session.points, out)
+            if y is None:
+                return None
+        ttags = np.zeros(len(indices))
+        nbytes = 0
+        try:
+            for b in range(0, len(indices), args.batch):
+                batch = indices[b:b + args.batch]
+                with timer.phase("download"):
+                    segs = session.fetch(batch)
+                with timer.phase("write"):
+                    for k, seg in enumerate(segs, start=b):
+                        nbytes += seg["y_raw"].nbytes
+                        if y is not None:
+                            # Rows near the end of the record can be shorter than the window
+                            y[k, :len(seg["y_raw"])] = seg["y_raw"][:y.shape[1]]
+                            ttags[k] = seg["ttag_s"]
+                if not args.quiet:
+                    _print_progress(b + len(batch), len(indices), timer.phases["download"], out)
+            if not args.quiet and indices:
+                print(file=out)
+            if args.output:
+                with timer.phase("write"):
+                    _save_npz(args.output, y, ttags, indices, session.xincr, session.t0, metadata)
+        finally:
+            del y
+            if spill is not None:
+                os.remove(spill)
+    finally:
+        session.close()
+    return nbytes, indices, total
+
+
+def run_capture(args, timer: PhaseTimer, out=sys.stdout) -> dict:
+    """Run the configured phases; returns a summary dict."""
+    with timer.phase("connect"):
+        idn = get_instrument_id(args.resource)
+    if not args.quiet:
+        print(f"Connected: {idn}", file=out)
+
+    setup = None
+    if args.configure:
+        setup = {
+            "channel_scale": args.channel_scale,
+            "timebase_scale": args.timebase_scale,
+            "trigger_level": args.trigger_level,
+            "timebase_position": args.timebase_position,
+            "sample_rate": args.sample_rate,
+            "acquire_points": args.acquire_points,
+            "segment_count": args.segment_count,
+        }
+        with timer.phase("configure"):
+            if args.no_reset:
+                changed = configure_scope_incremental(ScopeConfigurator(), args.resource, **setup)
+                if not args.quiet:
+                    print(f"Changed settings: {', '.join(changed) or 'none'}", file=out)
+            else:
+                setup_scope_acquisition(args.resource, **setup)
+
+    elif args.catalog and args.output:
+        # Not configured here: record the scope's current settings instead
+        with timer.phase("configure"):
+            try:
+                state = sync_scope(ScopeConfigurator(), args.resource)
+                setup = {name: state[name] for name in SETTINGS if name != "acquire_mode"}
+            except ValueError:
+                setup = None
+
+    if args.single:
+        with timer.phase("trigger"):
+            trigger_single_acquisition(args.resource, wait=True, timeout_s=args.acq_timeout)
+
+    metadata = {"idn": idn, "setup": setup}
+    if args.output and args.output.endswith(".segz"):
+        nbytes, indices, total = _download_to_store(args, timer, metadata, out)
+    else:
+        result = _download_in_memory(args, timer, metadata, out)
+        if result is None:
+            args.output = os.path.splitext(args.output)[0] + ".segz"
+            if not args.quiet:
+                print(f"Streaming to capture store {args.output} instead", file=out)
+            result = _download_to_store(args, timer, metadata, out)
+        nbytes, indices, total = result
+
+    download_s = timer.phases.get("download", 0.0)
+    if args.catalog and args.output:
+        with timer.phase("catalog"):
+            with CaptureCatalog(args.catalog) as catalog:
+                catalog.add_file(args.output, idn=idn, resource=args.resource, source=args.source,
+                                 extra={"download_s": download_s, "bytes": nbytes},
+                                 **{name: value for name, value in (setup or {}).items()
+                                    if value is not None})
+        if not args.quiet:
+            print(f"Recorded in catalog {args.catalog}", file=out)
+    return {
+        "idn": idn,
+        "segments": len(indices),
+        "total_segments": total,
+        "bytes": nbytes,
+        "download_s": download_s,
+        "segments_per_s": len(indices) / download_s if download_s else 0.0,
+        "mb_per_s": nbytes / 1e6 / download_s if download_s else 0.0,
+    }
+
+
+def print_summary(summary: dict, timer: PhaseTimer, out=sys.stdout):
+    print(f"Downloaded {summary['segments']} of {summary['total_segments']} segments "
+          f"({summary['bytes'] / 1e6:.2f} MB) in {summary['download_s']:.3f} s", file=out)
+    print(f"Throughput: {summary['segments_per_s']:.1f} segments/s, "
+          f"{summary['mb_per_s']:.2f} MB/s", file=out)
+    timer.report(out)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    timer = PhaseTimer()
+    try:
+        summary = run_capture(args, timer)
+    except KeyboardInterrupt:
+        print("\nInterrupted", file=sys.stderr)
+        return 130
+    except Exception as e:
+        print(f"Capture failed: {e}", file=sys.stderr)
+        timer.report(sys.stderr)
+        return 1
+    print_summary(summary, timer)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,77 @@
+"""
+Overview image of a whole segment set.
+
+Each image column is one segment (or a group of adjacent segments when
+there are more segments than columns) and each row is a span of samples
+within the record. A cell holds the min/max-decimated sample of that span
+that deviates most from the baseline, so narrow pulses and glitches stay
+visible however far the data is decimated. Built vectorized in row chunks
+from the (n, points) int16 array.
+"""
+
+import numpy as np
+
+
+def decimate_minmax(y: np.ndarray, bins: int):
+    """
+    Min and max of each of `bins` near-equal sample spans of every row.
+    Returns (lo, hi), each (n, bins) with y's dtype.
+    """
+    points = y.shape[1]
+    bins = max(1, min(bins, points))
+    edges = np.linspace(0, points, bins + 1).astype(np.int64)[:-1]
+    return np.minimum.reduceat(y, edges, axis=1), np.maximum.reduceat(y, edges, axis=1)
+
+
+def _peak_cells(lo, hi, baseline):
+    """Signed deviation of whichever of lo/hi lies further from baseline."""
+    d_lo = lo.astype(np.float32) - baseline
+    d_hi = hi.astype(np.float32) - baseline
+    return np.where(np.abs(d_hi) >= np.abs(d_lo), d_hi, d_lo)
+
+
+class SegmentOverview:
+    """
+    (rows, columns) overview image of y with column <-> position mapping.
+
+    Column c covers segment positions c*group .. c*group + group - 1.
+    image is in raw ADC units (baseline + deviation), row 0 = record start.
+    """
+
+    def __init__(self, y: np.ndarray, rows: int = 96, max_columns: int = 2048,
+                 chunk_rows: int = 4096):
+        y = np.asarray(y)
+        if y.ndim != 2 or y.shape[0] == 0 or y.shape[1] == 0:
+            raise ValueError(f"Expected non-empty (n, points) array, got shape {y.shape}")
+        n = y.shape[0]
+        self.n = n
+        self.group = -(-n // max_columns)
+        self.columns = -(-n // self.group)
+        self.baseline = float(np.median(y[:256]))
+
+        # Whole groups per chunk so no group straddles two chunks
+        chunk_rows = max(self.group, chunk_rows - chunk_rows % self.group)
+        bins = max(1, min(rows, y.shape[1]))
+        cells = np.empty((self.columns, bins), dtype=np.float32)
+        for start in range(0, n, chunk_rows):
+            lo, hi = decimate_minmax(y[start:start + chunk_rows], bins)
+            dev = _peak_cells(lo, hi, self.baseline)
+            pad = -len(dev) % self.group
+            if pad:
+                dev = np.concatenate([dev, np.zeros((pad, bins), dtype=np.float32)])
+            dev = dev.reshape(-1, self.group, bins)
+            pick = np.abs(dev).argmax(axis=1)[:, None, :]
+            col = start // self.group
+            cells[col:col + dev.shape[0]] = np.take_along_axis(dev, pick, axis=1)[:, 0, :]
+        self.image = cells.T + self.baseline
+
+    def column_of(self, pos: int) -> int:
+        return int(pos) // self.group
+
+    def position_at(self, x: float) -> int:
+        """Segment position under image x coordinate x (in segment positions)."""
+        return int(np.clip(np.floor(x + 0.5), 0, self.n - 1))
+
+    def extent(self, t_start: float, t_stop: float):
+        """imshow extent that puts segment positions on x and record time on y."""
+        return (-0.5, self.columns * self.group - 0.5, t_start, t_stop)
@@ -0,0 +1,87 @@
+"""
+Array-backed container for a downloaded set of segments.
+
+The extractors return a list of segment dicts; analysis code wants the
+samples as one (n, points) int16 array. SegmentSet holds that array with the
+time tags and scope indices, and still hands out segment dicts by position
+so it can be used anywhere the viewers expect the list.
+"""
+
+import numpy as np
+
+from timetag_index import TimeTagIndex
+
+
+class SegmentSet:
+    max_filtered_views = 2
+
+    def __init__(self, y: np.ndarray, ttags, indices=None, xincr: float = 1.0, t0: float = 0.0):
+        self.y = np.asarray(y)
+        if self.y.ndim != 2:
+            raise ValueError(f"Expected (n, points) array, got shape {self.y.shape}")
+        self.ttags = np.asarray(ttags, dtype=np.float64)
+        if indices is None:
+            indices = np.arange(1, self.y.shape[0] + 1)
+        self.indices = np.asarray(indices, dtype=np.int64)
+        self.xincr = float(xincr)
+        self.t0 = float(t0)
+        self.t_s = self.t0 + np.arange(self.y.shape[1]) * self.xincr
+        self._time_index = None
+        self._filtered = {}
+
+    @classmethod
+    def from_segments(cls, segments):
+        """
+        Stack a list of segment dicts. Records of unequal length are cut to
+        the shortest so the result stays rectangular.
+        """
+        if not segments:
+            return cls(np.empty((0, 0), dtype=np.int16), [])
+        points = min(len(seg["y_raw"]) for seg in segments)
+        y = np.empty((len(segments), points), dtype=np.int16)
+        for row, seg in enumerate(segments):
+            y[row] = seg["y_raw"][:points]
+        t = segments[0]["t_s"]
+        xincr = float(t[1] - t[0]) if len(t) > 1 else 1.0
+        return cls(y, [seg["ttag_s"] for seg in segments],
+                   [seg["index"] for seg in segments], xincr, float(t[0]) if len(t) else 0.0)
+
+    @property
+    def points(self) -> int:
+        return self.y.shape[1]
+
+    def __len__(self):
+        return self.y.shape[0]
+
+    def __getitem__(self, pos: int) -> dict:
+        return {"index": int(self.indices[pos]), "ttag_s": float(self.ttags[pos]),
+                "t_s": self.t_s, "y_raw": self.y[pos]}
+
+    def time_index(self) -> TimeTagIndex:
+        if self._time_index is None:
+            self._time_index = TimeTagIndex(self.ttags)
+        return self._time_index
+
+    def iter_chunks(self, chunk_rows: int = 4096):
+        """Yield (first_position, y_block) views of at most chunk_rows rows."""
+        for start in range(0, len(self), chunk_rows):
+            yield start, self.y[start:start + chunk_rows]
+
+    def filtered(self, filt, zero_phase: bool = False, chunk_rows: int = 4096) -> np.ndarray:
+        """
+        float32 (n, points) view of y through a SegmentFilter or FilterChain,
+        computed in batches on first use and cached per filter.
+        """
+        from segment_filters import filter_segments
+
+        key = (filt.key, zero_phase)
+        if key not in self._filtered:
+            # Each view is twice the size of y; keep only the most recent ones
+            while len(self._filtered) >= self.max_filtered_views:
+                self._filtered.pop(next(iter(self._filtered)))
+            self._filtered[key] = filter_segments(self.y, filt, chunk_rows, zero_phase)
+        return self._filtered[key]
+
+    def cached_filtered(self, filt, zero_phase: bool = False):
+        """The cached filtered array, or None if filtered() has not run for this filter."""
+        return self._filtered.get((filt.key, zero_phase))
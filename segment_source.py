@@ -0,0 +1,162 @@
+"""
+Lazy, on-demand access to every segment captured on the scope.
+
+LazySegmentSource looks like a list of segment dicts covering the whole
+acquisition. Only the background thread talks to the scope: it fetches the
+segment last asked for first and then reads ahead in the direction of
+travel. Indexing never waits on a VISA transfer; a segment that has not
+arrived yet reads as None and on_ready() fires once it is in the cache, so
+the Tk thread can show a placeholder and redraw later.
+"""
+
+import math
+import threading
+import time
+
+
+class LazySegmentSource:
+    """
+    Sequence of segment dicts fetched on demand.
+
+    fetch(indices) -> list of segment dicts, run on a persistent session.
+    total          -> number of captured segments (scope indices 1..total).
+    cache          -> SegmentCache shared with the normal collect path.
+    on_close       -> optional callable that releases the session; called on
+                      the read-ahead thread after close().
+    on_ready       -> optional callable run on the read-ahead thread after
+                      every fetch (post it to the UI thread, don't draw here).
+
+    The read-ahead depth covers `lookahead_s` seconds of playback plus the
+    time a batch takes to arrive, and grows when the link is slower than
+    playback. Each fetch is sized from the measured transfer rate so that it
+    takes about `batch_target_s`, keeping the wait for a missed segment short.
+    """
+
+    def __init__(self, fetch, total: int, cache, acq_key, lookahead_s: float = 3.0,
+                 batch_target_s: float = 0.1, max_batch: int = 256, max_depth: int = 4096,
+                 on_close=None, on_ready=None):
+        self.fetch = fetch
+        self.on_close = on_close
+        self.on_ready = on_ready
+        self.total = int(total)
+        self.cache = cache
+        self.acq_key = acq_key
+        self.lookahead_s = lookahead_s
+        self.batch_target_s = batch_target_s
+        self.max_batch = max_batch
+        self.max_depth = max_depth
+
+        self.transfer_rate = None  # segments/s, exponentially averaged
+        self.last_error = None  # most recent fetch failure, shown with the placeholder
+        self.playback_fps = 2.0
+        self._cond = threading.Condition()
+        self._position = 0
+        self._direction = 1
+        self._closed = False
+        self._thread = threading.Thread(target=self._read_ahead_loop, daemon=True)
+        self._thread.start()
+
+    def __len__(self):
+        return self.total
+
+    def __bool__(self):
+        return self.total > 0
+
+    def __getitem__(self, pos: int):
+        """
+        Segment at 0-based position `pos` (scope index pos + 1), or None
+        while it is being fetched. Never blocks on the instrument.
+        """
+        if pos < 0:
+            pos += self.total
+        if pos < 0 or pos >= self.total:
+            raise IndexError(pos)
+        self._notify(pos)
+        return self.cache.get(self.acq_key, pos + 1)
+
+    def is_cached(self, pos: int) -> bool:
+        return not self.cache.missing(self.acq_key, [pos + 1])
+
+    def set_playback_rate(self, fps: float):
+        """Frames per second the viewer consumes during playback."""
+        self.playback_fps = max(fps, 0.1)
+
+    def close(self):
+        """Stop reading ahead; the session is released by the read-ahead thread."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+
+    def _notify(self, pos: int):
+        with self._cond:
+            if pos != self._position:
+                self._direction = 1 if pos > self._position else -1
+            self._position = pos
+            self._cond.notify()
+
+    def _fetch(self, indices) -> list:
+        t0 = time.perf_counter()
+        segs = self.fetch(indices)
+        elapsed = time.perf_counter() - t0
+        self.last_error = None
+        if segs and elapsed > 0:
+            rate = len(segs) / elapsed
+            self.transfer_rate = rate if self.transfer_rate is None else (
+                0.7 * self.transfer_rate + 0.3 * rate)
+        for seg in segs:
+            self.cache.put(self.acq_key, seg)
+        if self.on_ready is not None:
+            self.on_ready()
+        return segs
+
+    def _batch_size(self) -> int:
+        if not self.transfer_rate:
+            return 8
+        return max(1, min(self.max_batch, int(self.transfer_rate * self.batch_target_s)))
+
+    def _read_ahead_depth(self) -> int:
+        batch = self._batch_size()
+        lead_s = self.lookahead_s
+        if self.transfer_rate:
+            # Behind a link slower than playback the lead drains, so start further
+            # ahead in proportion; always allow for one batch in flight
+            lead_s = lead_s * max(1.0, self.playback_fps / self.transfer_rate) + batch / self.transfer_rate
+        return min(self.max_depth, int(math.ceil(self.playback_fps * lead_s)) + batch)
+
+    def _next_missing(self) -> list:
+        """Missing scope indices from the current position onwards, nearest first."""
+        with self._cond:
+            pos, direction = self._position, self._direction
+        depth = self._read_ahead_depth()
+        if direction > 0:
+            window = range(pos + 1, min(pos + depth, self.total) + 1)
+        else:
+            window = range(pos + 1, max(pos + 2 - depth, 1) - 1, -1)
+        missing = self.cache.missing(self.acq_key, window)
+        return sorted(missing[:self._batch_size()])
+
+    def _read_ahead_loop(self):
+        try:
+            while True:
+                with self._cond:
+                    if self._closed:
+                        return
+                try:
+                    missing = self._next_missing()
+                    if missing:
+                        self._fetch(missing)
+                        continue
+                except Exception as e:
+                    # The viewer keeps showing the placeholder; back off and retry
+                    self.last_error = e
+                    if self.on_ready is not None:
+                        self.on_ready()
+                    time.sleep(0.5)
+                with self._cond:
+                    if self._closed:
+                        return
+                    self._cond.wait(timeout=0.5)
+        finally:
+            # Only this thread uses the session, so it is released here
+            if self.on_close is not None:
+                self.on_close()
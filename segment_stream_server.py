@@ -0,0 +1,400 @@
+"""
+Publish downloaded segments to remote viewers over TCP.
+
+One process owns the VISA session and downloads segments; any number of
+viewers or analysis clients subscribe over TCP and receive them as compact
+binary frames, without opening their own sessions to the scope. The server
+runs an asyncio loop in a background thread so the synchronous download
+code can publish from any thread.
+
+Frame format (all little-endian):
+    header   4-byte type tag, u32 payload length
+    PREA     UTF-8 JSON preamble: xincr, t0, points, source, resource, idn, ...
+    SEGB     u32 rows, u32 points, int64 indices[rows], float64 ttags[rows],
+             int16 samples[rows * points]
+
+Each subscriber gets the latest preamble on connect and every frame after
+that. A subscriber that falls behind by more than max_queued_frames loses
+its oldest segment frames instead of stalling the publisher; when only
+preambles are queued the oldest (already superseded) one goes, so the
+backlog never exceeds max_queued_frames.
+
+    python segment_stream_server.py serve TCPIP0::192.168.0.2::inst0::INSTR --single --repeat 0
+    python segment_stream_server.py watch 127.0.0.1:5800
+    python segment_stream_server.py selftest    # localhost round trip, no scope needed
+"""
+
+import argparse
+import asyncio
+import collections
+import json
+import socket
+import struct
+import sys
+import threading
+import time
+
+import numpy as np
+
+from segment_set import SegmentSet
+
+FRAME_HEADER = struct.Struct("<4sI")
+BLOCK_HEADER = struct.Struct("<II")
+PREAMBLE = b"PREA"
+SEGMENTS = b"SEGB"
+DEFAULT_PORT = 5800
+
+
+def encode_preamble(preamble: dict) -> bytes:
+    payload = json.dumps(preamble).encode("utf-8")
+    return FRAME_HEADER.pack(PREAMBLE, len(payload)) + payload
+
+
+def encode_segments(y: np.ndarray, ttags, indices) -> bytes:
+    y = np.ascontiguousarray(y, dtype="<i2")
+    if y.ndim != 2:
+        raise ValueError(f"Expected (n, points) array, got shape {y.shape}")
+    rows, points = y.shape
+    parts = [
+        BLOCK_HEADER.pack(rows, points),
+        np.asarray(indices, dtype="<i8").tobytes(),
+        np.asarray(ttags, dtype="<f8").tobytes(),
+        y.tobytes(),
+    ]
+    length = sum(len(p) for p in parts)
+    return FRAME_HEADER.pack(SEGMENTS, length) + b"".join(parts)
+
+
+def decode_segments(payload: bytes):
+    """Returns (y (rows, points) int16, ttags float64, indices int64)."""
+    rows, points = BLOCK_HEADER.unpack_from(payload)
+    offset = BLOCK_HEADER.size
+    indices = np.frombuffer(payload, dtype="<i8", count=rows, offset=offset)
+    offset += 8 * rows
+    ttags = np.frombuffer(payload, dtype="<f8", count=rows, offset=offset)
+    offset += 8 * rows
+    y = np.frombuffer(payload, dtype="<i2", count=rows * points, offset=offset).reshape(rows, points)
+    return y, ttags, indices
+
+
+class _Subscriber:
+    """Per-client frame backlog of at most max_frames; drops the oldest segment frame when full."""
+
+    def __init__(self, max_frames: int):
+        self.frames = collections.deque()
+        self.max_frames = max_frames
+        self.ready = asyncio.Event()
+        self.closed = False
+        self.dropped = 0
+
+    def push(self, frame: bytes):
+        while len(self.frames) >= self.max_frames:
+            for k, queued in enumerate(self.frames):
+                if queued[:4] == SEGMENTS:
+                    del self.frames[k]
+                    break
+            else:
+                self.frames.popleft()  # only preambles queued; a later one supersedes it
+            self.dropped += 1
+        self.frames.append(frame)
+        self.ready.set()
+
+    def close(self):
+        self.closed = True
+        self.ready.set()
+
+
+class SegmentStreamServer:
+    """
+    Asyncio TCP publisher running in its own thread. publish_preamble() and
+    publish() may be called from any thread.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = DEFAULT_PORT, max_queued_frames: int = 64):
+        self.host = host
+        self.port = port
+        self.max_queued_frames = max_queued_frames
+        self.frames_published = 0
+        self._preamble_frame = None
+        self._subscribers = set()
+        self._handlers = set()
+        self._loop = None
+        self._server = None
+        self._thread = None
+
+    def start(self):
+        """Bind and start serving; returns (host, port) actually bound."""
+        started = threading.Event()
+        errors = []
+
+        def run():
+            self._loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(self._loop)
+            try:
+                self._server = self._loop.run_until_complete(
+                    asyncio.start_server(self._handle_client, self.host, self.port))
+            except Exception as e:
+                errors.append(e)
+                started.set()
+                self._loop.close()
+                return
+            self.port = self._server.sockets[0].getsockname()[1]
+            started.set()
+            self._loop.run_forever()
+            self._loop.run_until_complete(self._shutdown())
+            self._loop.close()
+
+        self._thread = threading.Thread(target=run, daemon=True, name="segment-stream")
+        self._thread.start()
+        started.wait()
+        if errors:
+            raise errors[0]
+        return self.host, self.port
+
+    def stop(self):
+        if self._loop is None or self._thread is None:
+            return
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._thread = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    @property
+    def client_count(self) -> int:
+        return len(self._subscribers)
+
+    @property
+    def dropped_frames(self) -> int:
+        return sum(sub.dropped for sub in list(self._subscribers))
+
+    @property
+    def running(self) -> bool:
+        return self._loop is not None and self._thread is not None
+
+    def publish_preamble(self, preamble: dict):
+        """Send the preamble to current clients; before start() it is only kept for new ones."""
+        frame = encode_preamble(preamble)
+        self._preamble_frame = frame
+        if self.running:
+            self._loop.call_soon_threadsafe(self._broadcast, frame)
+
+    def publish(self, y: np.ndarray, ttags, indices):
+        if not self.running:
+            raise RuntimeError("server not started")
+        self._loop.call_soon_threadsafe(self._broadcast, encode_segments(y, ttags, indices))
+
+    def publish_segments(self, segments):
+        """Publish a list of segment dicts (as returned by the extractors)."""
+        if segments:
+            block = SegmentSet.from_segments(segments)
+            self.publish(block.y, block.ttags, block.indices)
+
+    def _broadcast(self, frame: bytes):
+        self.frames_published += 1
+        for sub in self._subscribers:
+            sub.push(frame)
+
+    async def _handle_client(self, reader, writer):
+        sub = _Subscriber(self.max_queued_frames)
+        if self._preamble_frame is not None:
+            sub.push(self._preamble_frame)
+        self._subscribers.add(sub)
+        self._handlers.add(asyncio.current_task())
+        # Clients never send anything; EOF on the read side means they left
+        eof = asyncio.ensure_future(reader.read())
+        eof.add_done_callback(lambda _: sub.close())
+        try:
+            while True:
+                await sub.ready.wait()
+                sub.ready.clear()
+                while sub.frames:
+                    writer.write(sub.frames.popleft())
+                await writer.drain()
+                if sub.closed:
+                    break
+        except (ConnectionError, OSError):
+            pass
+        finally:
+            self._subscribers.discard(sub)
+            self._handlers.discard(asyncio.current_task())
+            eof.cancel()
+            writer.close()
+
+    async def _shutdown(self):
+        """Stop accepting, flush every subscriber's backlog, then close."""
+        self._server.close()
+        for sub in list(self._subscribers):
+            sub.close()
+        if self._handlers:
+            await asyncio.wait(list(self._handlers), timeout=5.0)
+        await self._server.wait_closed()
+
+
+class SegmentStreamClient:
+    """
+    Blocking subscriber. Iterating yields ("preamble", dict) and
+    ("segments", SegmentSet) tuples until the server closes the connection.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = DEFAULT_PORT, timeout: float = None):
+        self.sock = socket.create_connection((host, port), timeout=timeout)
+        self.preamble = None
+
+    def _recv_exact(self, n: int) -> bytes:
+        buf = bytearray(n)
+        view = memoryview(buf)
+        got = 0
+        while got < n:
+            k = self.sock.recv_into(view[got:], n - got)
+            if k == 0:
+                raise EOFError("Stream closed")
+            got += k
+        return bytes(buf)
+
+    def recv_frame(self):
+        tag, length = FRAME_HEADER.unpack(self._recv_exact(FRAME_HEADER.size))
+        payload = self._recv_exact(length)
+        if tag == PREAMBLE:
+            self.preamble = json.loads(payload.decode("utf-8"))
+            return "preamble", self.preamble
+        if tag == SEGMENTS:
+            y, ttags, indices = decode_segments(payload)
+            pre = self.preamble or {}
+            return "segments", SegmentSet(y, ttags, indices, pre.get("xincr", 1.0), pre.get("t0", 0.0))
+        raise ValueError(f"Unknown frame type {tag!r}")
+
+    def __iter__(self):
+        while True:
+            try:
+                yield self.recv_frame()
+            except EOFError:
+                return
+
+    def close(self):
+        self.sock.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def serve_scope(args, out=sys.stdout):
+    """Download from the scope (optionally re-triggering) and publish every batch."""
+    from scope_io import ScopeSegmentSession, get_instrument_id, trigger_single_acquisition
+
+    idn = get_instrument_id(args.resource)
+    with SegmentStreamServer(args.host, args.port) as server:
+        print(f"Serving {idn} on {server.host}:{server.port}", file=out, flush=True)
+        acquisition = 0
+        while args.repeat == 0 or acquisition < args.repeat:
+            acquisition += 1
+            if args.single:
+                trigger_single_acquisition(args.resource, wait=True, timeout_s=args.acq_timeout)
+            session = ScopeSegmentSession(args.resource, source=args.source, sample_window=args.window)
+            try:
+                total = session.total_segments
+                end = total if args.count is None else min(args.count, total)
+                server.publish_preamble({
+                    "resource": args.resource, "idn": idn, "source": args.source,
+                    "acquisition": acquisition, "xincr": session.xincr, "t0": session.t0,
+                    "window": list(session.window) if session.window else None,
+                    "total_segments": total, "segments": end,
+                })
+                for first in range(1, end + 1, args.batch):
+                    server.publish_segments(session.fetch(range(first, min(first + args.batch, end + 1))))
+            finally:
+                session.close()
+            print(f"Acquisition {acquisition}: published {end} segments to "
+                  f"{server.client_count} clients", file=out, flush=True)
+            if not args.single:
+                break
+
+
+def loopback_check(rows: int = 64, points: int = 1000, batches: int = 8, timeout: float = 10.0,
+                   out=sys.stdout) -> bool:
+    """
+    Publish synthetic segments on 127.0.0.1 and check that a subscriber
+    receives the preamble and every block unchanged.
+    """
+    rng = np.random.default_rng(0)
+    preamble = {"xincr": 25e-12, "t0": 1e-9, "source": "selftest"}
+    blocks = [(rng.integers(-2000, 2000, (rows, points), dtype=np.int16),
+               np.arange(rows) * 1e-6 + b, np.arange(1, rows + 1) + b * rows) for b in range(batches)]
+    with SegmentStreamServer("127.0.0.1", 0) as server:
+        with SegmentStreamClient("127.0.0.1", server.port, timeout=timeout) as client:
+            deadline = time.monotonic() + timeout
+            while server.client_count == 0:
+                if time.monotonic() > deadline:
+                    raise TimeoutError("Subscriber did not connect")
+                time.sleep(0.01)
+            server.publish_preamble(preamble)
+            for y, ttags, indices in blocks:
+                server.publish(y, ttags, indices)
+
+            kind, frame = client.recv_frame()
+            ok = kind == "preamble" and frame == preamble
+            for y, ttags, indices in blocks:
+                kind, frame = client.recv_frame()
+                ok = ok and kind == "segments" and np.array_equal(frame.y, y) \
+                    and np.array_equal(frame.ttags, ttags) and np.array_equal(frame.indices, indices) \
+                    and frame.t0 == preamble["t0"]
+    print(f"Loopback {'ok' if ok else 'FAILED'}: preamble + {batches} frames of "
+          f"{rows} x {points} segments", file=out)
+    return ok
+
+
+def watch(args, out=sys.stdout):
+    host, _, port = args.address.rpartition(":")
+    with SegmentStreamClient(host or "127.0.0.1", int(port)) as client:
+        for kind, frame in client:
+            if kind == "preamble":
+                print(f"Preamble: {json.dumps(frame)}", file=out, flush=True)
+            else:
+                print(f"Segments {frame.indices[0]}..{frame.indices[-1]} "
+                      f"({len(frame)} x {frame.points})", file=out, flush=True)
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Publish scope segments to TCP subscribers")
+    sub = p.add_subparsers(dest="command", required=True)
+
+    s = sub.add_parser("serve", help="Download from a scope and publish")
+    s.add_argument("resource", help="VISA resource")
+    s.add_argument("--host", default="127.0.0.1", help="Interface to bind (0.0.0.0 for all)")
+    s.add_argument("--port", type=int, default=DEFAULT_PORT)
+    s.add_argument("--source", default="CHANnel1")
+    s.add_argument("--count", type=int, default=None, help="Segments per acquisition (default: all)")
+    s.add_argument("--window", type=int, nargs=2, metavar=("START", "SIZE"))
+    s.add_argument("--batch", type=int, default=256, help="Segments per frame")
+    s.add_argument("--single", action="store_true", help="Trigger :SINGle before each download")
+    s.add_argument("--repeat", type=int, default=1, help="Acquisitions with --single (0 = forever)")
+    s.add_argument("--acq-timeout", type=float, default=120.0)
+
+    w = sub.add_parser("watch", help="Subscribe and print a line per frame")
+    w.add_argument("address", help="HOST:PORT of a running server")
+
+    sub.add_parser("selftest", help="Round trip synthetic segments over localhost")
+
+    args = p.parse_args(argv)
+    try:
+        if args.command == "serve":
+            serve_scope(args)
+        elif args.command == "selftest":
+            return 0 if loopback_check() else 1
+        else:
+            watch(args)
+    except KeyboardInterrupt:
+        return 130
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
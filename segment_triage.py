@@ -0,0 +1,111 @@
+"""
+Outlier triage across segments.
+
+A robust template is built from trigger-aligned segments (median or mean of
+a row sample, each row first shifted onto a reference by integer-lag
+cross-correlation). Every segment is then scored against the template in
+chunked, vectorized passes and the scores are ranked with a robust z-score
+so the odd pulses can be inspected without watching playback.
+"""
+
+import numpy as np
+
+
+METRICS = ("residual", "correlation")
+
+
+def _integer_lags(block: np.ndarray, ref: np.ndarray, max_lag: int) -> np.ndarray:
+    """Integer lag per row that best aligns the row with ref (FFT cross-correlation)."""
+    n = block.shape[1]
+    nfft = 1 << int(np.ceil(np.log2(2 * n)))
+    cc = np.fft.irfft(np.fft.rfft(block, nfft, axis=1) * np.conj(np.fft.rfft(ref, nfft)),
+                      nfft, axis=1)
+    # Only consider lags in [-max_lag, max_lag]
+    lags = np.concatenate([np.arange(0, max_lag + 1), np.arange(-max_lag, 0)])
+    cols = lags % nfft
+    return lags[np.argmax(cc[:, cols], axis=1)]
+
+
+def _shift_rows(block: np.ndarray, lags: np.ndarray) -> np.ndarray:
+    """Shift each row left by its lag (edges are clamped, not wrapped)."""
+    n = block.shape[1]
+    idx = np.clip(np.arange(n)[None, :] + lags[:, None], 0, n - 1)
+    return np.take_along_axis(block, idx, axis=1)
+
+
+def _centered(block) -> np.ndarray:
+    block = np.asarray(block, dtype=np.float32)
+    return block - block.mean(axis=1, keepdims=True)
+
+
+def build_template(y: np.ndarray, method: str = "median", max_rows: int = 4096,
+                   align: bool = True, max_lag: int = 32) -> np.ndarray:
+    """
+    Robust template from up to max_rows evenly spaced segments.
+    Rows are baseline-centered and, with align=True, shifted onto a first-pass
+    median before the final median/mean is taken.
+    """
+    if method not in ("median", "mean"):
+        raise ValueError(f"Unknown template method {method!r}")
+    rows = np.linspace(0, y.shape[0] - 1, min(max_rows, y.shape[0])).astype(np.int64)
+    sample = _centered(y[np.unique(rows)])
+    reduce = np.median if method == "median" else np.mean
+    template = reduce(sample, axis=0)
+    if align:
+        sample = _shift_rows(sample, _integer_lags(sample, template, max_lag))
+        template = reduce(sample, axis=0)
+    return template.astype(np.float32)
+
+
+def score_segments(y: np.ndarray, template: np.ndarray, metric: str = "residual",
+                   chunk_rows: int = 4096, align: bool = True, max_lag: int = 32) -> np.ndarray:
+    """
+    Score every segment against the template; higher means more unusual.
+
+    residual    -> energy of (segment - template) relative to the template
+                   energy; sensitive to amplitude and shape
+    correlation -> 1 - Pearson correlation with the template; shape only
+    """
+    if metric not in METRICS:
+        raise ValueError(f"Unknown metric {metric!r}, expected one of {METRICS}")
+    tmpl = template - template.mean()
+    t_energy = float(np.dot(tmpl, tmpl)) or 1.0
+    scores = np.empty(y.shape[0], dtype=np.float64)
+
+    for start in range(0, y.shape[0], chunk_rows):
+        block = _centered(y[start:start + chunk_rows])
+        if align:
+            block = _shift_rows(block, _integer_lags(block, tmpl, max_lag))
+        if metric == "residual":
+            resid = block - tmpl[None, :]
+            scores[start:start + len(block)] = np.einsum("ij,ij->i", resid, resid) / t_energy
+        else:
+            proj = block @ tmpl
+            norm = np.sqrt(np.einsum("ij,ij->i", block, block) * t_energy)
+            r = np.divide(proj, norm, out=np.zeros_like(proj), where=norm > 0)
+            scores[start:start + len(block)] = 1.0 - r
+    return scores
+
+
+def robust_zscores(scores: np.ndarray) -> np.ndarray:
+    med = np.median(scores)
+    mad = 1.4826 * np.median(np.abs(scores - med))
+    if mad == 0:
+        mad = np.finfo(np.float64).eps * max(abs(med), 1.0)
+    return (scores - med) / mad
+
+
+def rank_outliers(scores: np.ndarray, k: float = 5.0, top: int = None) -> np.ndarray:
+    """Positions with robust z-score above k, most unusual first (at most `top`)."""
+    z = robust_zscores(scores)
+    positions = np.flatnonzero(z > k)
+    positions = positions[np.argsort(-z[positions], kind="stable")]
+    return positions[:top] if top is not None else positions
+
+
+def triage_segments(y: np.ndarray, method: str = "median", metric: str = "residual",
+                    k: float = 5.0, chunk_rows: int = 4096, align: bool = True) -> dict:
+    """Template, per-segment scores and ranked outlier positions in one call."""
+    template = build_template(y, method=method, align=align)
+    scores = score_segments(y, template, metric=metric, chunk_rows=chunk_rows, align=align)
+    return {"template": template, "scores": scores, "outliers": rank_outliers(scores, k=k)}
@@ -1,128 +1,24 @@
-import numpy as np
-import pyvisa
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 import tkinter as tk
 from tkinter import ttk
 import threading
 
-
-def _read_ieee_block_from_instrument(inst) -> bytes:
-    """
-    Read IEEE 488.2 definite-length binary block directly from instrument.
-    Handles partial reads by continuing until all expected bytes are received.
-    Returns payload bytes only (without IEEE header).
-    """
-    header = inst.read_bytes(2)
-    if header[0:1] != b"#":
-        raise ValueError("Not an IEEE block (missing '#').")
-    
-    nd = int(chr(header[1]))
-    if nd <= 0:
-        raise ValueError(f"Invalid IEEE block ndigits={nd}")
-    
-    len_bytes = inst.read_bytes(nd)
-    nbytes = int(len_bytes.decode("ascii"))
-    
-    payload = bytearray()
-    remaining = nbytes
-    while remaining > 0:
-        chunk = inst.read_bytes(remaining)
-        payload.extend(chunk)
-        remaining = nbytes - len(payload)
-    
-    try:
-        inst.read_bytes(1)  # consume newline
-    except:
-        pass
-    
-    return bytes(payload)
-
-
-def connect_scope(resource: str, timeout_ms: int = 30000):
-    rm = pyvisa.ResourceManager()
-    inst = rm.open_resource(resource)
-    inst.timeout = timeout_ms
-    inst.write_termination = "\n"
-    inst.read_termination = None
-    inst.chunk_size = 1024 * 1024
-    return inst
-
-
-def setup_waveform_transfer(inst, source="CHANnel1", fmt="WORD", byteorder="LSBF"):
-    inst.write(f":WAVeform:SOURce {source}")
-    inst.write(f":WAVeform:FORMat {fmt}")
-    inst.write(f":WAVeform:BYTeorder {byteorder}")
-
-
-def query_captured_segment_count(inst) -> int:
-    return int(float(inst.query(":WAVeform:SEGMented:COUNt?").strip()))
-
-
-def query_timebase(inst):
-    xincr = float(inst.query(":WAVeform:XINCrement?").strip())
-    return xincr
-
-
-def read_segment_word(inst, seg_index: int):
-    inst.write(f":ACQuire:SEGMented:INDex {seg_index}")
-    inst.write(":WAVeform:DATA?")
-    payload = _read_ieee_block_from_instrument(inst)
-    y = np.frombuffer(payload, dtype=np.int16)
-    inst.read_termination = "\n"
-    ttag = float(inst.query(":WAVeform:SEGMented:TTAG?").strip())
-    inst.read_termination = None
-    return y, ttag
-
-
-def extract_segments_mode_a(resource: str, source="CHANnel1", start_segment=1, num_segments=10):
-    inst = connect_scope(resource)
-    try:
-        inst.read_termination = "\n"
-        setup_waveform_transfer(inst, source=source, fmt="WORD", byteorder="LSBF")
-        xincr = query_timebase(inst)
-        total_segs = query_captured_segment_count(inst)
-        
-        # Calculate actual range
-        end_segment = min(start_segment + num_segments - 1, total_segs)
-        
-        inst.read_termination = None
-        segments = []
-
-        for i in range(start_segment, end_segment + 1):
-            y, ttag = read_segment_word(inst, i)
-            t = np.arange(len(y)) * xincr
-            segments.append({"index": i, "ttag_s": ttag, "t_s": t, "y_raw": y})
-
-        return segments, total_segs
-    finally:
-        inst.close()
-
-
-def get_instrument_id(resource: str):
-    """Query instrument identification"""
-    inst = connect_scope(resource)
-    try:
-        inst.read_termination = "\n"
-        idn = inst.query("*IDN?").strip()
-        return idn
-    finally:
-        inst.close()
-
-
-def trigger_single_acquisition(resource: str):
-    """Trigger single acquisition on scope"""
-    inst = connect_scope(resource)
-    try:
-        inst.read_termination = "\n"
-        inst.write(":SINGle")
-    finally:
-        inst.close()
+from scope_io import (
+    ScopeSegmentSession,
+    get_instrument_id,
+    trigger_single_acquisition,
+)
+from segment_cache import SegmentCache
+from transfer_tuning import TransferTuner
+from segment_source import LazySegmentSource
+from ui_event_bus import UIEventBus
 
 
 class SegmentViewerGUI:
     def __init__(self, root):
         self.root = root
+        # Worker threads post UI updates here; drained on the Tk thread every 40 ms
+        self.events = UIEventBus(root)
+        self.events.start()
         self.root.title("Oscilloscope Segment Viewer")
         self.root.geometry("1200x800")
         
@@ -133,6 +29,11 @@ class SegmentViewerGUI:
         self.play_speed = 500  # ms between frames
         self.connected = False
         self.total_segments_available = 0
+        self.fig = None  # matplotlib is loaded on first draw, see _ensure_figure
+        self.segment_cache = SegmentCache()
+        self.transfer_tuner = TransferTuner()  # chunk size/timeout learned per resource
+        self.acq_generation = 0
+        self._lazy_pending = None  # on-demand segment shown as a placeholder
         
         self._create_widgets()
     
@@ -177,6 +78,10 @@ class SegmentViewerGUI:
                                       command=self.collect_segments, width=15, state=tk.DISABLED)
         self.collect_btn.pack(side=tk.LEFT, padx=5)
         
+        self.browse_btn = ttk.Button(acq_frame, text="Browse All", 
+                                     command=self.browse_all_segments, width=12, state=tk.DISABLED)
+        self.browse_btn.pack(side=tk.LEFT, padx=5)
+        
         self.seg_info_label = ttk.Label(acq_frame, text="", font=("Arial", 9))
         self.seg_info_label.pack(side=tk.LEFT, padx=10)
         
@@ -223,15 +128,36 @@ class SegmentViewerGUI:
                                       command=self.update_speed)
         self.speed_spin.pack(side=tk.LEFT, padx=2)
         
-        # Matplotlib figure
-        self.fig, self.ax = plt.subplots(figsize=(12, 5))
-        self.canvas = FigureCanvasTkAgg(self.fig, master=self.root)
-        self.canvas.get_tk_widget().pack(side=tk.TOP, fill=tk.BOTH, expand=True)
+        # Segment slider (covers every loaded or lazily browsable segment)
+        self.slider_var = tk.DoubleVar(value=0)
+        self.seg_slider = ttk.Scale(self.root, from_=0, to=0, orient=tk.HORIZONTAL,
+                                    variable=self.slider_var, command=self._on_slider)
+        self.seg_slider.pack(side=tk.TOP, fill=tk.X, padx=10)
+        self._slider_pending = None
+        
+        # Placeholder until the first draw creates the matplotlib figure
+        self.plot_placeholder = ttk.Label(self.root, text="No data loaded", font=("Arial", 12),
+                                          foreground="gray", anchor=tk.CENTER)
+        self.plot_placeholder.pack(side=tk.TOP, fill=tk.BOTH, expand=True)
         
         # Disable buttons initially
         self._set_button_state(tk.DISABLED)
     
+    def _ensure_figure(self):
+        """Import matplotlib and create the figure on first draw"""
+        if self.fig is not None:
+            return
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+        
+        self.plot_placeholder.destroy()
+        self.fig = Figure(figsize=(12, 5))
+        self.ax = self.fig.add_subplot()
+        self.canvas = FigureCanvasTkAgg(self.fig, master=self.root)
+        self.canvas.get_tk_widget().pack(side=tk.TOP, fill=tk.BOTH, expand=True)
+    
     def _set_button_state(self, state):
+        self.seg_slider.config(state=state)
         self.first_btn.config(state=state)
         self.prev_btn.config(state=state)
         self.play_btn.config(state=state)
@@ -240,14 +166,15 @@ class SegmentViewerGUI:
     
     def connect_scope(self):
         """Connect to the oscilloscope"""
+        resource = self.ip_var.get()  # Tk variables are read on the Tk thread
+        
         def connect():
             try:
-                self.status_label.config(text="Connecting...")
-                resource = self.ip_var.get()
+                self.events.post("status", self.status_label.config, text="Connecting...")
                 idn = get_instrument_id(resource)
-                self.root.after(0, lambda: self._connected(resource, idn))
+                self.events.call(self._connected, resource, idn)
             except Exception as e:
-                self.root.after(0, lambda: self._connect_error(str(e)))
+                self.events.call(self._connect_error, str(e))
         
         self.connect_btn.config(state=tk.DISABLED)
         thread = threading.Thread(target=connect, daemon=True)
@@ -257,11 +184,14 @@ class SegmentViewerGUI:
         """Called when connection succeeds"""
         self.visa_resource = resource
         self.connected = True
+        self._invalidate_cache()
+        self._drop_lazy_source()
         self.idn_label.config(text=f"✓ {idn}", foreground="green")
         self.status_label.config(text="Connected - Ready to collect segments")
         self.connect_btn.config(state=tk.NORMAL, text="Reconnect")
         self.capture_btn.config(state=tk.NORMAL)
         self.collect_btn.config(state=tk.NORMAL)
+        self.browse_btn.config(state=tk.NORMAL)
     
     def _connect_error(self, error_msg):
         """Called when connection fails"""
@@ -273,38 +203,116 @@ class SegmentViewerGUI:
         """Trigger single acquisition on scope"""
         def capture():
             try:
-                self.root.after(0, lambda: self.status_label.config(text="Triggering :SINGle acquisition..."))
+                self.events.post("status", self.status_label.config, text="Triggering :SINGle acquisition...")
+                self._invalidate_cache()
+                self.events.call(self._drop_lazy_source)
                 trigger_single_acquisition(self.visa_resource)
-                self.root.after(0, lambda: self.status_label.config(text="Acquisition triggered - waiting for trigger event"))
+                self.events.post("status", self.status_label.config, text="Acquisition triggered - waiting for trigger event")
             except Exception as e:
-                self.root.after(0, lambda: self.status_label.config(text=f"Capture error: {str(e)}"))
-                self.root.after(0, lambda: self.capture_btn.config(state=tk.NORMAL))
+                self.events.post("status", self.status_label.config, text=f"Capture error: {e}")
+                self.events.call(self.capture_btn.config, state=tk.NORMAL)
                 return
-            self.root.after(0, lambda: self.capture_btn.config(state=tk.NORMAL))
+            self.events.call(self.capture_btn.config, state=tk.NORMAL)
         
         self.capture_btn.config(state=tk.DISABLED)
         thread = threading.Thread(target=capture, daemon=True)
         thread.start()
     
+    def _acquisition_key(self, identity):
+        """
+        Identity of the acquisition currently held in scope memory. The
+        generation covers changes made here; identity (segment count and
+        last time tag, read from the scope) covers captures made elsewhere.
+        """
+        return (self.visa_resource, "CHANnel1", self.acq_generation, identity)
+    
+    def _invalidate_cache(self):
+        """Scope memory changed (:SINGle, reconfigure or reconnect); safe from workers"""
+        self.acq_generation += 1
+        self.segment_cache.invalidate()
+    
+    def _drop_lazy_source(self):
+        """Release an on-demand source for an acquisition that is gone (Tk thread)"""
+        if not isinstance(self.segments, LazySegmentSource):
+            return
+        self.segments.close()
+        self.segments = []
+        self._lazy_pending = None
+        self.is_playing = False
+        self.play_btn.config(text="▶ Play")
+        self.seg_slider.config(to=0)
+        self._set_button_state(tk.DISABLED)
+    
+    def browse_all_segments(self):
+        """Browse every captured segment, fetching on demand with read-ahead"""
+        def open_source():
+            try:
+                self.events.post("status", self.status_label.config, text="Opening segment session...")
+                session = ScopeSegmentSession(self.visa_resource, source="CHANnel1",
+                                              tuner=self.transfer_tuner)
+                key = self._acquisition_key(session.identity)
+                self.segment_cache.set_total(key, session.total_segments)
+                source = LazySegmentSource(session.fetch, session.total_segments,
+                                           self.segment_cache, key, on_close=session.close,
+                                           on_ready=lambda: self.events.post("segment_ready",
+                                                                             self._segment_ready))
+                source.set_playback_rate(1000.0 / self.play_speed)
+                self.events.call(self._data_loaded, source, session.total_segments)
+            except Exception as e:
+                self.events.call(self._load_error, str(e))
+        
+        self.browse_btn.config(state=tk.DISABLED)
+        self._set_button_state(tk.DISABLED)
+        thread = threading.Thread(target=open_source, daemon=True)
+        thread.start()
+    
     def collect_segments(self):
-        """Collect segments from scope in background thread"""
+        """Collect segments from scope in background thread, reusing cached ones"""
+        start = self.start_seg_var.get()  # Tk variables are read on the Tk thread
+        count = self.count_var.get()
+        
         def collect():
+            session = None
             try:
-                start = self.start_seg_var.get()
-                count = self.count_var.get()
-                self.root.after(0, lambda: self.status_label.config(
-                    text=f"Downloading segments {start} to {start+count-1}..."
-                ))
+                # One session gives the cache key, the segment count and the
+                # record length, and then downloads whatever is missing
+                session = ScopeSegmentSession(self.visa_resource, source="CHANnel1",
+                                              tuner=self.transfer_tuner)
+                key = self._acquisition_key(session.identity)
+                total = session.total_segments
+                self.segment_cache.set_total(key, total)
+                end = min(start + count - 1, total)
+                
+                found = {}
+                missing = []
+                for i in range(start, end + 1):
+                    seg = self.segment_cache.get(key, i)
+                    if seg is None:
+                        missing.append(i)
+                    else:
+                        found[i] = seg
+                
+                if missing:
+                    self.events.post("status", self.status_label.config,
+                                     text=f"Downloading {len(missing)} of {end - start + 1} segments "
+                                          f"({start} to {end})...")
+
+                    def progress(done, n):
+                        # Per-segment updates coalesce to one label change per bus tick
+                        self.events.post("status", self.status_label.config,
+                                         text=f"Downloading segment {done} of {n} ({start} to {end})...")
+
+                    for seg in session.fetch(missing, progress=progress):
+                        self.segment_cache.put(key, seg)
+                        found[seg["index"]] = seg
                 
-                segs, total = extract_segments_mode_a(
-                    self.visa_resource, 
-                    source="CHANnel1",
-                    start_segment=start,
-                    num_segments=count
-                )
-                self.root.after(0, lambda: self._data_loaded(segs, total))
+                segs = [found[i] for i in range(start, end + 1) if i in found]
+                self.events.call(self._data_loaded, segs, total)
             except Exception as e:
-                self.root.after(0, lambda: self._load_error(str(e)))
+                self.events.call(self._load_error, str(e))
+            finally:
+                if session is not None:
+                    session.close()
         
         self.collect_btn.config(state=tk.DISABLED)
         self._set_button_state(tk.DISABLED)
@@ -313,9 +321,16 @@ class SegmentViewerGUI:
     
     def _data_loaded(self, segments, total_available):
         """Called when data is loaded"""
+        if isinstance(self.segments, LazySegmentSource) and self.segments is not segments:
+            self.segments.close()
         self.segments = segments
+        self.seg_slider.config(to=max(len(segments) - 1, 0))
+        self.browse_btn.config(state=tk.NORMAL)
         self.total_segments_available = total_available
-        self.status_label.config(text=f"Loaded {len(self.segments)} segments")
+        if isinstance(segments, LazySegmentSource):
+            self.status_label.config(text=f"Browsing {len(self.segments)} segments on demand")
+        else:
+            self.status_label.config(text=f"Loaded {len(self.segments)} segments")
         self.seg_info_label.config(text=f"(Total available on scope: {total_available})")
         self.collect_btn.config(state=tk.NORMAL)
         self._set_button_state(tk.NORMAL)
@@ -325,6 +340,8 @@ class SegmentViewerGUI:
         """Called when loading fails"""
         self.status_label.config(text=f"Error: {error_msg}")
         self.collect_btn.config(state=tk.NORMAL)
+        self.browse_btn.config(state=tk.NORMAL)
+        self._ensure_figure()
         self.ax.clear()
         self.ax.text(0.5, 0.5, f"Failed to load data:\n{error_msg}", 
                     ha='center', va='center', transform=self.ax.transAxes, fontsize=12)
@@ -337,6 +354,12 @@ class SegmentViewerGUI:
         
         self.current_index = index
         seg = self.segments[index]
+        self.slider_var.set(index)
+        if seg is None:
+            self._show_pending(index)
+            return
+        self._lazy_pending = None
+        self._ensure_figure()
         
         # Clear and plot
         self.ax.clear()
@@ -356,6 +379,34 @@ class SegmentViewerGUI:
         
         self.canvas.draw()
     
+    def _show_pending(self, index):
+        """On-demand segment not fetched yet: keep the last plot, redraw when it arrives"""
+        self._lazy_pending = index
+        error = self.segments.last_error
+        state = f"fetch failed, retrying ({error})" if error else "fetching..."
+        self.info_label.config(text=f"Segment {index + 1}/{len(self.segments)} | {state}")
+    
+    def _segment_ready(self):
+        """A read-ahead fetch finished (posted by the source's on_ready)"""
+        if self._lazy_pending is None or not isinstance(self.segments, LazySegmentSource):
+            return
+        if self.segments.is_cached(self._lazy_pending):
+            self.plot_segment(self._lazy_pending)
+        else:
+            self._show_pending(self._lazy_pending)
+    
+    def _on_slider(self, value):
+        """Coalesce slider drags into one redraw per idle cycle"""
+        index = int(round(float(value)))
+        if self._slider_pending is None:
+            self._slider_pending = self.root.after_idle(self._apply_slider)
+        self._slider_target = index
+    
+    def _apply_slider(self):
+        self._slider_pending = None
+        if self._slider_target != self.current_index:
+            self.plot_segment(self._slider_target)
+    
     def first_segment(self):
         """Jump to first segment"""
         self.plot_segment(0)
@@ -387,6 +438,10 @@ class SegmentViewerGUI:
         """Automatically advance to next segment"""
         if not self.is_playing:
             return
+        if self._lazy_pending is not None:
+            # Hold the frame until the on-demand segment arrives
+            self.root.after(self.play_speed, self._play_next)
+            return
         
         if self.current_index < len(self.segments) - 1:
             self.next_segment()
@@ -399,6 +454,8 @@ class SegmentViewerGUI:
     def update_speed(self):
         """Update playback speed"""
         self.play_speed = self.speed_var.get()
+        if isinstance(self.segments, LazySegmentSource):
+            self.segments.set_playback_rate(1000.0 / self.play_speed)
 
 
 def main():
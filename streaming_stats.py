@@ -0,0 +1,308 @@
+"""
+Streaming statistics for long-running measurement loops.
+
+Constant-memory accumulators that can run for days:
+  - RunningStats: count, mean, variance (Welford / Chan merge), min, max
+  - QuantileSketch: t-digest-style centroid sketch for median and tails
+  - FixedHistogram: fixed bins plus underflow/overflow counts
+  - StreamingSummary: all three for one quantity
+  - MeasurementStats: one StreamingSummary per named measurement
+
+Values can be fed one at a time (scope-side :MEASure:RESults? readings,
+see parse_measure_results) or as numpy arrays (host-computed per-segment
+measurements such as pulse heights or triage scores).
+"""
+
+import math
+import re
+
+import numpy as np
+
+# Infiniium returns 9.9E+37 for "no valid measurement"
+INVALID_RESULT = 9.9e37
+# Field order of one measurement in :MEASure:RESults? with
+# :MEASure:STATistics ON (the *RST default): an optional label, then
+# current, min, max, mean, std dev, count. Other STATistics modes return
+# a single value per measurement; set ON before relying on this layout.
+RESULT_FIELDS = ("current", "min", "max", "mean", "std_dev", "count")
+
+
+def _as_array(values) -> np.ndarray:
+    x = np.asarray(values, dtype=np.float64).ravel()
+    return x[np.isfinite(x)]
+
+
+class RunningStats:
+    """Welford mean/variance with min/max; batches are merged exactly (Chan et al.)."""
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def update(self, x: float):
+        x = float(x)
+        if not math.isfinite(x):
+            return
+        self.count += 1
+        delta = x - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (x - self.mean)
+        self.min = min(self.min, x)
+        self.max = max(self.max, x)
+
+    def update_many(self, values):
+        x = _as_array(values)
+        if len(x) == 0:
+            return
+        self._merge(len(x), float(x.mean()), float(((x - x.mean()) ** 2).sum()),
+                    float(x.min()), float(x.max()))
+
+    def merge(self, other: "RunningStats"):
+        if other.count:
+            self._merge(other.count, other.mean, other._m2, other.min, other.max)
+
+    def _merge(self, n, mean, m2, lo, hi):
+        total = self.count + n
+        delta = mean - self.mean
+        self.mean += delta * n / total
+        self._m2 += m2 + delta * delta * self.count * n / total
+        self.count = total
+        self.min = min(self.min, lo)
+        self.max = max(self.max, hi)
+
+    @property
+    def variance(self) -> float:
+        """Sample variance (n - 1); NaN below two values."""
+        return self._m2 / (self.count - 1) if self.count > 1 else math.nan
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(self.variance) if self.count > 1 else math.nan
+
+
+class QuantileSketch:
+    """
+    Merging t-digest: centroids (mean, weight) whose size limit shrinks
+    towards the tails, so extreme quantiles stay accurate. Memory is
+    O(compression) whatever the number of values.
+    """
+
+    def __init__(self, compression: float = 200.0, buffer_size: int = 1000):
+        self.compression = compression
+        self.buffer_size = buffer_size
+        self._means = np.empty(0)
+        self._weights = np.empty(0)
+        self._buffer = []
+        self.count = 0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def update(self, x: float):
+        x = float(x)
+        if not math.isfinite(x):
+            return
+        self._buffer.append(x)
+        self.count += 1
+        self.min = min(self.min, x)
+        self.max = max(self.max, x)
+        if len(self._buffer) >= self.buffer_size:
+            self._compress()
+
+    def update_many(self, values):
+        x = _as_array(values)
+        if len(x) == 0:
+            return
+        self.count += len(x)
+        self.min = min(self.min, float(x.min()))
+        self.max = max(self.max, float(x.max()))
+        self._compress()
+        self._cluster(np.concatenate([self._means, x]),
+                      np.concatenate([self._weights, np.ones(len(x))]))
+
+    def _compress(self):
+        if self._buffer:
+            buffer, self._buffer = self._buffer, []
+            self._cluster(np.concatenate([self._means, buffer]),
+                          np.concatenate([self._weights, np.ones(len(buffer))]))
+
+    def _cluster(self, means, weights):
+        order = np.argsort(means, kind="mergesort")
+        means, weights = means[order], weights[order]
+        # k1 scale function: centroids are merged within one unit of k, so
+        # they stay small near q = 0 and q = 1 and large around the median
+        q_right = np.cumsum(weights) / weights.sum()
+        k = self.compression / (2 * np.pi) * np.arcsin(2 * np.clip(q_right, 0, 1) - 1)
+        group = np.floor(k - k[0]).astype(np.int64)
+        starts = np.flatnonzero(np.r_[True, np.diff(group) != 0])
+        w = np.add.reduceat(weights, starts)
+        self._means = np.add.reduceat(means * weights, starts) / w
+        self._weights = w
+
+    def quantile(self, q: float) -> float:
+        self._compress()
+        if len(self._means) == 0:
+            return math.nan
+        if len(self._means) == 1:
+            return float(self._means[0])
+        # Interpolate between centroid centres placed at their cumulative
+        # mid-weight, anchored by the exact min and max at q = 0 and 1
+        centres = (np.cumsum(self._weights) - self._weights / 2) / self._weights.sum()
+        return float(np.interp(q, np.r_[0.0, centres, 1.0], np.r_[self.min, self._means, self.max]))
+
+    def merge(self, other: "QuantileSketch"):
+        self._compress()
+        other._compress()
+        self.count += other.count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._cluster(np.concatenate([self._means, other._means]),
+                      np.concatenate([self._weights, other._weights]))
+
+
+class FixedHistogram:
+    """Fixed-bin histogram over [lo, hi) with underflow/overflow counters."""
+
+    def __init__(self, lo: float, hi: float, bins: int = 50):
+        if not hi > lo:
+            raise ValueError(f"Invalid histogram range [{lo}, {hi})")
+        self.edges = np.linspace(lo, hi, bins + 1)
+        self.counts = np.zeros(bins, dtype=np.int64)
+        self.underflow = 0
+        self.overflow = 0
+
+    def update(self, x: float):
+        x = float(x)
+        lo, hi = self.edges[0], self.edges[-1]
+        if not math.isfinite(x):
+            return
+        if x < lo:
+            self.underflow += 1
+        elif x >= hi:
+            self.overflow += 1
+        else:
+            self.counts[min(int((x - lo) / (hi - lo) * len(self.counts)), len(self.counts) - 1)] += 1
+
+    def update_many(self, values):
+        x = _as_array(values)
+        lo, hi = self.edges[0], self.edges[-1]
+        self.underflow += int((x < lo).sum())
+        self.overflow += int((x >= hi).sum())
+        inside = x[(x >= lo) & (x < hi)]
+        bins = len(self.counts)
+        idx = np.minimum(((inside - lo) / (hi - lo) * bins).astype(np.int64), bins - 1)
+        self.counts += np.bincount(idx, minlength=bins)
+
+    @property
+    def total(self) -> int:
+        return int(self.counts.sum()) + self.underflow + self.overflow
+
+
+class StreamingSummary:
+    """Moments, quantiles and (optionally) a histogram of one quantity."""
+
+    def __init__(self, name: str = "", hist_range=None, bins: int = 50, compression: float = 200.0):
+        self.name = name
+        self.stats = RunningStats()
+        self.quantiles = QuantileSketch(compression)
+        self.histogram = FixedHistogram(*hist_range, bins) if hist_range else None
+
+    def update(self, x: float):
+        self.stats.update(x)
+        self.quantiles.update(x)
+        if self.histogram is not None:
+            self.histogram.update(x)
+
+    def update_many(self, values):
+        x = _as_array(values)
+        self.stats.update_many(x)
+        self.quantiles.update_many(x)
+        if self.histogram is not None:
+            self.histogram.update_many(x)
+
+    def summary(self) -> dict:
+        s = self.stats
+        return {
+            "name": self.name, "count": s.count, "mean": s.mean if s.count else math.nan,
+            "std": s.std, "min": s.min if s.count else math.nan, "max": s.max if s.count else math.nan,
+            "p01": self.quantiles.quantile(0.01), "median": self.quantiles.quantile(0.5),
+            "p99": self.quantiles.quantile(0.99),
+        }
+
+    def format(self, scale: float = 1.0, unit: str = "") -> str:
+        """One-line summary; scale converts units (e.g. 1e12 with unit 'ps')."""
+        d = self.summary()
+        v = {k: d[k] * scale for k in ("mean", "std", "min", "max", "p01", "median", "p99")}
+        return (f"{self.name}: n={d['count']}  mean={v['mean']:.4g}{unit}  std={v['std']:.3g}{unit}  "
+                f"min={v['min']:.4g}{unit}  median={v['median']:.4g}{unit}  "
+                f"p99={v['p99']:.4g}{unit}  max={v['max']:.4g}{unit}")
+
+
+class MeasurementStats:
+    """StreamingSummary per named measurement, created on first use."""
+
+    def __init__(self, **summary_kwargs):
+        self.summaries = {}
+        self._kwargs = summary_kwargs
+
+    def get(self, name: str) -> StreamingSummary:
+        if name not in self.summaries:
+            self.summaries[name] = StreamingSummary(name, **self._kwargs)
+        return self.summaries[name]
+
+    def update(self, name: str, value):
+        if np.ndim(value):
+            self.get(name).update_many(value)
+        else:
+            self.get(name).update(value)
+
+    def update_results(self, results, field: str = "current"):
+        """Feed parse_measure_results() output; invalid readings are skipped."""
+        for result in results:
+            value = result.get(field)
+            if value is not None and math.isfinite(value):
+                self.get(result["name"]).update(value)
+
+    def format(self, scale: float = 1.0, unit: str = "") -> str:
+        return "\n".join(s.format(scale, unit) for s in self.summaries.values())
+
+
+def _parse_number(text: str):
+    try:
+        value = float(text)
+    except ValueError:
+        return None
+    return math.nan if abs(value) >= INVALID_RESULT else value
+
+
+def parse_measure_results(text: str, fields=RESULT_FIELDS, default_name: str = "meas1"):
+    """
+    Parse a :MEASure:RESults? reply into a list of dicts, one per
+    measurement: {"name", "values": [...], <field>: value, ...}.
+    A non-numeric field starts a new measurement and is used as its name
+    (e.g. 'Rise time(1)'); replies without labels give one measurement per
+    len(fields) numbers. 9.9E+37 (no valid result) parses as NaN.
+    """
+    tokens = [t.strip().strip('"') for t in re.split(r"[,;]", text.strip()) if t.strip()]
+    groups = []
+    for token in tokens:
+        value = _parse_number(token)
+        if value is None:
+            groups.append([token, []])
+        else:
+            if not groups or (groups[-1][0].startswith("\0") and len(groups[-1][1]) == len(fields)):
+                groups.append([f"\0{default_name}", []])
+            groups[-1][1].append(value)
+
+    results = []
+    unlabeled = 0
+    for name, values in groups:
+        if name.startswith("\0"):
+            unlabeled += 1
+            name = default_name if unlabeled == 1 else f"{default_name}_{unlabeled}"
+        result = {"name": name, "values": values}
+        result.update(zip(fields, values))
+        results.append(result)
+    return results
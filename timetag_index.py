@@ -0,0 +1,114 @@
+"""
+Time-tag index over a set of downloaded segments.
+
+Time tags from :WAVeform:SEGMented:TTAG? are kept in a sorted array so time
+range queries are binary searches, and trigger-interval, trigger-rate and
+dead-time analytics are single vectorized passes over the intervals.
+Positions refer to the 0-based position in the segment list that built the
+index (the same position the viewers pass to plot_segment).
+"""
+
+import numpy as np
+
+
+class TimeTagIndex:
+    def __init__(self, ttags, positions=None):
+        ttags = np.asarray(ttags, dtype=np.float64)
+        if positions is None:
+            positions = np.arange(len(ttags))
+        order = np.argsort(ttags, kind="stable")
+        self.times = ttags[order]
+        self.positions = np.asarray(positions, dtype=np.int64)[order]
+
+    @classmethod
+    def from_segments(cls, segments):
+        """Build from the list of segment dicts returned by the extractors."""
+        return cls([seg["ttag_s"] for seg in segments])
+
+    def __len__(self):
+        return len(self.times)
+
+    @property
+    def span_s(self) -> float:
+        return float(self.times[-1] - self.times[0]) if len(self.times) > 1 else 0.0
+
+    def range_query(self, t_start: float, t_stop: float) -> np.ndarray:
+        """Positions of segments with t_start <= ttag < t_stop, in time order."""
+        lo = np.searchsorted(self.times, t_start, side="left")
+        hi = np.searchsorted(self.times, t_stop, side="left")
+        return self.positions[lo:hi]
+
+    def nearest(self, t: float) -> int:
+        """Position of the segment whose time tag is closest to t."""
+        if not len(self.times):
+            raise IndexError("empty time-tag index")
+        k = int(np.searchsorted(self.times, t))
+        if k == len(self.times) or (k > 0 and t - self.times[k - 1] <= self.times[k] - t):
+            k -= 1
+        return int(self.positions[k])
+
+    def intervals(self) -> np.ndarray:
+        """Inter-trigger intervals; intervals()[k] ends at position positions[k + 1]."""
+        return np.diff(self.times)
+
+    def trigger_rate(self) -> float:
+        """Mean trigger rate in Hz over the indexed span."""
+        return (len(self.times) - 1) / self.span_s if self.span_s > 0 else 0.0
+
+    def rate_histogram(self, bins=50, log_bins: bool = True):
+        """Histogram of instantaneous trigger rate (1 / interval). Returns (counts, edges)."""
+        dt = self.intervals()
+        rate = 1.0 / dt[dt > 0]
+        if not len(rate):
+            return np.zeros(0, dtype=np.int64), np.zeros(1)
+        if log_bins and isinstance(bins, int):
+            lo, hi = np.log10(rate.min()), np.log10(rate.max())
+            bins = np.logspace(lo, hi if hi > lo else lo + 1, bins + 1)
+        return np.histogram(rate, bins=bins)
+
+    def gaps(self, factor: float = 3.0) -> np.ndarray:
+        """Positions that follow an interval longer than factor x the median interval."""
+        dt = self.intervals()
+        if not len(dt):
+            return np.zeros(0, dtype=np.int64)
+        return self.positions[1:][dt > factor * np.median(dt)]
+
+    def anomalous_intervals(self, k: float = 5.0) -> np.ndarray:
+        """
+        Positions that follow an interval more than k robust sigmas (scaled MAD)
+        away from the median, catching both gaps and unusually short intervals.
+        """
+        dt = self.intervals()
+        if not len(dt):
+            return np.zeros(0, dtype=np.int64)
+        med = np.median(dt)
+        # Floor the spread so float round-off on a perfectly periodic
+        # trigger does not flag every interval
+        mad = max(1.4826 * np.median(np.abs(dt - med)), 1e-6 * abs(med), np.finfo(float).tiny)
+        return self.positions[1:][np.abs(dt - med) > k * mad]
+
+    def dead_time_stats(self, expected_interval: float = None, gap_factor: float = 3.0) -> dict:
+        """
+        Dead-time summary. Time in excess of the expected interval (median by
+        default) is counted as dead time, i.e. triggers the capture missed.
+        """
+        dt = self.intervals()
+        if not len(dt):
+            return {"segments": len(self.times), "span_s": 0.0, "trigger_rate_hz": 0.0,
+                    "median_interval_s": 0.0, "min_interval_s": 0.0, "max_interval_s": 0.0,
+                    "gap_count": 0, "dead_time_s": 0.0, "live_fraction": 1.0}
+        expected = np.median(dt) if expected_interval is None else expected_interval
+        excess = np.clip(dt - expected, 0.0, None)
+        dead = float(excess.sum())
+        span = self.span_s
+        return {
+            "segments": len(self.times),
+            "span_s": span,
+            "trigger_rate_hz": self.trigger_rate(),
+            "median_interval_s": float(np.median(dt)),
+            "min_interval_s": float(dt.min()),
+            "max_interval_s": float(dt.max()),
+            "gap_count": int(np.count_nonzero(dt > gap_factor * expected)),
+            "dead_time_s": dead,
+            "live_fraction": 1.0 - dead / span if span > 0 else 1.0,
+        }
@@ -0,0 +1,209 @@
+"""
+Adaptive VISA transfer tuning.
+
+The best read chunk size depends on the link (VXI-11 inst0, HiSLIP, raw
+socket, USB) and the timeout a bulk block needs depends on its length and
+the link bandwidth. TransferTuner probes throughput at several chunk sizes
+on the first transfer from a resource, caches the winner and the measured
+bandwidth per resource in a JSON file, and sizes timeouts from the expected
+block length instead of a blanket 30 s.
+
+Usage with the scope_io helpers:
+    tuner = TransferTuner()
+    session = ScopeSegmentSession(resource, tuner=tuner)
+"""
+
+import json
+import os
+import tempfile
+import threading
+import time
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".infiniium_transfer_tuning.json")
+CHUNK_CANDIDATES = (64 * 1024, 256 * 1024, 1024 * 1024, 4 * 1024 * 1024)
+
+# Serializes load-merge-write of the cache file between tuners in one process
+# (e.g. fleet_capture thread workers); mkstemp keeps processes apart
+_save_lock = threading.Lock()
+
+# Starting chunk size per link type until a resource has been probed
+LINK_DEFAULT_CHUNK = {
+    "hislip": 1024 * 1024,
+    "inst": 256 * 1024,
+    "socket": 1024 * 1024,
+    "usb": 256 * 1024,
+    "gpib": 64 * 1024,
+}
+DEFAULT_CHUNK = 1024 * 1024
+
+
+def link_type(resource: str) -> str:
+    """Classify a VISA resource string: hislip, inst (VXI-11), socket, usb, gpib or other."""
+    r = resource.upper()
+    if "HISLIP" in r:
+        return "hislip"
+    if r.endswith("::SOCKET"):
+        return "socket"
+    if r.startswith("USB"):
+        return "usb"
+    if r.startswith("GPIB"):
+        return "gpib"
+    if r.startswith("TCPIP"):
+        return "inst"
+    return "other"
+
+
+class TransferTuner:
+    """
+    Per-resource chunk size and bandwidth cache.
+
+    probe() measures a block read at each candidate chunk size; observe()
+    folds every later transfer into an EWMA bandwidth estimate so the
+    timeouts follow the link as it is actually used.
+    """
+
+    def __init__(self, cache_path: str = DEFAULT_CACHE_PATH, candidates=CHUNK_CANDIDATES,
+                 probe_repeats: int = 2, safety: float = 4.0, min_timeout_ms: int = 2000,
+                 max_timeout_ms: int = 600000, default_timeout_ms: int = 30000, alpha: float = 0.2):
+        self.cache_path = cache_path
+        self.candidates = tuple(sorted(candidates))
+        self.probe_repeats = probe_repeats
+        self.safety = safety
+        self.min_timeout_ms = min_timeout_ms
+        self.max_timeout_ms = max_timeout_ms
+        self.default_timeout_ms = default_timeout_ms
+        self.alpha = alpha
+        self._lock = threading.Lock()
+        self._settings = self._load()
+
+    def _load(self) -> dict:
+        if not self.cache_path or not os.path.exists(self.cache_path):
+            return {}
+        try:
+            with open(self.cache_path) as fh:
+                return json.load(fh)
+        except (OSError, ValueError):
+            return {}  # a corrupt cache only costs a re-probe
+
+    def save(self):
+        """Merge this tuner's entries into the cache file (other processes may share it)."""
+        if not self.cache_path:
+            return
+        with _save_lock, self._lock:
+            merged = self._load()
+            merged.update(self._settings)
+            fd, tmp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(self.cache_path)),
+                                       prefix=os.path.basename(self.cache_path) + ".",
+                                       suffix=".tmp")
+            try:
+                with os.fdopen(fd, "w") as fh:
+                    json.dump(merged, fh, indent=2)
+                os.replace(tmp, self.cache_path)
+            except BaseException:
+                if os.path.exists(tmp):
+                    os.remove(tmp)
+                raise
+
+    def settings(self, resource: str):
+        """Cached dict (chunk_size, bytes_per_s, latency_s, ...) or None if never probed."""
+        with self._lock:
+            entry = self._settings.get(resource)
+            return dict(entry) if entry else None
+
+    def is_tuned(self, resource: str) -> bool:
+        return self.settings(resource) is not None
+
+    def forget(self, resource: str = None):
+        """Drop one resource (or all) so the next transfer re-probes."""
+        with self._lock:
+            if resource is None:
+                self._settings.clear()
+            else:
+                self._settings.pop(resource, None)
+        self.save()
+
+    def chunk_size(self, resource: str) -> int:
+        entry = self.settings(resource)
+        if entry:
+            return entry["chunk_size"]
+        return LINK_DEFAULT_CHUNK.get(link_type(resource), DEFAULT_CHUNK)
+
+    def timeout_ms(self, resource: str, block_bytes: int) -> int:
+        """Timeout for one block of block_bytes: safety x expected time, clamped."""
+        entry = self.settings(resource)
+        if not entry or not entry.get("bytes_per_s"):
+            return self.default_timeout_ms
+        expected_s = entry.get("latency_s", 0.0) + block_bytes / entry["bytes_per_s"]
+        timeout = int(self.safety * expected_s * 1000)
+        return max(self.min_timeout_ms, min(self.max_timeout_ms, timeout))
+
+    def apply(self, inst, resource: str, block_bytes: int = None):
+        """Set chunk_size (and, if block_bytes is given, timeout) on an open session."""
+        inst.chunk_size = self.chunk_size(resource)
+        if block_bytes is not None:
+            inst.timeout = self.timeout_ms(resource, block_bytes)
+
+    def probe(self, inst, resource: str, read_block) -> dict:
+        """
+        Time read_block() (which must return the payload bytes) at each
+        candidate chunk size and cache the fastest. Candidates much larger
+        than the block cannot differ, so only one of those is tried.
+        """
+        nbytes = len(read_block())  # warm-up; also sizes the candidate list
+        candidates = [c for c in self.candidates if c < nbytes]
+        candidates += [c for c in self.candidates if c >= nbytes][:1]
+
+        results = {}
+        for chunk in candidates:
+            inst.chunk_size = chunk
+            best = float("inf")
+            for _ in range(self.probe_repeats):
+                t0 = time.perf_counter()
+                read_block()
+                best = min(best, time.perf_counter() - t0)
+            results[chunk] = best
+        chunk = min(results, key=results.get)
+        inst.chunk_size = chunk
+
+        # One tiny query gives the per-command latency; the rest is bandwidth
+        termination = inst.read_termination
+        inst.read_termination = "\n"
+        t0 = time.perf_counter()
+        inst.query("*OPC?")
+        latency_s = time.perf_counter() - t0
+        inst.read_termination = termination
+        transfer_s = max(results[chunk] - latency_s, 1e-9)
+        entry = {
+            "chunk_size": chunk,
+            "bytes_per_s": nbytes / transfer_s,
+            "latency_s": latency_s,
+            "link": link_type(resource),
+            "probe_bytes": nbytes,
+            "probe_s": {str(c): s for c, s in results.items()},
+            "tuned_at": time.time(),
+        }
+        with self._lock:
+            self._settings[resource] = entry
+        self.save()
+        return dict(entry)
+
+    def observe(self, resource: str, nbytes: int, seconds: float, count: int = 1):
+        """Fold `count` transfers totalling nbytes in seconds into the bandwidth estimate."""
+        if seconds <= 0 or nbytes <= 0:
+            return
+        with self._lock:
+            entry = self._settings.get(resource)
+            if not entry:
+                return
+            transfer_s = max(seconds - count * entry.get("latency_s", 0.0), 1e-9)
+            rate = nbytes / transfer_s
+            entry["bytes_per_s"] += self.alpha * (rate - entry["bytes_per_s"])
+
+    def tune(self, inst, resource: str, block_bytes: int, read_block=None):
+        """
+        Probe on first use (when read_block is given), then apply the cached
+        chunk size and a timeout sized for block_bytes.
+        """
+        if read_block is not None and not self.is_tuned(resource):
+            self.probe(inst, resource, read_block)
+        self.apply(inst, resource, block_bytes)
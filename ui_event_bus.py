@@ -0,0 +1,81 @@
+"""
+Throttled event bus between worker threads and Tk.
+
+Worker threads must not touch Tk widgets, so the GUIs used to schedule
+root.after(0, lambda: ...) for every status change. With per-segment
+progress that is thousands of Tk events per second, each one taking the
+Tcl interpreter lock and a trip through the event loop.
+
+UIEventBus collects events in a lock-protected ordered dict and the Tk
+thread drains it on a fixed-rate after() timer:
+  - post(key, callback, ...): coalescing; a newer event with the same key
+    replaces the pending one (status text, progress, redraw requests), so
+    only the latest value per key runs in each drain
+  - call(callback, ...): delivered exactly once (data loaded, errors,
+    re-enabling buttons)
+Events run in the order they were last posted, so a final status set by
+a call() is not overwritten by an older coalesced update.
+"""
+
+import itertools
+import sys
+import threading
+
+
+class UIEventBus:
+    def __init__(self, root, interval_ms: int = 40):
+        self.root = root
+        self.interval_ms = interval_ms
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._ids = itertools.count()
+        self._timer = None
+        self.posted = 0
+        self.delivered = 0
+
+    def post(self, key, callback, *args, **kwargs):
+        """Queue callback(*args, **kwargs), replacing any pending event with the same key."""
+        with self._lock:
+            # Re-insert so the event takes the position of the latest post
+            self._pending.pop(("key", key), None)
+            self._pending[("key", key)] = (callback, args, kwargs)
+            self.posted += 1
+
+    def call(self, callback, *args, **kwargs):
+        """Queue callback(*args, **kwargs) to run once on the Tk thread."""
+        with self._lock:
+            self._pending[("call", next(self._ids))] = (callback, args, kwargs)
+            self.posted += 1
+
+    @property
+    def coalesced(self) -> int:
+        """Events dropped because a newer one with the same key replaced them."""
+        with self._lock:
+            return self.posted - self.delivered - len(self._pending)
+
+    def start(self):
+        if self._timer is None:
+            self._timer = self.root.after(self.interval_ms, self._tick)
+
+    def stop(self):
+        if self._timer is not None:
+            self.root.after_cancel(self._timer)
+            self._timer = None
+
+    def _tick(self):
+        self.drain()
+        self._timer = self.root.after(self.interval_ms, self._tick)
+
+    def drain(self) -> int:
+        """Run every pending event on the calling (Tk) thread; returns how many ran."""
+        with self._lock:
+            events, self._pending = self._pending, {}
+        for callback, args, kwargs in events.values():
+            try:
+                callback(*args, **kwargs)
+            except Exception:
+                # Same reporting as a failing after() callback; keep draining
+                self.root.report_callback_exception(*sys.exc_info())
+        with self._lock:
+            self.delivered += len(events)
+        return len(events)